@@ -0,0 +1,91 @@
+"""
+Compares column introspection through information_schema.columns with the pg_catalog
+query used by get_column_definitions, on a schema with many tables.
+
+Creates the tables in the schema sqlark_bench, which is dropped when the benchmark finishes.
+Connection settings are read from the PG* environment variables.
+
+    python benchmarks/bench_column_introspection.py --tables 2000 --lookups 200
+"""
+
+import argparse
+import random
+import time
+from psycopg2 import sql
+from sqlark import PostgresConfig
+from sqlark.utilities import column_definitions_query
+
+INFORMATION_SCHEMA_QUERY = sql.SQL(
+    """
+    SELECT table_name, column_name name, data_type, is_nullable, column_default default
+    FROM information_schema.columns
+    WHERE table_schema='sqlark_bench' AND table_name=%s
+    """
+)
+
+CATALOG_QUERY = column_definitions_query(
+    sql.SQL("n.nspname = 'sqlark_bench' AND c.relname = %s")
+)
+
+
+def drop_tables(cursor):
+    # Drop the tables one at a time to stay within max_locks_per_transaction
+    cursor.execute("SELECT tablename FROM pg_tables WHERE schemaname = 'sqlark_bench'")
+    for (table_name,) in cursor.fetchall():
+        cursor.execute(
+            sql.SQL("DROP TABLE sqlark_bench.{}").format(sql.Identifier(table_name))
+        )
+    cursor.execute("DROP SCHEMA IF EXISTS sqlark_bench")
+
+
+def create_tables(cursor, tables: int, columns: int):
+    cursor.execute("CREATE SCHEMA IF NOT EXISTS sqlark_bench")
+    drop_tables(cursor)
+    cursor.execute("CREATE SCHEMA sqlark_bench")
+    column_sql = ", ".join(f"c{i} text" for i in range(columns))
+    for t in range(tables):
+        cursor.execute(
+            f"CREATE TABLE sqlark_bench.t{t} (id serial primary key, {column_sql})"
+        )
+
+
+def time_lookups(cursor, query, table_names) -> float:
+    start = time.perf_counter()
+    for table_name in table_names:
+        cursor.execute(query, [table_name])
+        cursor.fetchall()
+    return (time.perf_counter() - start) / len(table_names)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tables", type=int, default=2000)
+    parser.add_argument("--columns", type=int, default=10)
+    parser.add_argument("--lookups", type=int, default=200)
+    args = parser.parse_args()
+
+    # A non-transactional session commits each statement, so table locks are not accumulated
+    with PostgresConfig().session() as session, session.connect_with_cursor() as cursor:
+        print(f"Creating {args.tables} tables with {args.columns + 1} columns")
+        create_tables(cursor, args.tables, args.columns)
+        try:
+            cursor.execute("ANALYZE")
+            table_names = [
+                f"t{random.randrange(args.tables)}" for _ in range(args.lookups)
+            ]
+            # Warm up the catalog caches of the backend
+            time_lookups(cursor, INFORMATION_SCHEMA_QUERY, table_names[:10])
+            time_lookups(cursor, CATALOG_QUERY, table_names[:10])
+
+            info_schema = time_lookups(cursor, INFORMATION_SCHEMA_QUERY, table_names)
+            catalog = time_lookups(cursor, CATALOG_QUERY, table_names)
+        finally:
+            drop_tables(cursor)
+
+    print(f"information_schema.columns: {info_schema * 1000:8.3f} ms per table")
+    print(f"pg_catalog:                 {catalog * 1000:8.3f} ms per table")
+    print(f"speedup:                    {info_schema / catalog:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
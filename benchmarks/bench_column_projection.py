@@ -0,0 +1,47 @@
+"""
+Measures the time to select the id and title of posts carrying a large jsonb body,
+selecting every column and projecting the two columns with Select.columns().
+
+Creates temporary tables, connection settings are read from the PG* environment variables.
+
+    python benchmarks/bench_column_projection.py --rows 2000 --body-size 50000
+"""
+
+import argparse
+import time
+from sqlark import PostgresConfig, Select
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--body-size", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with PostgresConfig().session() as session:
+        with session.connect_with_cursor() as cursor:
+            cursor.execute(
+                "CREATE TEMP TABLE bench_posts (id integer primary key, title text, body jsonb)"
+            )
+            cursor.execute(
+                "INSERT INTO bench_posts SELECT i, 'post ' || i, "
+                "jsonb_build_object('text', repeat(md5(i::text), %s / 32)) "
+                "FROM generate_series(1, %s) i",
+                (args.body_size, args.rows),
+            )
+
+        for name, select in (
+            ("all columns", Select("bench_posts")),
+            ("columns(id, title)", Select("bench_posts").columns("id", "title")),
+        ):
+            select.respond_with_object().execute(session)
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                select.execute(session)
+            elapsed = (time.perf_counter() - start) / args.repeat
+            print(f"{name:20}{elapsed * 1000:10.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
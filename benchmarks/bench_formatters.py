@@ -0,0 +1,74 @@
+"""
+Measures the throughput of execute() for each response formatter,
+with the default DictCursor and with plain tuple cursors (cursor_factory=None).
+
+Creates a temporary table with the given number of rows.
+Connection settings are read from the PG* environment variables.
+
+    python benchmarks/bench_formatters.py --rows 200000
+"""
+
+import argparse
+import time
+from psycopg2.extras import DictCursor
+from sqlark import PostgresConfig, Select
+
+FORMATTERS = {
+    "dict": lambda s: s,
+    "tuples": lambda s: s.respond_with_tuples(),
+    "decomposed": lambda s: s.respond_with_decomposed_dict(),
+    "object": lambda s: s.respond_with_object(),
+    "object slots": lambda s: s.respond_with_object(slots=True),
+    "arrow": lambda s: s.respond_with_arrow(),
+}
+
+CURSOR_FACTORIES = {"DictCursor": DictCursor, "tuple": None}
+
+
+def rows_per_second(session, respond, rows: int, repeat: int) -> float:
+    select = respond(Select("bench_posts"))
+    select.execute(session)
+
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = select.execute(session)
+        best = min(best, time.perf_counter() - start)
+    assert len(result) == rows
+    return rows / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'':14}" + "".join(f"{name:>14}" for name in CURSOR_FACTORIES))
+    results = {}
+    for factory_name, cursor_factory in CURSOR_FACTORIES.items():
+        with PostgresConfig(cursor_factory=cursor_factory).session() as session:
+            with session.connect_with_cursor() as cursor:
+                cursor.execute(
+                    """
+                    CREATE TEMP TABLE bench_posts AS
+                    SELECT i AS id, i %% 100 AS author_id, 'Post ' || i AS title,
+                        now() AS created_at, i %% 2 = 0 AS published
+                    FROM generate_series(1, %s) i
+                    """,
+                    [args.rows],
+                )
+            for name, respond in FORMATTERS.items():
+                results[(name, factory_name)] = rows_per_second(
+                    session, respond, args.rows, args.repeat
+                )
+
+    for name in FORMATTERS:
+        print(
+            f"{name:14}"
+            + "".join(f"{results[(name, f)]:>10,.0f} r/s" for f in CURSOR_FACTORIES)
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Compares json.dumps of the rows returned by execute() with the JSON encoded by the server
+with respond_with_json(), for the flat, decomposed and newline delimited shapes.
+
+Creates a temporary table with the given number of rows.
+Connection settings are read from the PG* environment variables.
+
+    python benchmarks/bench_json.py --rows 100000
+"""
+
+import argparse
+import json
+import time
+from sqlark import PostgresConfig, Select
+
+RESPONSES = {
+    "json.dumps(dict)": lambda s, session: json.dumps(s.execute(session), default=str),
+    "json.dumps(decomposed)": lambda s, session: json.dumps(
+        s.respond_with_decomposed_dict().execute(session), default=str
+    ),
+    "respond_with_json": lambda s, session: s.respond_with_json().execute(session),
+    "respond_with_json(decomposed)": lambda s, session: s.respond_with_json(
+        decomposed=True
+    ).execute(session),
+    "respond_with_json(lines)": lambda s, session: s.respond_with_json(
+        lines=True
+    ).execute(session),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with PostgresConfig().session() as session:
+        with session.connect_with_cursor() as cursor:
+            cursor.execute(
+                """
+                CREATE TEMP TABLE bench_posts AS
+                SELECT i AS id, i %% 100 AS author_id, 'Post ' || i AS title,
+                    now() AS created_at, i %% 2 = 0 AS published
+                FROM generate_series(1, %s) i
+                """,
+                [args.rows],
+            )
+
+        for name, respond in RESPONSES.items():
+            respond(Select("bench_posts"), session)
+            best = float("inf")
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                body = respond(Select("bench_posts"), session)
+                best = min(best, time.perf_counter() - start)
+            print(
+                f"{name:32}{best * 1000:10.1f} ms {len(body) / 1e6:8.1f} MB"
+                f"{args.rows / best:12,.0f} r/s"
+            )
+
+
+if __name__ == "__main__":
+    main()
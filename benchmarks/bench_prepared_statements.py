@@ -0,0 +1,80 @@
+"""
+Measures the time to execute a select over a wide join, with and without server-side prepared statements.
+With prepare_threshold set the statement is planned once per connection instead of on every execute().
+
+Creates temporary tables, connection settings are read from the PG* environment variables.
+
+    python benchmarks/bench_prepared_statements.py --executions 5000
+"""
+
+import argparse
+import time
+from sqlark import PostgresConfig, Select
+
+TABLES = ["authors", "posts", "comments", "tags", "post_tags", "likes"]
+
+
+def select(post_id: int) -> Select:
+    return (
+        Select("bench_posts")
+        .join(right_table="bench_authors", left_col="author_id", right_col="id")
+        .join(right_table="bench_comments", right_col="post_id", type="LEFT OUTER")
+        .join(right_table="bench_likes", right_col="post_id", type="LEFT OUTER")
+        .join(right_table="bench_post_tags", right_col="post_id", type="LEFT OUTER")
+        .join(
+            left_table="bench_post_tags",
+            left_col="tag_id",
+            right_table="bench_tags",
+            right_col="id",
+            type="LEFT OUTER",
+        )
+        .where(table="bench_posts", column="id", operator="=", value=post_id)
+        .order_by("id", table="bench_comments")
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--executions", type=int, default=5000)
+    args = parser.parse_args()
+
+    for prepare_threshold in (None, 5):
+        with PostgresConfig(prepare_threshold=prepare_threshold).session() as session:
+            with session.connect_with_cursor() as cursor:
+                cursor.execute(
+                    """
+                    CREATE TEMP TABLE bench_authors (id integer primary key, name text, email text);
+                    CREATE TEMP TABLE bench_posts (id integer primary key, title text, body text,
+                        created_at timestamptz, author_id integer);
+                    CREATE TEMP TABLE bench_comments (id integer primary key, post_id integer,
+                        author_id integer, body text, created_at timestamptz);
+                    CREATE TEMP TABLE bench_tags (id integer primary key, name text);
+                    CREATE TEMP TABLE bench_post_tags (post_id integer, tag_id integer);
+                    CREATE TEMP TABLE bench_likes (id integer primary key, post_id integer, author_id integer);
+                    INSERT INTO bench_authors SELECT i, 'author ' || i, i || '@example.com'
+                        FROM generate_series(1, 100) i;
+                    INSERT INTO bench_posts SELECT i, 'post ' || i, 'body', now(), i % 100 + 1
+                        FROM generate_series(1, 1000) i;
+                    INSERT INTO bench_comments SELECT i, i % 1000 + 1, i % 100 + 1, 'comment', now()
+                        FROM generate_series(1, 5000) i;
+                    INSERT INTO bench_tags SELECT i, 'tag ' || i FROM generate_series(1, 20) i;
+                    INSERT INTO bench_post_tags SELECT i % 1000 + 1, i % 20 + 1 FROM generate_series(1, 2000) i;
+                    INSERT INTO bench_likes SELECT i, i % 1000 + 1, i % 100 + 1 FROM generate_series(1, 5000) i;
+                    """
+                    + "".join(f"ANALYZE bench_{table};" for table in TABLES)
+                )
+            for i in range(10):
+                select(i).execute(session)
+
+            start = time.perf_counter()
+            for i in range(args.executions):
+                select(i % 1000 + 1).execute(session)
+            elapsed = time.perf_counter() - start
+            print(
+                f"prepare_threshold={prepare_threshold!s:6}"
+                f"{elapsed / args.executions * 1e6:10.1f} us per execute"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Measures how RelationFormatter.format scales with the number of joined rows.
+Each post has 10 comments, and every comment has one of 100 authors.
+The time per row should stay flat as the number of rows grows.
+
+Does not need a database, the column definitions are given.
+
+    python benchmarks/bench_relation_formatter.py --rows 1000 5000 20000
+"""
+
+import argparse
+import time
+from sqlark.column_definition import ColumnDefinition
+from sqlark.response_formatters import RelationFormatter
+
+COLUMN_DEFINITIONS = {
+    "posts": [
+        ColumnDefinition("posts", "id", "integer", is_primary_key=True),
+        ColumnDefinition("posts", "title", "text"),
+    ],
+    "comments": [
+        ColumnDefinition("comments", "id", "integer", is_primary_key=True),
+        ColumnDefinition("comments", "post_id", "integer"),
+        ColumnDefinition("comments", "author_id", "integer"),
+        ColumnDefinition("comments", "body", "text"),
+    ],
+    "authors": [
+        ColumnDefinition("authors", "id", "integer", is_primary_key=True),
+        ColumnDefinition("authors", "name", "text"),
+    ],
+}
+
+
+class PostsCommand:
+    """The parts of a Select used by RelationFormatter"""
+
+    table_name = "posts"
+
+    def get_column_definitions(self, pg_config):  # pylint: disable=unused-argument
+        return {t: list(c) for t, c in COLUMN_DEFINITIONS.items()}
+
+
+def result_set(rows: int) -> list:
+    return [
+        {
+            "posts.id": i // 10,
+            "posts.title": f"Post {i // 10}",
+            "comments.id": i,
+            "comments.post_id": i // 10,
+            "comments.author_id": i % 100,
+            "comments.body": f"Comment {i}",
+            "authors.id": i % 100,
+            "authors.name": f"Author {i % 100}",
+        }
+        for i in range(rows)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 5000, 20000])
+    args = parser.parse_args()
+
+    formatter = (
+        RelationFormatter()
+        .set_relation("posts.comments", "comments")
+        .set_relation("comments.author", "authors", relationship_type="one")
+    )
+    command = PostsCommand()
+    formatter.format(result_set(10), None, command)
+
+    for rows in args.rows:
+        data = result_set(rows)
+        start = time.perf_counter()
+        posts = formatter.format(data, None, command)
+        elapsed = time.perf_counter() - start
+        assert len(posts) == (rows + 9) // 10
+        print(
+            f"{rows:8} rows {elapsed * 1000:10.1f} ms {elapsed / rows * 1e6:8.2f} us per row"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Compares the relation loading strategies of RelationFormatter on posts with many comments and tags.
+The join strategy fetches comments x tags rows per post, the lateral strategy one row per post,
+and the selectin strategy one query for the posts and one per relation.
+
+Creates temporary tables, connection settings are read from the PG* environment variables.
+
+    python benchmarks/bench_relation_loading.py --posts 100 --comments 200 --tags 5
+"""
+
+import argparse
+import time
+from sqlark import PostgresConfig, Select
+from sqlark.response_formatters import RelationFormatter
+
+
+def relation_formatter(strategy: str) -> RelationFormatter:
+    return (
+        RelationFormatter(strategy=strategy)
+        .set_relation(
+            "bench_posts.comments", "bench_comments", foreign_column="post_id"
+        )
+        .set_relation("bench_posts.tags", "bench_tags", foreign_column="post_id")
+    )
+
+
+def joined_select() -> Select:
+    return (
+        Select("bench_posts")
+        .join(right_table="bench_comments", right_col="post_id", type="LEFT OUTER")
+        .join(right_table="bench_tags", right_col="post_id", type="LEFT OUTER")
+    )
+
+
+STRATEGIES = {
+    "join": lambda: joined_select().respond_with_associated_objects(
+        relation_formatter("join")
+    ),
+    "lateral": lambda: Select("bench_posts").respond_with_associated_objects(
+        relation_formatter("lateral")
+    ),
+    "selectin": lambda: Select("bench_posts").respond_with_associated_objects(
+        relation_formatter("selectin")
+    ),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--posts", type=int, default=100)
+    parser.add_argument("--comments", type=int, default=200)
+    parser.add_argument("--tags", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with PostgresConfig().session() as session:
+        with session.connect_with_cursor() as cursor:
+            cursor.execute(
+                """
+                CREATE TEMP TABLE bench_posts AS
+                SELECT i AS id, 'Post ' || i AS title, now() AS created_at
+                FROM generate_series(1, %(posts)s) i;
+                ALTER TABLE bench_posts ADD PRIMARY KEY (id);
+                CREATE TEMP TABLE bench_comments AS
+                SELECT (p - 1) * %(comments)s + c AS id, p AS post_id, 'Comment ' || c AS body
+                FROM generate_series(1, %(posts)s) p, generate_series(1, %(comments)s) c;
+                ALTER TABLE bench_comments ADD PRIMARY KEY (id);
+                CREATE INDEX ON bench_comments (post_id);
+                CREATE TEMP TABLE bench_tags AS
+                SELECT (p - 1) * %(tags)s + t AS id, p AS post_id, 'tag' || t AS name
+                FROM generate_series(1, %(posts)s) p, generate_series(1, %(tags)s) t;
+                ALTER TABLE bench_tags ADD PRIMARY KEY (id);
+                CREATE INDEX ON bench_tags (post_id);
+                ANALYZE bench_posts, bench_comments, bench_tags;
+                """,
+                vars(args),
+            )
+
+        for name, select in STRATEGIES.items():
+            posts = select().execute(session)
+            best = float("inf")
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                posts = select().execute(session)
+                best = min(best, time.perf_counter() - start)
+            assert len(posts) == args.posts
+            assert len(posts[0].comments) == args.comments
+            assert len(posts[0].tags) == args.tags
+            print(f"{name:10}{best * 1000:10.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
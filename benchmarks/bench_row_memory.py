@@ -0,0 +1,76 @@
+"""
+Compares the memory used per row by the objects of respond_with_object()
+with and without slotted (and frozen) row classes.
+
+Creates a temporary table with the given number of rows.
+Connection settings are read from the PG* environment variables.
+
+    python benchmarks/bench_row_memory.py --rows 500000
+"""
+
+import argparse
+import gc
+import tracemalloc
+from sqlark import PostgresConfig, Select
+
+VARIANTS = {
+    "dataclass": {},
+    "slots": {"slots": True},
+    "slots+frozen": {"slots": True, "frozen": True},
+}
+
+
+def measure(session, rows: int, **options) -> float:
+    select = Select("bench_posts").respond_with_object(**options)
+    # Build the classes and fill the catalog cache before measuring
+    select.limit(1).execute(session)
+    select.limit(rows)
+
+    # Fetch the rows first so that only the objects are measured
+    with session.connect_with_cursor() as cursor:
+        cursor.execute(select.to_sql(session), select.get_params() or None)
+        result_set = cursor.fetchall()
+        formatter = select._response_formatter  # pylint: disable=protected-access
+
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objects = formatter(result_set, session, select)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    assert len(objects) == rows
+    return (after - before) / rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=500000)
+    args = parser.parse_args()
+
+    with PostgresConfig().session() as session:
+        with session.connect_with_cursor() as cursor:
+            cursor.execute(
+                """
+                CREATE TEMP TABLE bench_posts AS
+                SELECT i AS id, i %% 100 AS author_id, 'Post ' || i AS title,
+                    now() AS created_at, i %% 2 = 0 AS published
+                FROM generate_series(1, %s) i
+                """,
+                [args.rows],
+            )
+
+        results = {
+            name: measure(session, args.rows, **options)
+            for name, options in VARIANTS.items()
+        }
+
+    baseline = results["dataclass"]
+    for name, bytes_per_row in results.items():
+        print(
+            f"{name:14} {bytes_per_row:8.1f} bytes per row ({bytes_per_row / baseline:4.0%})"
+        )
+
+
+if __name__ == "__main__":
+    main()
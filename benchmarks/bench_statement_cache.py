@@ -0,0 +1,61 @@
+"""
+Measures the time to build and execute a small select over a join, with and without the statement cache.
+The statement is rebuilt for every execute() with a different parameter, as in a request handler.
+
+Creates temporary tables, connection settings are read from the PG* environment variables.
+
+    python benchmarks/bench_statement_cache.py --executions 5000
+"""
+
+import argparse
+import time
+from sqlark import PostgresConfig, Select
+
+
+def select(post_id: int) -> Select:
+    return (
+        Select("bench_posts")
+        .join(right_table="bench_comments", right_col="post_id", type="LEFT OUTER")
+        .join(
+            left_table="bench_comments",
+            left_col="author_id",
+            right_table="bench_authors",
+            right_col="id",
+            type="LEFT OUTER",
+        )
+        .where(column="id", operator="=", value=post_id)
+        .order_by("id")
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--executions", type=int, default=5000)
+    args = parser.parse_args()
+
+    for statement_cache in (False, True):
+        with PostgresConfig(statement_cache=statement_cache).session() as session:
+            with session.connect_with_cursor() as cursor:
+                cursor.execute(
+                    """
+                    CREATE TEMP TABLE bench_authors (id integer primary key, name text, email text);
+                    CREATE TEMP TABLE bench_posts (id integer primary key, title text, body text,
+                        created_at timestamptz, author_id integer);
+                    CREATE TEMP TABLE bench_comments (id integer primary key, post_id integer,
+                        author_id integer, body text, created_at timestamptz);
+                    """
+                )
+            select(0).execute(session)
+
+            start = time.perf_counter()
+            for i in range(args.executions):
+                select(i).execute(session)
+            elapsed = time.perf_counter() - start
+            print(
+                f"statement_cache={statement_cache!s:6}"
+                f"{elapsed / args.executions * 1e6:10.1f} us per execute"
+            )
+
+
+if __name__ == "__main__":
+    main()
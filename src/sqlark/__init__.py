@@ -1,6 +1,7 @@
 """Init for postgres_client"""
 
 from .postgres_config import PostgresConfig
+from .session import Session
 from .select import Select
 from .insert import Insert
 from .where import Where
@@ -12,6 +13,7 @@ from .column_definition import ColumnDefinition
 
 __all__ = [
     "PostgresConfig",
+    "Session",
     "ColumnDefinition",
     "Select",
     "Insert",
@@ -0,0 +1,299 @@
+"""
+Asyncio connection pool built on psycopg2's asynchronous connections
+"""
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from dataclasses import replace
+from typing import Callable, List
+import psycopg2
+from psycopg2 import extensions
+from psycopg2.extras import DictCursor
+from sqlark.connection_pool import CHECK_INTERVAL, PoolStats, PooledConnection
+from sqlark.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+async def wait_ready(connection: psycopg2.extensions.connection):
+    """
+    Wait for an asynchronous connection to finish its current operation
+    without blocking the event loop
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        state = connection.poll()
+        if state == extensions.POLL_OK:
+            return
+
+        future = loop.create_future()
+        fileno = connection.fileno()
+        if state == extensions.POLL_READ:
+            loop.add_reader(fileno, future.set_result, None)
+            try:
+                await future
+            finally:
+                loop.remove_reader(fileno)
+        elif state == extensions.POLL_WRITE:
+            loop.add_writer(fileno, future.set_result, None)
+            try:
+                await future
+            finally:
+                loop.remove_writer(fileno)
+        else:
+            raise psycopg2.OperationalError(f"Unexpected poll state {state}")
+
+
+class AsyncCursor:
+    """
+    Wraps a cursor of an asynchronous connection so that execute() can be awaited.
+    Every other attribute is delegated to the wrapped cursor.
+    """
+
+    def __init__(self, cursor: psycopg2.extensions.cursor):
+        self.cursor = cursor
+
+    def __getattr__(self, name):
+        return getattr(self.cursor, name)
+
+    async def execute(self, query, params=None):
+        """
+        Execute a query and wait for the result
+        """
+        self.cursor.execute(query, params)
+        await wait_ready(self.cursor.connection)
+
+
+class AsyncConnectionPool:
+    """
+    A bounded pool of asynchronous psycopg2 connections for use on a single event loop.
+    Accepts the same sizing, timeout and health check arguments as ConnectionPool.
+
+    Asynchronous connections are always in autocommit mode, transactions are
+    started explicitly by connect_with_cursor(transactional=True).
+    """
+
+    # pylint: disable=too-many-instance-attributes
+    def __init__(
+        self,
+        connection_params: Callable[[], dict],
+        min_size: int = 1,
+        max_size: int = 10,
+        idle_timeout: float = 300.0,
+        max_lifetime: float = 3600.0,
+        timeout: float = 30.0,
+        check_interval: float = CHECK_INTERVAL,
+    ):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        if min_size < 0 or min_size > max_size:
+            raise ValueError("min_size must be between 0 and max_size")
+
+        self._connection_params = connection_params
+        self.min_size = min_size
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.max_lifetime = max_lifetime
+        self.timeout = timeout
+        self.check_interval = check_interval
+
+        self._condition = asyncio.Condition()
+        self._idle: List[PooledConnection] = []
+        self._in_use: dict[int, PooledConnection] = {}
+        self._size = 0
+        self._closed = False
+        self._stats = PoolStats()
+
+    @property
+    def stats(self) -> PoolStats:
+        """
+        Returns a snapshot of the pool statistics
+        """
+        return replace(self._stats, size=self._size, idle=len(self._idle))
+
+    async def getconn(self) -> psycopg2.extensions.connection:
+        """
+        Check a connection out of the pool, waiting up to timeout seconds for one to become available
+        """
+        deadline = time.monotonic() + self.timeout
+        waited = False
+        while True:
+            async with self._condition:
+                if self._closed:
+                    raise ValueError("Connection pool is closed")
+
+                self._prune()
+                pooled = None
+                if self._idle:
+                    pooled = self._idle.pop()
+                elif self._size < self.max_size:
+                    self._size += 1
+                else:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats.timeouts += 1
+                        raise TimeoutError(
+                            f"Timed out after {self.timeout}s waiting for a connection"
+                        )
+                    if not waited:
+                        self._stats.waits += 1
+                        waited = True
+                    start = time.monotonic()
+                    try:
+                        await asyncio.wait_for(self._condition.wait(), remaining)
+                    except asyncio.TimeoutError:
+                        pass
+                    self._stats.wait_time += time.monotonic() - start
+                    continue
+
+            if pooled is None:
+                pooled = await self._open()
+            elif not await self._is_healthy(pooled):
+                await self._discard(pooled)
+                continue
+
+            self._stats.checkouts += 1
+            self._in_use[id(pooled.connection)] = pooled
+            return pooled.connection
+
+    async def putconn(self, connection: psycopg2.extensions.connection, discard=False):
+        """
+        Return a connection to the pool.
+        Connections that are closed, still executing, or past max_lifetime are closed instead of being reused.
+        """
+        pooled = self._in_use.pop(id(connection), None)
+        if pooled is None:
+            raise ValueError("Connection does not belong to this pool")
+
+        if not discard and not connection.closed:
+            try:
+                if connection.isexecuting():
+                    discard = True
+                elif (
+                    connection.info.transaction_status
+                    != extensions.TRANSACTION_STATUS_IDLE
+                ):
+                    await AsyncCursor(connection.cursor()).execute("ROLLBACK")
+            except psycopg2.Error:
+                discard = True
+
+        now = time.monotonic()
+        if (
+            discard
+            or self._closed
+            or connection.closed
+            or now - pooled.created_at > self.max_lifetime
+        ):
+            await self._discard(pooled)
+            return
+
+        pooled.last_used = now
+        async with self._condition:
+            self._idle.append(pooled)
+            self._condition.notify()
+
+    @asynccontextmanager
+    async def connect_with_cursor(self, transactional=False, cursor_factory=DictCursor):
+        """
+        Check out a connection and yield an AsyncCursor.
+        When transactional is True the cursor runs inside a transaction that is committed on exit.
+        """
+        connection = await self.getconn()
+        try:
+            cursor = AsyncCursor(connection.cursor(cursor_factory=cursor_factory))
+            try:
+                if transactional:
+                    await cursor.execute("BEGIN")
+                yield cursor
+                if transactional:
+                    await cursor.execute("COMMIT")
+            finally:
+                if not connection.closed and not connection.isexecuting():
+                    cursor.close()
+        finally:
+            # putconn rolls back an open transaction and discards a connection with a query in flight
+            await self.putconn(connection)
+
+    async def close(self):
+        """
+        Close all idle connections. Checked out connections are closed when they are returned.
+        """
+        async with self._condition:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._condition.notify_all()
+        for pooled in idle:
+            await self._discard(pooled)
+
+    async def _open(self) -> PooledConnection:
+        """
+        Open a new connection for a slot that has already been reserved
+        """
+        try:
+            connection = psycopg2.connect(**self._connection_params(), async_=True)
+            await wait_ready(connection)
+        except BaseException:
+            async with self._condition:
+                self._size -= 1
+                self._condition.notify()
+            raise
+
+        self._stats.connections_created += 1
+        logger.debug("Opened pooled async connection")
+        now = time.monotonic()
+        return PooledConnection(connection, created_at=now, last_used=now)
+
+    async def _discard(self, pooled: PooledConnection):
+        """
+        Close a connection and release its slot
+        """
+        try:
+            pooled.connection.close()
+        except psycopg2.Error:
+            pass
+        async with self._condition:
+            self._size -= 1
+            self._stats.connections_closed += 1
+            self._condition.notify()
+
+    async def _is_healthy(self, pooled: PooledConnection) -> bool:
+        """
+        Health check performed on checkout
+        """
+        now = time.monotonic()
+        if pooled.connection.closed or now - pooled.created_at > self.max_lifetime:
+            return False
+
+        if now - pooled.last_used < self.check_interval:
+            return True
+
+        try:
+            cursor = AsyncCursor(pooled.connection.cursor())
+            await cursor.execute("SELECT 1")
+            cursor.close()
+        except psycopg2.Error:
+            self._stats.health_check_failures += 1
+            logger.debug("Pooled async connection failed its health check")
+            return False
+        return True
+
+    def _prune(self):
+        """
+        Close idle connections that exceeded idle_timeout, keeping at least min_size connections.
+        Must be called while holding the lock.
+        """
+        now = time.monotonic()
+        expired = [
+            p
+            for p in self._idle[: max(len(self._idle) - self.min_size, 0)]
+            if now - p.last_used > self.idle_timeout
+        ]
+        for pooled in expired:
+            self._idle.remove(pooled)
+            try:
+                pooled.connection.close()
+            except psycopg2.Error:
+                pass
+            self._size -= 1
+            self._stats.connections_closed += 1
@@ -0,0 +1,211 @@
+"""
+Encoders for streaming rows through COPY ... FROM STDIN
+"""
+
+import json
+import struct
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterable, Iterator, List
+from uuid import UUID
+from sqlark.column_definition import ColumnDefinition
+
+COPY_FORMATS = ("text", "binary")
+
+BINARY_HEADER = b"PGCOPY\n\xff\r\n\x00" + struct.pack(">ii", 0, 0)
+BINARY_TRAILER = struct.pack(">h", -1)
+
+POSTGRES_EPOCH = datetime(2000, 1, 1)
+POSTGRES_EPOCH_TZ = datetime(2000, 1, 1, tzinfo=timezone.utc)
+POSTGRES_EPOCH_DATE = date(2000, 1, 1)
+
+TEXT_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
+
+class CopyStream:
+    """
+    A read-only file-like object that lazily encodes rows for cursor.copy_expert
+    """
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._buffer = bytearray()
+
+    def read(self, size=-1) -> bytes:
+        """
+        Read up to size bytes, or everything that is left if size is negative
+        """
+        while size < 0 or len(self._buffer) < size:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            self._buffer += chunk
+
+        if size < 0 or size > len(self._buffer):
+            size = len(self._buffer)
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+
+def text_array_literal(values: list) -> str:
+    """
+    Format a list as a postgres array literal, i.e. {1,"two",NULL}
+    """
+    elements = []
+    for v in values:
+        if v is None:
+            elements.append("NULL")
+        elif isinstance(v, list):
+            elements.append(text_array_literal(v))
+        else:
+            if isinstance(v, bool):
+                v = "t" if v else "f"
+            escaped = str(v).replace("\\", "\\\\").replace('"', '\\"')
+            elements.append(f'"{escaped}"')
+    return "{" + ",".join(elements) + "}"
+
+
+def text_value(value, column: ColumnDefinition) -> str:
+    """
+    Format a value in the COPY text format, without escaping
+    """
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return "\\x" + bytes(value).hex()
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, list) and column.data_type == "ARRAY":
+        return text_array_literal(value)
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return str(value)
+
+
+def encode_text_rows(
+    values: List[Dict], columns: List[ColumnDefinition], encoding: str
+) -> Iterator[bytes]:
+    """
+    Encode rows in the COPY text format. Missing keys are written as NULL.
+    """
+    for row in values:
+        fields = []
+        for c in columns:
+            value = row.get(c.name)
+            if value is None:
+                fields.append("\\N")
+            else:
+                fields.append(text_value(value, c).translate(TEXT_ESCAPES))
+        yield ("\t".join(fields) + "\n").encode(encoding)
+
+
+def _binary_timestamp(value: datetime) -> bytes:
+    if value.tzinfo is None:
+        delta = value - POSTGRES_EPOCH
+    else:
+        delta = value - POSTGRES_EPOCH_TZ
+    return struct.pack(">q", delta // timedelta(microseconds=1))
+
+
+def _binary_timestamptz(value: datetime) -> bytes:
+    # Naive datetimes are assumed to be UTC
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return struct.pack(">q", (value - POSTGRES_EPOCH_TZ) // timedelta(microseconds=1))
+
+
+def _binary_date(value: date) -> bytes:
+    if isinstance(value, datetime):
+        value = value.date()
+    return struct.pack(">i", (value - POSTGRES_EPOCH_DATE).days)
+
+
+def _binary_uuid(value) -> bytes:
+    return (value if isinstance(value, UUID) else UUID(str(value))).bytes
+
+
+def binary_encoders(encoding: str) -> Dict[str, Callable[[Any], bytes]]:
+    """
+    Binary encoders keyed by data type.
+    Data types that are missing are not supported by binary COPY, use the text format instead.
+    """
+    text = lambda v: str(v).encode(encoding)
+    as_json = lambda v: (v if isinstance(v, str) else json.dumps(v)).encode(encoding)
+    encoders: Dict[str, Callable[[Any], bytes]] = {
+        "boolean": lambda v: b"\x01" if v else b"\x00",
+        "smallint": lambda v: struct.pack(">h", v),
+        "integer": lambda v: struct.pack(">i", v),
+        "bigint": lambda v: struct.pack(">q", v),
+        "real": lambda v: struct.pack(">f", v),
+        "double precision": lambda v: struct.pack(">d", v),
+        "text": text,
+        "character varying": text,
+        "varchar": text,
+        "character": text,
+        "char": text,
+        "bpchar": text,
+        "name": text,
+        "bytea": bytes,
+        "json": as_json,
+        "jsonb": lambda v: b"\x01" + as_json(v),
+        "uuid": _binary_uuid,
+        "date": _binary_date,
+        "timestamp": _binary_timestamp,
+        "timestamp without time zone": _binary_timestamp,
+        "timestamp with time zone": _binary_timestamptz,
+    }
+    return encoders
+
+
+def encode_binary_rows(
+    values: List[Dict], columns: List[ColumnDefinition], encoding: str
+) -> Iterator[bytes]:
+    """
+    Encode rows in the COPY binary format. Missing keys are written as NULL.
+    """
+    available = binary_encoders(encoding)
+    encoders = [(c.name, available[c.data_type]) for c in columns]
+    field_count = struct.pack(">h", len(columns))
+    null = struct.pack(">i", -1)
+
+    yield BINARY_HEADER
+    for row in values:
+        fields = [field_count]
+        for name, encode in encoders:
+            value = row.get(name)
+            if value is None:
+                fields.append(null)
+                continue
+            try:
+                data = encode(value)
+            except (TypeError, ValueError, AttributeError, struct.error) as e:
+                raise ValueError(
+                    f"Could not encode {value!r} for column {name} - {str(e)}"
+                ) from e
+            fields.append(struct.pack(">i", len(data)))
+            fields.append(data)
+        yield b"".join(fields)
+    yield BINARY_TRAILER
+
+
+def copy_stream(
+    values: List[Dict],
+    columns: List[ColumnDefinition],
+    format: str = "text",
+    encoding: str = "utf-8",
+) -> CopyStream:
+    """
+    Returns a CopyStream that encodes values in the order of columns using the COPY format
+    """
+    if format == "text":
+        return CopyStream(encode_text_rows(values, columns, encoding))
+    if format == "binary":
+        unsupported = [
+            c.name for c in columns if c.data_type not in binary_encoders(encoding)
+        ]
+        if unsupported:
+            raise ValueError(
+                f"Binary COPY does not support the data types of columns {unsupported}, use the text format"
+            )
+        return CopyStream(encode_binary_rows(values, columns, encoding))
+    raise ValueError(f"Invalid COPY format {format}, expected one of {COPY_FORMATS}")
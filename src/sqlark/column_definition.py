@@ -21,6 +21,7 @@ class ColumnDefinition:
     is_list: bool = False
     alias: str | None = None
     function: str | None = None
+    is_primary_key: bool = False
 
     def __post_init__(self):
         """
@@ -2,13 +2,21 @@
 Abstract SQL command class
 """
 
+import functools
 from abc import ABC, abstractmethod
-from typing import List, Dict
+from typing import List, Dict, Tuple
 import psycopg2
 from sqlark.postgres_config import PostgresConfig
 from sqlark.logger import get_logger
 from sqlark import response_formatters
-from sqlark.utilities import ColumnDefinition, get_column_definitions
+from sqlark.response_formatters import accepts_description
+from sqlark.statement_cache import STATEMENT_CACHE
+from sqlark.schema_cache import SCHEMA_CACHE
+from sqlark.utilities import (
+    ColumnDefinition,
+    get_column_definitions,
+    get_column_definitions_async,
+)
 
 
 class SQLCommand(ABC):
@@ -25,7 +33,7 @@ class SQLCommand(ABC):
         self._response_formatter = response_formatters.default_response_formatter
 
     @abstractmethod
-    def to_sql(self, pg_config: PostgresConfig) -> psycopg2.sql.SQL:
+    def to_sql(self, pg_config: PostgresConfig) -> psycopg2.sql.Composable:
         """
         Returns the SQL representation of the command
         """
@@ -38,6 +46,56 @@ class SQLCommand(ABC):
         """
         raise NotImplementedError
 
+    async def execute_async(self, pg_config: PostgresConfig, transactional=False):
+        """
+        Executes the command on the asynchronous connection pool without blocking the event loop
+        params:
+            pg_config: PostgresConfig The configuration for the postgres connection
+            transactional: bool Whether to execute the command in a transaction
+        """
+        await self.prefetch_column_definitions_async(pg_config)
+        key, command = self.compile(pg_config)
+        params = self.get_params()
+
+        async with pg_config.async_connect_with_cursor(
+            transactional=transactional
+        ) as cursor:
+            command = self.render(key, command, cursor.cursor)
+            self.logger.debug(command)
+            if params:
+                self.logger.debug(params)
+                await cursor.execute(command, params)
+            else:
+                await cursor.execute(command)
+            result = cursor.fetchall()
+            description = cursor.description
+
+        # Format after returning the connection, a RelationFormatter may run more queries on the pool.
+        # Subclasses that override format are formatted with their format method.
+        relation_formatter = self.relation_formatter
+        if (
+            relation_formatter is not None
+            and type(relation_formatter).format
+            is response_formatters.RelationFormatter.format
+        ):
+            return await relation_formatter.format_async(
+                result, pg_config, self, description=description
+            )
+        return self.format_response(result, pg_config, description)
+
+    def format_response(
+        self, result_set: list, pg_config: PostgresConfig, description=None
+    ):
+        """
+        Formats a result set with the response formatter of the command.
+        The cursor description is only passed to formatters that accept it.
+        """
+        if description is not None and accepts_description(self._response_formatter):
+            return self._response_formatter(
+                result_set, pg_config, self, description=description
+            )
+        return self._response_formatter(result_set, pg_config, self)
+
     @property
     @abstractmethod
     def table_name(self):
@@ -46,6 +104,93 @@ class SQLCommand(ABC):
         """
         raise NotImplementedError
 
+    @property
+    def relation_formatter(self) -> "response_formatters.RelationFormatter | None":
+        """
+        The RelationFormatter set by respond_with_associated_objects, if any
+        """
+        formatter = getattr(self._response_formatter, "__self__", None)
+        if isinstance(formatter, response_formatters.RelationFormatter):
+            return formatter
+        return None
+
+    @property
+    def catalog_tables(self) -> List[str]:
+        """
+        The tables whose column definitions are read from the catalog to build and format this command
+        """
+        return [self.table_name]
+
+    def get_params(self) -> list:
+        """
+        Returns the parameters for the command
+        """
+        return []
+
+    def fingerprint(self) -> Tuple | None:
+        """
+        Returns a hashable key of the shape of the command, i.e. everything that determines the SQL text
+        except the parameters, or None if the SQL of the command is not cached
+        """
+        return None
+
+    # pylint: disable=unused-argument
+    def deferred_columns(
+        self, pg_config: PostgresConfig
+    ) -> Dict[str, Tuple[str, Tuple[str, ...]]]:
+        """
+        Returns the key column and the deferred columns of each table whose objects load columns on first access
+        """
+        return {}
+
+    def compile(
+        self, pg_config: PostgresConfig
+    ) -> Tuple[Tuple | None, str | psycopg2.sql.Composable]:
+        """
+        Returns the statement cache key of the command and its SQL.
+        The SQL is the rendered text when a command of the same shape was rendered before, otherwise to_sql().
+        With a schema_cache_ttl, the statement is built again when the definitions of a table have expired.
+        """
+        fingerprint = self.fingerprint() if pg_config.statement_cache else None
+        if fingerprint is None:
+            return None, self.to_sql(pg_config)
+
+        if pg_config.schema_cache_ttl is not None and not all(
+            SCHEMA_CACHE.get(pg_config, table) is not None
+            for table in self.catalog_tables
+        ):
+            # to_sql reloads the expired definitions, the key is taken after they may have changed
+            command = self.to_sql(pg_config)
+            return STATEMENT_CACHE.key(pg_config, fingerprint), command
+
+        key = STATEMENT_CACHE.key(pg_config, fingerprint)
+        statement = STATEMENT_CACHE.get(key)
+        if statement is None:
+            return key, self.to_sql(pg_config)
+        return key, statement
+
+    @staticmethod
+    def render(
+        key: Tuple | None, command: str | psycopg2.sql.Composable, cursor
+    ) -> str:
+        """
+        Renders the SQL returned by compile with the cursor, and caches it under key
+        """
+        if isinstance(command, str):
+            return command
+        statement = command.as_string(cursor)
+        if key is not None:
+            STATEMENT_CACHE.set(key, statement)
+        return statement
+
+    async def prefetch_column_definitions_async(self, pg_config: PostgresConfig):
+        """
+        Loads the column definitions of catalog_tables into the cache using the asynchronous pool,
+        so that to_sql and the response formatters do not block the event loop on a catalog query
+        """
+        for table in self.catalog_tables:
+            await get_column_definitions_async(table, pg_config)
+
     def get_column_definitions(
         self, pg_config: PostgresConfig
     ) -> Dict[str, List[ColumnDefinition]]:
@@ -58,6 +203,31 @@ class SQLCommand(ABC):
         ).copy()
         return col_defs
 
+    def respond_with_tuples(self):
+        """
+        Respond to execute() with a tuple per row, in the order of the selected columns.
+        Combined with PostgresConfig(cursor_factory=None) the fetched rows are returned as they are.
+        """
+        self._response_formatter = response_formatters.tuple_response_formatter
+        return self
+
+    def respond_with_columns(self):
+        """
+        Respond to execute() with a dictionary of NumPy arrays, one per column, keyed by "table_name.column_name".
+        Requires numpy.
+        """
+        self._response_formatter = response_formatters.columns_response_formatter
+        return self
+
+    def respond_with_arrow(self):
+        """
+        Respond to execute() with a pyarrow.Table, one column per "table_name.column_name".
+        With Select.iter_execute the result arrives as a sequence of record batches.
+        Requires pyarrow.
+        """
+        self._response_formatter = response_formatters.arrow_response_formatter
+        return self
+
     def respond_with_decomposed_dict(self):
         """
         Respond to execute() with a dictionary of dictionaries.
@@ -67,11 +237,14 @@ class SQLCommand(ABC):
         self._response_formatter = response_formatters.decompose_dict_response_formatter
         return self
 
-    def respond_with_object(self):
+    def respond_with_object(self, slots: bool = False, frozen: bool = False):
         """
         Respond to execute() with an object constructed from the result
         There is one object per row.
 
+        With slots=True the row classes use __slots__, which uses much less memory per row for large results.
+        With frozen=True the objects are immutable and hashable.
+
         If the query does not have a join, the object will have attributes for each column in the table.
 
         If the query has a join, the object will have attributes for each table joined in the query.
@@ -102,7 +275,14 @@ class SQLCommand(ABC):
         ]
         """
 
-        self._response_formatter = response_formatters.object_response_formatter
+        if slots or frozen:
+            self._response_formatter = functools.partial(
+                response_formatters.object_response_formatter,
+                slots=slots,
+                frozen=frozen,
+            )
+        else:
+            self._response_formatter = response_formatters.object_response_formatter
         return self
 
     def respond_with_associated_objects(
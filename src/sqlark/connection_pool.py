@@ -0,0 +1,276 @@
+"""
+Thread-safe connection pool used by PostgresConfig in pooled mode
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, replace
+from typing import Callable, List
+import psycopg2
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+from sqlark.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Seconds a connection may be idle before it is checked with a "SELECT 1" on checkout
+CHECK_INTERVAL = 5.0
+
+
+@dataclass
+class PoolStats:
+    """
+    Counters describing the activity of a connection pool
+    """
+
+    # pylint: disable=too-many-instance-attributes
+    size: int = 0
+    idle: int = 0
+    checkouts: int = 0
+    waits: int = 0
+    wait_time: float = 0.0
+    timeouts: int = 0
+    connections_created: int = 0
+    connections_closed: int = 0
+    health_check_failures: int = 0
+
+
+@dataclass
+class PooledConnection:
+    """
+    A connection held by the pool along with its bookkeeping timestamps
+    """
+
+    connection: psycopg2.extensions.connection
+    created_at: float
+    last_used: float
+
+
+class ConnectionPool:
+    """
+    A bounded pool of psycopg2 connections.
+
+    params:
+        connect: Callable returning a new psycopg2 connection
+        min_size: int Number of idle connections kept open when pruning idle connections
+        max_size: int Maximum number of connections (idle and checked out)
+        idle_timeout: float Seconds an idle connection is kept before it is closed
+        max_lifetime: float Seconds after which a connection is closed instead of being reused
+        timeout: float Seconds to wait for a free connection before raising a TimeoutError
+        check_interval: float Connections idle for longer than this many seconds are checked
+                        with a "SELECT 1" on checkout, CHECK_INTERVAL by default. 0 checks on every checkout.
+    """
+
+    # pylint: disable=too-many-instance-attributes
+    def __init__(
+        self,
+        connect: Callable[[], psycopg2.extensions.connection],
+        min_size: int = 1,
+        max_size: int = 10,
+        idle_timeout: float = 300.0,
+        max_lifetime: float = 3600.0,
+        timeout: float = 30.0,
+        check_interval: float = CHECK_INTERVAL,
+    ):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        if min_size < 0 or min_size > max_size:
+            raise ValueError("min_size must be between 0 and max_size")
+
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.max_lifetime = max_lifetime
+        self.timeout = timeout
+        self.check_interval = check_interval
+
+        self._condition = threading.Condition()
+        self._idle: List[PooledConnection] = []
+        self._in_use: dict[int, PooledConnection] = {}
+        self._size = 0
+        self._closed = False
+        self._stats = PoolStats()
+
+    @property
+    def stats(self) -> PoolStats:
+        """
+        Returns a snapshot of the pool statistics
+        """
+        with self._condition:
+            return replace(self._stats, size=self._size, idle=len(self._idle))
+
+    def getconn(self) -> psycopg2.extensions.connection:
+        """
+        Check a connection out of the pool, waiting up to timeout seconds for one to become available
+        """
+        deadline = time.monotonic() + self.timeout
+        waited = False
+        while True:
+            with self._condition:
+                if self._closed:
+                    raise ValueError("Connection pool is closed")
+
+                self._prune()
+                pooled = None
+                if self._idle:
+                    # Reuse the most recently returned connection
+                    pooled = self._idle.pop()
+                elif self._size < self.max_size:
+                    # Reserve a slot, the connection is opened outside of the lock
+                    self._size += 1
+                else:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats.timeouts += 1
+                        raise TimeoutError(
+                            f"Timed out after {self.timeout}s waiting for a connection"
+                        )
+                    if not waited:
+                        self._stats.waits += 1
+                        waited = True
+                    start = time.monotonic()
+                    self._condition.wait(remaining)
+                    self._stats.wait_time += time.monotonic() - start
+                    continue
+
+            if pooled is None:
+                pooled = self._open()
+            elif not self._is_healthy(pooled):
+                self._discard(pooled)
+                continue
+
+            with self._condition:
+                self._stats.checkouts += 1
+                self._in_use[id(pooled.connection)] = pooled
+            return pooled.connection
+
+    def putconn(self, connection: psycopg2.extensions.connection, discard=False):
+        """
+        Return a connection to the pool.
+        Connections that are closed, broken, or past max_lifetime are closed instead of being reused.
+        """
+        with self._condition:
+            pooled = self._in_use.pop(id(connection), None)
+        if pooled is None:
+            raise ValueError("Connection does not belong to this pool")
+
+        if not discard and not connection.closed:
+            try:
+                if connection.info.transaction_status != TRANSACTION_STATUS_IDLE:
+                    connection.rollback()
+            except psycopg2.Error:
+                discard = True
+
+        now = time.monotonic()
+        if (
+            discard
+            or self._closed
+            or connection.closed
+            or now - pooled.created_at > self.max_lifetime
+        ):
+            self._discard(pooled)
+            return
+
+        pooled.last_used = now
+        with self._condition:
+            self._idle.append(pooled)
+            self._condition.notify()
+
+    @contextmanager
+    def connection(self):
+        """
+        Context manager that checks a connection out and returns it to the pool on exit
+        """
+        connection = self.getconn()
+        try:
+            yield connection
+        except BaseException:
+            self.putconn(connection, discard=bool(connection.closed))
+            raise
+        self.putconn(connection)
+
+    def close(self):
+        """
+        Close all idle connections. Checked out connections are closed when they are returned.
+        """
+        with self._condition:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._condition.notify_all()
+        for pooled in idle:
+            self._discard(pooled)
+
+    def _open(self) -> PooledConnection:
+        """
+        Open a new connection for a slot that has already been reserved
+        """
+        try:
+            connection = self._connect()
+        except BaseException:
+            with self._condition:
+                self._size -= 1
+                self._condition.notify()
+            raise
+
+        now = time.monotonic()
+        with self._condition:
+            self._stats.connections_created += 1
+        logger.debug("Opened pooled connection")
+        return PooledConnection(connection, created_at=now, last_used=now)
+
+    def _discard(self, pooled: PooledConnection):
+        """
+        Close a connection and release its slot
+        """
+        try:
+            pooled.connection.close()
+        except psycopg2.Error:
+            pass
+        with self._condition:
+            self._size -= 1
+            self._stats.connections_closed += 1
+            self._condition.notify()
+
+    def _is_healthy(self, pooled: PooledConnection) -> bool:
+        """
+        Health check performed on checkout
+        """
+        now = time.monotonic()
+        if pooled.connection.closed or now - pooled.created_at > self.max_lifetime:
+            return False
+
+        if now - pooled.last_used < self.check_interval:
+            return True
+
+        try:
+            with pooled.connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            if pooled.connection.info.transaction_status != TRANSACTION_STATUS_IDLE:
+                pooled.connection.rollback()
+        except psycopg2.Error:
+            with self._condition:
+                self._stats.health_check_failures += 1
+            logger.debug("Pooled connection failed its health check")
+            return False
+        return True
+
+    def _prune(self):
+        """
+        Close idle connections that exceeded idle_timeout, keeping at least min_size connections.
+        Must be called while holding the lock.
+        """
+        now = time.monotonic()
+        expired = [
+            p
+            for p in self._idle[: max(len(self._idle) - self.min_size, 0)]
+            if now - p.last_used > self.idle_timeout
+        ]
+        for pooled in expired:
+            self._idle.remove(pooled)
+            try:
+                pooled.connection.close()
+            except psycopg2.Error:
+                pass
+            self._size -= 1
+            self._stats.connections_closed += 1
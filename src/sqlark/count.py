@@ -7,6 +7,7 @@ from psycopg2 import sql
 from sqlark.column_definition import ColumnDefinition
 from sqlark.select import Select
 from sqlark.postgres_config import PostgresConfig
+from sqlark.statement_cache import composable_key
 
 
 class Count(Select):
@@ -52,6 +53,13 @@ class Count(Select):
 
         return col_definitions
 
+    @property
+    def catalog_tables(self) -> List[str]:
+        """
+        Count columns are defined by the command and do not need the catalog
+        """
+        return []
+
     def get_columns(self, table_name, pg_config) -> sql.Composed:
         """
         Override the get_columns method to return only those
@@ -84,6 +92,15 @@ class Count(Select):
 
         return self
 
+    def fingerprint(self):
+        """
+        Returns the shape of the count for the statement cache, including the grouped columns
+        """
+        fingerprint = super().fingerprint()
+        if fingerprint is None:
+            return None
+        return fingerprint + (composable_key(sql.Composed(self._columns)),)
+
     @property
     def group_by_sql(self):
         """
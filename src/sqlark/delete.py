@@ -6,6 +6,8 @@ from psycopg2 import sql
 from sqlark.logger import get_logger
 from sqlark.command import SQLCommand
 from sqlark.postgres_config import PostgresConfig
+from sqlark.prepared_statements import execute_statement
+from sqlark.statement_cache import composable_key
 from sqlark.where import Where
 
 logger = get_logger(__name__)
@@ -86,6 +88,13 @@ class Delete(SQLCommand):
         )
         return command
 
+    def fingerprint(self):
+        """
+        Returns the shape of the delete for the statement cache
+        """
+        where = None if self._where is None else composable_key(self._where.sql)
+        return (type(self), self._table_name, where)
+
     def get_params(self):
         """
         Returns the parameters for the where clause
@@ -100,12 +109,15 @@ class Delete(SQLCommand):
         """
         Executes the command
         params:
-            pg_config: PostgresConfig The configuration for the postgres connection
-            transactional: bool Whether to execute the command in a transaction
+            pg_config: PostgresConfig | Session The configuration or session for the postgres connection
+            transactional: bool Whether to execute the command in a transaction (ignored for a Session)
         """
-        command = self.to_sql(pg_config)
+        key, command = self.compile(pg_config)
 
         with pg_config.connect_with_cursor(transactional=transactional) as cursor:
-            self.logger.debug(command.as_string(cursor))
-            cursor.execute(command, self.get_params())
-            return self._response_formatter(cursor.fetchall(), pg_config, self)
+            command = self.render(key, command, cursor)
+            self.logger.debug(command)
+            execute_statement(cursor, command, self.get_params(), pg_config)
+            return self.format_response(
+                cursor.fetchall(), pg_config, cursor.description
+            )
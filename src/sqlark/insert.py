@@ -2,11 +2,15 @@
 Insert query builder
 """
 
+import uuid
 from psycopg2 import sql
+from psycopg2.extensions import AsIs, TRANSACTION_STATUS_INERROR, encodings
 from psycopg2.extras import execute_values
+from sqlark.bulk_copy import COPY_FORMATS, copy_stream
 from sqlark.logger import get_logger
 from sqlark.command import SQLCommand
 from sqlark.postgres_config import PostgresConfig
+from sqlark.utilities import get_column_definitions
 
 logger = get_logger(__name__)
 
@@ -24,6 +28,8 @@ class Insert(SQLCommand):
         self._on_conflict_constraints = None
         self._on_conflict_action = None
         self._values = None
+        self._copy_format = None
+        self._copy_staging = None
 
     @property
     def table_name(self):
@@ -99,6 +105,25 @@ class Insert(SQLCommand):
         self._values = values
         return self
 
+    def copy(self, format: str = "text", staging: bool | None = None):
+        """
+        Insert the values with COPY ... FROM STDIN instead of INSERT ... VALUES.
+        The values are encoded lazily and streamed in the order of columns.
+        params:
+            format: str The COPY format, either "text" or "binary"
+            staging: bool | None Copy into a temporary table and insert from it, so that on_conflict and
+                     RETURNING apply. Defaults to staging only when on_conflict is set.
+
+        COPY cannot return rows, so without staging execute() returns an empty list.
+        """
+        if format not in COPY_FORMATS:
+            raise ValueError(
+                f"Invalid COPY format {format}, expected one of {COPY_FORMATS}"
+            )
+        self._copy_format = format
+        self._copy_staging = staging
+        return self
+
     @property
     def columns(self):
         """
@@ -110,6 +135,13 @@ class Insert(SQLCommand):
 
         return sorted(columns)
 
+    @property
+    def values_template(self) -> str:
+        """
+        A template for one row of values, ordered by columns
+        """
+        return "(" + ", ".join([f"%({col})s" for col in self.columns]) + ")"
+
     def to_sql(self, pg_config: PostgresConfig) -> sql.SQL:
         """
         Overrides the SQLCommand to_sql method
@@ -132,15 +164,13 @@ class Insert(SQLCommand):
         """
         Executes the command
         params:
-            pg_config: PostgresConfig The configuration for the postgres connection
-            transactional: bool Whether to execute the command in a transaction
+            pg_config: PostgresConfig | Session The configuration or session for the postgres connection
+            transactional: bool Whether to execute the command in a transaction (ignored for a Session)
         """
-        command = self.to_sql(pg_config)
+        if self._copy_format is not None:
+            return self._execute_copy(pg_config, transactional)
 
-        # Construct a template for values to insert
-        named_value_template = (
-            "(" + ", ".join([f"%({col})s" for col in self.columns]) + ")"
-        )
+        command = self.to_sql(pg_config)
 
         with pg_config.connect_with_cursor(transactional=transactional) as cursor:
             self.logger.debug(command.as_string(cursor))
@@ -148,7 +178,124 @@ class Insert(SQLCommand):
                 cursor,
                 command,
                 self._values,
-                template=named_value_template,
+                template=self.values_template,
                 page_size=1000,
             )
-            return self._response_formatter(cursor.fetchall(), pg_config, self)
+            return self.format_response(
+                cursor.fetchall(), pg_config, cursor.description
+            )
+
+    async def execute_async(self, pg_config: PostgresConfig, transactional=False):
+        """
+        Executes the command on the asynchronous connection pool.
+        Like execute_values, the values are sent in pages of 1000 rows.
+        params:
+            pg_config: PostgresConfig The configuration for the postgres connection
+            transactional: bool Whether to execute the command in a transaction
+        """
+        if self._copy_format is not None:
+            raise ValueError("COPY is not supported by execute_async")
+
+        await self.prefetch_column_definitions_async(pg_config)
+        command = self.to_sql(pg_config)
+        page_size = 1000
+
+        async with pg_config.async_connect_with_cursor(
+            transactional=transactional
+        ) as cursor:
+            self.logger.debug(command.as_string(cursor.cursor))
+            encoding = encodings[cursor.connection.encoding]
+            result = []
+            for start in range(0, len(self._values), page_size):
+                values = b",".join(
+                    cursor.mogrify(self.values_template, v)
+                    for v in self._values[start : start + page_size]
+                )
+                await cursor.execute(command, [AsIs(values.decode(encoding))])
+                result.extend(cursor.fetchall())
+
+            return self.format_response(result, pg_config, cursor.description)
+
+    def _execute_copy(self, pg_config: PostgresConfig, transactional=False):
+        """
+        Executes the insert with COPY, optionally staging through a temporary table
+        """
+        table_definitions = {
+            c.name: c for c in get_column_definitions(self.table_name, pg_config)
+        }
+        missing = [c for c in self.columns if c not in table_definitions]
+        if missing:
+            raise ValueError(f"Columns {missing} do not exist in {self.table_name}")
+        column_definitions = [table_definitions[c] for c in self.columns]
+
+        staging = self._copy_staging
+        if staging is None:
+            staging = self._on_conflict_constraints is not None
+
+        columns = [sql.Identifier(c) for c in self.columns]
+        columns_sql = sql.SQL(",").join(columns)
+        copy_sql = sql.SQL("COPY {table} ({columns}) FROM STDIN WITH (FORMAT {format})")
+
+        with pg_config.connect_with_cursor(
+            transactional=transactional or staging
+        ) as cursor:
+            stream = copy_stream(
+                self._values,
+                column_definitions,
+                self._copy_format,
+                encodings[cursor.connection.encoding],
+            )
+
+            if not staging:
+                command = copy_sql.format(
+                    table=sql.Identifier(self.table_name),
+                    columns=columns_sql,
+                    format=sql.SQL(self._copy_format),
+                )
+                self.logger.debug(command.as_string(cursor))
+                cursor.copy_expert(command, stream)
+                return self._response_formatter([], pg_config, self)
+
+            staging_table = sql.Identifier(f"sqlark_staging_{uuid.uuid4().hex}")
+            cursor.execute(
+                sql.SQL(
+                    "CREATE TEMP TABLE {staging} AS SELECT {columns} FROM {table} WITH NO DATA"
+                ).format(
+                    staging=staging_table,
+                    columns=columns_sql,
+                    table=sql.Identifier(self.table_name),
+                )
+            )
+            try:
+                command = copy_sql.format(
+                    table=staging_table,
+                    columns=columns_sql,
+                    format=sql.SQL(self._copy_format),
+                )
+                self.logger.debug(command.as_string(cursor))
+                cursor.copy_expert(command, stream)
+
+                command = sql.SQL(
+                    "INSERT INTO {table} ({columns}) SELECT {columns} FROM {staging} {on_conflict} RETURNING *"
+                ).format(
+                    table=sql.Identifier(self.table_name),
+                    columns=columns_sql,
+                    staging=staging_table,
+                    on_conflict=self.on_conflict_sql(columns),
+                )
+                self.logger.debug(command.as_string(cursor))
+                cursor.execute(command)
+                result = self.format_response(
+                    cursor.fetchall(), pg_config, cursor.description
+                )
+            finally:
+                # A failed transaction is rolled back along with the staging table
+                if (
+                    cursor.connection.info.transaction_status
+                    != TRANSACTION_STATUS_INERROR
+                ):
+                    cursor.execute(
+                        sql.SQL("DROP TABLE IF EXISTS {}").format(staging_table)
+                    )
+
+            return result
@@ -2,13 +2,20 @@
 Postgres Configuration
 """
 
+import asyncio
+import os
+import threading
 import time
-from contextlib import contextmanager
+from contextlib import asynccontextmanager, contextmanager
 import json
 import psycopg2
 from psycopg2.extras import DictCursor
 import boto3
 from botocore.exceptions import ClientError
+from sqlark.async_pool import AsyncConnectionPool
+from sqlark.connection_pool import CHECK_INTERVAL, ConnectionPool, PoolStats
+from sqlark.schema_cache import SCHEMA_CACHE, SchemaChangeListener
+from sqlark.session import Session
 
 
 cached_secret = None
@@ -63,9 +70,39 @@ class PostgresConfig:
         - dname
         - host
         - port (optional)
+
+    Set pooled=True to reuse connections across commands instead of opening a new
+    connection for every execute().  The pool_* arguments configure the pool:
+        - pool_min_size: idle connections kept open when idle connections are pruned
+        - pool_max_size: maximum number of open connections
+        - pool_idle_timeout: seconds before an idle connection is closed
+        - pool_max_lifetime: seconds before a connection is retired
+        - pool_timeout: seconds to wait for a free connection
+        - pool_check_interval: connections idle for longer than this are health checked on checkout,
+          5 seconds by default. 0 checks every checkout.
+
+    execute_async() always uses a pool of asynchronous connections configured by the same pool_* arguments.
+
+    Column definitions read from the catalog are cached per database, schema and table.
+        - schema: the schema that tables are read from, it is also set as the search_path of every connection.
+          Defaults to the tables visible on the server's search_path.
+        - schema_cache_ttl: seconds before cached column definitions are read again.
+          None caches them until they are invalidated.
+
+    cursor_factory is the psycopg2 cursor class used to execute commands, DictCursor by default.
+    Pass None for plain cursors that fetch tuples, which the response formatters decode from cursor.description.
+
+    statement_cache: Select, Count, Update and Delete commands of the same shape reuse their rendered SQL
+    from sqlark.statement_cache.STATEMENT_CACHE instead of composing it again. True by default.
+
+    Statements that run often on a connection can be prepared on the server, see sqlark.prepared_statements.
+        - prepare_threshold: executions of a statement on a connection before it is prepared and run with EXECUTE.
+          None, the default, never prepares statements. Leave it unset behind a transaction pooling pgbouncer.
+        - prepared_statements_size: the most statements kept prepared per connection,
+          the least recently used are deallocated.
     """
 
-    # pylint: disable=too-many-instance-attributes
+    # pylint: disable=too-many-instance-attributes,too-many-locals
     def __init__(
         self,
         aws_secret_name: str | None = None,
@@ -76,6 +113,19 @@ class PostgresConfig:
         host: str | None = None,
         port: str | None = None,
         dsn: str | None = None,
+        pooled: bool = False,
+        pool_min_size: int = 1,
+        pool_max_size: int = 10,
+        pool_idle_timeout: float = 300.0,
+        pool_max_lifetime: float = 3600.0,
+        pool_timeout: float = 30.0,
+        pool_check_interval: float = CHECK_INTERVAL,
+        schema: str | None = None,
+        schema_cache_ttl: float | None = None,
+        cursor_factory: type | None = DictCursor,
+        statement_cache: bool = True,
+        prepare_threshold: int | None = None,
+        prepared_statements_size: int = 100,
     ):
         """Configuration values for the Postgres client."""
         self.dbname = dbname
@@ -86,15 +136,39 @@ class PostgresConfig:
         self.host = host
         self.port = port
         self.dsn = dsn
+        self.pooled = pooled
+        self.pool_min_size = pool_min_size
+        self.pool_max_size = pool_max_size
+        self.pool_idle_timeout = pool_idle_timeout
+        self.pool_max_lifetime = pool_max_lifetime
+        self.pool_timeout = pool_timeout
+        self.pool_check_interval = pool_check_interval
+        self.schema = schema
+        self.schema_cache_ttl = schema_cache_ttl
+        self.cursor_factory = cursor_factory
+        self.statement_cache = statement_cache
+        self.prepare_threshold = prepare_threshold
+        self.prepared_statements_size = prepared_statements_size
+        self._pool: ConnectionPool | None = None
+        self._pool_pid: int | None = None
+        self._pool_lock = threading.Lock()
+        self._async_pool: AsyncConnectionPool | None = None
+        self._async_pool_loop: asyncio.AbstractEventLoop | None = None
 
     @property
     def connection_params(self):
         """Parameters for connecting to postgres database"""
-        if self.dsn is not None:
-            return {"dsn": self.dsn}
-
         params = {}
 
+        if self.schema is not None:
+            # Quote the schema name and escape spaces for the libpq options parser
+            search_path = '"' + self.schema.replace('"', '""') + '"'
+            params["options"] = "-c search_path=" + search_path.replace(" ", "\\ ")
+
+        if self.dsn is not None:
+            params["dsn"] = self.dsn
+            return params
+
         if self.aws_secret_name is not None and self.aws_region_name is not None:
             secret = get_secret(self.aws_secret_name, self.aws_region_name)
             params["user"] = secret["username"]
@@ -112,6 +186,29 @@ class PostgresConfig:
             params["port"] = self.port
         return params
 
+    @property
+    def cache_identity(self) -> tuple:
+        """Identifies the database for the schema cache, without resolving credentials"""
+        if self.dsn is not None:
+            return (self.dsn,)
+        return (self.host, self.port, self.dbname, self.user or self.aws_secret_name)
+
+    def invalidate_schema_cache(self, table_name: str | None = None):
+        """
+        Drop the cached column definitions of table_name, or of every table, for this database and schema
+        """
+        SCHEMA_CACHE.invalidate(self, table_name, schema=self.schema)
+
+    def listen_for_schema_changes(
+        self, poll_interval: float = 1.0
+    ) -> SchemaChangeListener:
+        """
+        Start a background thread that invalidates cached column definitions when the schema changes.
+        Requires the event triggers created by sqlark.schema_cache.install_schema_change_trigger.
+        Call stop() on the returned listener to stop listening.
+        """
+        return SchemaChangeListener(self, poll_interval=poll_interval).start()
+
     def register_adapters(self):
         """Register custom adapters"""
         # pylint: disable=import-outside-toplevel
@@ -121,12 +218,109 @@ class PostgresConfig:
         register_adapter(dict, Json)
         register_adapter(list, Json)
 
+    @property
+    def pool(self) -> ConnectionPool:
+        """
+        The connection pool used when pooled=True.
+        The pool is created on first use and recreated in forked child processes.
+        """
+        with self._pool_lock:
+            if self._pool is None or self._pool_pid != os.getpid():
+                self._pool = ConnectionPool(
+                    lambda: psycopg2.connect(**self.connection_params),
+                    min_size=self.pool_min_size,
+                    max_size=self.pool_max_size,
+                    idle_timeout=self.pool_idle_timeout,
+                    max_lifetime=self.pool_max_lifetime,
+                    timeout=self.pool_timeout,
+                    check_interval=self.pool_check_interval,
+                )
+                self._pool_pid = os.getpid()
+            return self._pool
+
+    @property
+    def async_pool(self) -> AsyncConnectionPool:
+        """
+        The asynchronous connection pool for the running event loop, created on first use
+        """
+        loop = asyncio.get_running_loop()
+        if self._async_pool is None or self._async_pool_loop is not loop:
+            self._async_pool = AsyncConnectionPool(
+                lambda: self.connection_params,
+                min_size=self.pool_min_size,
+                max_size=self.pool_max_size,
+                idle_timeout=self.pool_idle_timeout,
+                max_lifetime=self.pool_max_lifetime,
+                timeout=self.pool_timeout,
+                check_interval=self.pool_check_interval,
+            )
+            self._async_pool_loop = loop
+        return self._async_pool
+
+    def pool_stats(self) -> PoolStats | None:
+        """
+        Returns the connection pool statistics, or None if the pool has not been used
+        """
+        if self._pool is None:
+            return None
+        return self._pool.stats
+
+    def close(self):
+        """Close the pooled connections"""
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.close()
+                self._pool = None
+
+    async def close_async(self):
+        """Close the asynchronous pooled connections"""
+        if self._async_pool is not None:
+            await self._async_pool.close()
+            self._async_pool = None
+            self._async_pool_loop = None
+
+    def session(self, transactional=False) -> Session:
+        """
+        Returns a Session that runs every command on a single connection.
+        Use the session as a context manager and pass it to execute() in place of this config.
+        """
+        return Session(self, transactional=transactional)
+
+    # pylint: disable=contextmanager-generator-missing-cleanup
     @contextmanager
-    def connect_with_cursor(self, transactional=False):
-        """Connect to database"""
+    def connect_with_cursor(self, transactional=False, name=None):
+        """
+        Connect to database
+        params:
+            transactional: bool Whether to run in a transaction that is committed on exit
+            name: str | None Create a named (server-side) cursor. Named cursors always run in a transaction.
+        """
+        if name is not None:
+            transactional = True
+
+        if self.pooled:
+            with self.pool.connection() as connection:
+                connection.autocommit = not transactional
+                with connection:
+                    with connection.cursor(
+                        name=name, cursor_factory=self.cursor_factory
+                    ) as cursor:
+                        yield cursor
+            return
+
         with psycopg2.connect(**self.connection_params) as connection:
             if not transactional:
                 connection.set_session(autocommit=True)
 
-            with connection.cursor(cursor_factory=DictCursor) as cursor:
+            with connection.cursor(
+                name=name, cursor_factory=self.cursor_factory
+            ) as cursor:
                 yield cursor
+
+    @asynccontextmanager
+    async def async_connect_with_cursor(self, transactional=False):
+        """Connect to database from the asynchronous pool, yielding an AsyncCursor"""
+        async with self.async_pool.connect_with_cursor(
+            transactional=transactional, cursor_factory=self.cursor_factory
+        ) as cursor:
+            yield cursor
@@ -0,0 +1,201 @@
+"""
+Server-side prepared statements for statements that run often on a connection
+"""
+
+import re
+import threading
+import typing
+import weakref
+from collections import OrderedDict
+from typing import Dict, Tuple
+import psycopg2
+from psycopg2 import sql
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+from sqlark.logger import get_logger
+from sqlark.schema_cache import SCHEMA_CACHE
+
+if typing.TYPE_CHECKING:
+    from sqlark.postgres_config import PostgresConfig
+
+logger = get_logger(__name__)
+
+# The pyformat placeholders and escaped percent signs of a rendered statement
+PYFORMAT_PLACEHOLDER = re.compile(r"%(s|%)")
+
+# Counted statements per connection, the counts are reset when there are more
+MAX_COUNTED_STATEMENTS = 10000
+
+
+def numbered_placeholders(statement: str) -> Tuple[str, int] | None:
+    """
+    Converts the %s placeholders of a statement to the $1, $2, ... parameters of PREPARE.
+    Returns the converted statement and the number of parameters, or None for named placeholders.
+    """
+    if "%(" in statement:
+        return None
+
+    count = 0
+
+    def replace(match):
+        nonlocal count
+        if match.group(1) == "%":
+            return "%"
+        count += 1
+        return f"${count}"
+
+    return PYFORMAT_PLACEHOLDER.sub(replace, statement), count
+
+
+class PreparedStatements:
+    """
+    The execution counts and prepared statements of one connection.
+
+    A statement is prepared when it has run prepare_threshold times on the connection, and then runs with EXECUTE.
+    At most prepared_statements_size statements stay prepared, the least recently used are deallocated.
+    Every prepared statement is deallocated when the schema cache generation changes.
+    """
+
+    def __init__(self):
+        self.generation = SCHEMA_CACHE.generation
+        self.counts: Dict[str, int] = {}
+        # The EXECUTE command of each prepared statement
+        self.prepared: OrderedDict[str, str] = OrderedDict()
+        self.unpreparable: set = set()
+        self._sequence = 0
+
+    @staticmethod
+    def savepoint_needed(connection) -> bool:
+        """
+        Whether a failed PREPARE would abort a transaction, i.e. the connection is in or starts a transaction
+        """
+        return (
+            not connection.autocommit
+            or connection.info.transaction_status != TRANSACTION_STATUS_IDLE
+        )
+
+    @staticmethod
+    def deallocate(cursor, execute: str):
+        """Deallocate a prepared statement, given its EXECUTE command"""
+        cursor.execute("DEALLOCATE " + execute.split()[1])
+
+    def invalidate(self, cursor):
+        """
+        Deallocate every prepared statement and reset the counts
+        """
+        for execute in self.prepared.values():
+            self.deallocate(cursor, execute)
+        self.prepared.clear()
+        self.counts.clear()
+        self.unpreparable.clear()
+        self.generation = SCHEMA_CACHE.generation
+
+    def prepare(
+        self, cursor, statement: str, params: list, max_size: int
+    ) -> str | None:
+        """
+        Prepare a statement, returns its EXECUTE command or None if it can not be prepared
+        """
+        converted = numbered_placeholders(statement) if params else (statement, 0)
+        if converted is None or converted[1] != len(params):
+            self.unpreparable.add(statement)
+            return None
+
+        self._sequence += 1
+        name = f"sqlark_{self._sequence}"
+        prepare = sql.SQL("PREPARE {} AS ").format(sql.Identifier(name))
+        savepoint = self.savepoint_needed(cursor.connection)
+        if savepoint:
+            cursor.execute("SAVEPOINT sqlark_prepare")
+        try:
+            cursor.execute(prepare.as_string(cursor) + converted[0])
+        except psycopg2.Error as e:
+            # e.g. parameters whose type can not be inferred
+            logger.debug("Statement can not be prepared: %s", e)
+            if savepoint:
+                cursor.execute("ROLLBACK TO SAVEPOINT sqlark_prepare")
+            self.unpreparable.add(statement)
+            return None
+        finally:
+            if savepoint:
+                cursor.execute("RELEASE SAVEPOINT sqlark_prepare")
+
+        execute = f'EXECUTE "{name}"'
+        if converted[1] > 0:
+            execute += " (" + ", ".join(["%s"] * converted[1]) + ")"
+        self.prepared[statement] = execute
+        while len(self.prepared) > max_size:
+            _, evicted = self.prepared.popitem(last=False)
+            self.deallocate(cursor, evicted)
+        return execute
+
+    def lookup(
+        self, cursor, statement: str, params: list, threshold: int, max_size: int
+    ) -> str | None:
+        """
+        Counts an execution of statement and returns the EXECUTE command of its prepared statement,
+        preparing it once it has run threshold times. Returns None while it runs as a plain statement.
+        At most max_size statements stay prepared.
+        """
+        if self.generation != SCHEMA_CACHE.generation:
+            self.invalidate(cursor)
+
+        prepared = self.prepared.get(statement)
+        if prepared is not None:
+            self.prepared.move_to_end(statement)
+            return prepared
+
+        if statement in self.unpreparable:
+            return None
+        if len(self.counts) >= MAX_COUNTED_STATEMENTS:
+            self.counts.clear()
+        count = self.counts.get(statement, 0) + 1
+        self.counts[statement] = count
+        if count < threshold:
+            return None
+
+        del self.counts[statement]
+        return self.prepare(cursor, statement, params, max_size)
+
+
+# The prepared statements of each connection, dropped with the connection
+CONNECTION_STATEMENTS: "weakref.WeakKeyDictionary[object, PreparedStatements]" = (
+    weakref.WeakKeyDictionary()
+)
+_connection_statements_lock = threading.Lock()
+
+
+def connection_statements(connection) -> PreparedStatements:
+    """
+    Returns the prepared statements of a connection
+    """
+    with _connection_statements_lock:
+        statements = CONNECTION_STATEMENTS.get(connection)
+        if statements is None:
+            statements = PreparedStatements()
+            CONNECTION_STATEMENTS[connection] = statements
+        return statements
+
+
+def execute_statement(
+    cursor, statement: str, params: list, pg_config: "PostgresConfig"
+):
+    """
+    Executes a rendered statement with its parameters.
+    With pg_config.prepare_threshold set, statements that run often on the cursor's connection
+    are prepared on the server and run with EXECUTE.
+    """
+    if pg_config.prepare_threshold is not None:
+        execute = connection_statements(cursor.connection).lookup(
+            cursor,
+            statement,
+            params,
+            pg_config.prepare_threshold,
+            pg_config.prepared_statements_size,
+        )
+        if execute is not None:
+            statement = execute
+
+    if params:
+        cursor.execute(statement, params)
+    else:
+        cursor.execute(statement)
@@ -8,15 +8,33 @@ Response formatters accept one required parameters and two optional parameters:
                 In the future consider prefetching the database schema and passing it instead of
                 a database configuration object.
     command: Optional[SQLCommand] The command that generated the result set
+
+Formatters with a description parameter (or **kwargs) are also passed, as a keyword argument:
+    description: Optional[tuple] The cursor.description of the result set, used to decode rows by position.
+                Without it, the columns are read from the keys of the first row.
 """
 
+# pylint: disable=too-many-lines
+
+import functools
+import inspect
+import json
+import re
 import typing
 from collections import namedtuple
-from typing import List, Dict
+from datetime import date, datetime, time, timezone
+from decimal import Decimal
+from typing import Generator, List, Dict, Tuple
+from psycopg2 import sql
 from sqlark.column_definition import ColumnDefinition
+from sqlark.session import Session
 from sqlark.utilities import (
-    decompose_row,
+    POSTGRES_DATA_TYPES,
+    DecodingPlan,
     build_dataclasses,
+    fetch_dicts,
+    get_column_definitions,
+    hashable_value,
 )
 
 if typing.TYPE_CHECKING:
@@ -24,21 +42,75 @@ if typing.TYPE_CHECKING:
     from sqlark.command import SQLCommand
 
 
+@functools.lru_cache(maxsize=256)
+def _accepts_description(function) -> bool:
+    try:
+        parameters = inspect.signature(function).parameters.values()
+    except (TypeError, ValueError):
+        return False
+    return any(
+        p.name == "description" or p.kind is inspect.Parameter.VAR_KEYWORD
+        for p in parameters
+    )
+
+
+def accepts_description(formatter) -> bool:
+    """
+    Whether a response formatter accepts the description keyword argument.
+    The signature of each function is inspected once, bound methods and partials are unwrapped to it.
+    """
+    while isinstance(formatter, functools.partial):
+        formatter = formatter.func
+    return _accepts_description(getattr(formatter, "__func__", formatter))
+
+
 # Disable unused-argument warning for pg_config and command. These arguments exist for consistency
 # pylint: disable=unused-argument
 def default_response_formatter(
-    result_set: list[dict], pg_config=None, command=None
+    result_set: list[dict], pg_config=None, command=None, description=None
 ) -> list[dict]:
     """
     Returns the result set as a list of dictionaries
     """
-    return [dict(r) for r in result_set]
+    plan = DecodingPlan.from_result_set(result_set, description)
+    if plan is None:
+        return []
+    return [plan.to_dict(r) for r in result_set]
+
+
+# Disable unused-argument warning for pg_config and command. These arguments exist for consistency
+# pylint: disable=unused-argument
+def tuple_response_formatter(
+    result_set: list, pg_config=None, command=None, description=None
+) -> list[tuple]:
+    """
+    Returns the result set as a list of tuples, in the order of the selected columns.
+    Rows fetched by a plain cursor (cursor_factory=None) are returned without copying.
+    """
+    if len(result_set) == 0 or isinstance(result_set[0], tuple):
+        return list(result_set)
+    if isinstance(result_set[0], dict):
+        return [tuple(r.values()) for r in result_set]
+    return [tuple(r) for r in result_set]
+
+
+# Disable unused-argument warning for pg_config and command. These arguments exist for consistency
+# pylint: disable=unused-argument
+def json_response_formatter(
+    result_set: list, pg_config=None, command=None, description=None
+) -> str:
+    """
+    Returns the JSON text encoded by the server (see Select.respond_with_json), one text column per row
+    """
+    return "".join(
+        next(iter(r.values())) if isinstance(r, dict) else r[0] for r in result_set
+    )
 
 
 # Disable unused-argument warning for pg_config and command. These arguments exist for consistency
 # pylint: disable=unused-argument
 def decompose_dict_response_formatter(
-    result_set: list[Dict], pg_config=None, command=None
+    result_set: list[Dict], pg_config=None, command=None, description=None
 ) -> list[Dict]:
     """
     Returns the result set as a list of Dictionaries.
@@ -46,19 +118,302 @@ def decompose_dict_response_formatter(
     and the value is a dictionary of column values for that table
     i.e. {"posts": {"id": 1, "title": "Post 1"}, "comments": {"id": 1, "post_id": 1, "comment": "Comment 1"}}
     """
-    return [decompose_row(r) for r in result_set]
+    plan = DecodingPlan.from_result_set(result_set, description)
+    if plan is None:
+        return []
+    return [plan.decompose(r) for r in result_set]
+
+
+def set_attribute(obj: object, name: str, value):
+    """
+    Set an attribute, including on frozen dataclasses
+    """
+    object.__setattr__(obj, name, value)
+
+
+# Row namedtuples keyed by the dataclasses of their attributes
+ROW_CLASS_CACHE: Dict[tuple, type] = {}
+
+
+def row_class(table_classes: Dict[str, type]) -> type:
+    """
+    Returns the namedtuple with one attribute per table, reused for the same table classes
+    """
+    key = tuple(table_classes.items())
+    if key not in ROW_CLASS_CACHE:
+        ROW_CLASS_CACHE[key] = namedtuple("Row", table_classes.keys())  # type: ignore
+    return ROW_CLASS_CACHE[key]
+
+
+class DeferredLoader:
+    """
+    Loads the deferred columns of the objects of one table in a result set.
+    The first access of a deferred column on any of the objects loads it for all of them with one query.
+    Columns are loaded through the session of the select while it is open, and through its configuration after.
+    """
+
+    def __init__(self, table: str, key_column: str, objects: List[object], pg_config):
+        self.table = table
+        self.key_column = key_column
+        self.objects = objects
+        self.pg_config = pg_config
+
+    def load(self, column: str):
+        """
+        Load a deferred column of every object by key, objects without a key or row load None
+        """
+        keys = {getattr(o, self.key_column) for o in self.objects}
+        keys.discard(None)
+        values = {}
+        if keys:
+            pg_config = self.pg_config
+            if isinstance(pg_config, Session) and not pg_config.is_open:
+                pg_config = pg_config.pg_config
+            rows = RelationFormatter.select_related(
+                self.table,
+                self.key_column,
+                list(keys),
+                pg_config,
+                columns=[self.key_column, column],
+            )
+            values = {row[self.key_column]: row[column] for row in rows}
+
+        for o in self.objects:
+            set_attribute(o, column, values.get(getattr(o, self.key_column)))
+
+
+def deferred_getattr(obj: object, name: str):
+    """
+    __getattr__ of the classes with deferred columns, called for attributes that are not set
+    """
+    if name in type(obj).deferred_columns:  # type: ignore
+        obj.deferred_loader.load(name)  # type: ignore
+        return object.__getattribute__(obj, name)
+    raise AttributeError(f"{type(obj).__name__!r} object has no attribute {name!r}")
+
+
+# Subclasses of the generated dataclasses with deferred columns, keyed by dataclass and deferred columns
+DEFERRED_CLASS_CACHE: Dict[tuple, type] = {}
+
+
+def deferred_class(datacls: type, columns: Tuple[str, ...]) -> type:
+    """
+    Returns a subclass of a dataclass whose deferred columns are loaded by its deferred_loader on first access.
+    The deferred columns are not dataclass fields, so they are not compared, hashed or shown by repr.
+    """
+    key = (datacls, columns)
+    if key not in DEFERRED_CLASS_CACHE:
+        namespace = {
+            "__getattr__": deferred_getattr,
+            "__qualname__": datacls.__qualname__,
+            "deferred_columns": frozenset(columns),
+        }
+        if "__slots__" in datacls.__dict__:
+            namespace["__slots__"] = columns + ("deferred_loader",)
+        DEFERRED_CLASS_CACHE[key] = type(datacls.__name__, (datacls,), namespace)
+    return DEFERRED_CLASS_CACHE[key]
+
+
+# NumPy dtypes for the python types of POSTGRES_DATA_TYPES, other types are object arrays
+NUMPY_DTYPES: Dict[object, str] = {
+    bool: "bool",
+    int: "int64",
+    float: "float64",
+    datetime: "datetime64[us]",
+    date: "datetime64[D]",
+}
+
+
+def column_data_types(pg_config=None, command=None) -> Dict[str, str]:
+    """
+    Returns the data types of the command's columns keyed by their "table_name.column_name" alias
+    """
+    if command is None or pg_config is None:
+        return {}
+    return {
+        c.alias: c.data_type
+        for columns in command.get_column_definitions(pg_config).values()
+        for c in columns
+    }
+
+
+def numpy_column(values: tuple, data_type: str | None):
+    """
+    Converts the values of a column to a NumPy array typed by the postgres data type.
+    Columns of unknown data types are typed by their first value.
+    NULL is NaN in float columns and NaT in timestamp columns.
+    Integer columns with NULLs are float columns, and boolean columns with NULLs are object columns.
+    """
+    # pylint: disable=import-outside-toplevel
+    import numpy as np
+
+    if data_type is not None:
+        python_type = POSTGRES_DATA_TYPES.get(data_type)
+    else:
+        python_type = type(next((v for v in values if v is not None), None))
+
+    if data_type == "date":
+        python_type = date
+    elif python_type is datetime and isinstance(
+        next((v for v in values if v is not None), None), time
+    ):
+        # time columns hold datetime.time values, which have no NumPy type
+        python_type = None
+    elif python_type is datetime:
+        values = tuple(
+            v.astimezone(timezone.utc).replace(tzinfo=None)
+            if v is not None and v.tzinfo is not None
+            else v
+            for v in values
+        )
+
+    dtype = NUMPY_DTYPES.get(python_type, "object")
+    if None in values:
+        if dtype == "int64":
+            dtype = "float64"
+        elif dtype == "bool":
+            dtype = "object"
+
+    array = np.empty(len(values), dtype=dtype)
+    array[:] = values
+    return array
+
+
+def columns_response_formatter(
+    result_set: list, pg_config=None, command=None, description=None
+) -> Dict[str, object]:
+    """
+    Returns the result set as a dictionary of NumPy arrays keyed by column, i.e. "table_name.column_name".
+    Numeric and boolean columns are typed arrays, timestamps are datetime64, and other columns are object arrays.
+    The rows are transposed directly into columns, without building a dictionary per row.
+    Requires numpy.
+    """
+    plan = DecodingPlan.from_result_set(result_set, description)
+    if plan is None:
+        return {}
+
+    rows = (r.values() for r in result_set) if plan.by_key else result_set
+    columns = list(zip(*rows)) if len(result_set) > 0 else [()] * len(plan.names)
+    data_types = column_data_types(pg_config, command)
+    return {
+        name: numpy_column(values, data_types.get(name))
+        for name, values in zip(plan.names, columns)
+    }
+
+
+# The number of rows in each record batch of an Arrow table
+ARROW_BATCH_SIZE = 65536
+
+
+def arrow_type(data_type: str | None):
+    """
+    Returns the Arrow type of a postgres data type, or None to infer the type from the values.
+    Numeric columns are float64, json columns are JSON strings and timestamps with time zone are UTC.
+    """
+    if data_type is None:
+        return None
+
+    # pylint: disable=import-outside-toplevel
+    import pyarrow as pa
+
+    return {
+        "boolean": pa.bool_(),
+        "bytea": pa.binary(),
+        "character varying": pa.string(),
+        "varchar": pa.string(),
+        "char": pa.string(),
+        "character": pa.string(),
+        "bpchar": pa.string(),
+        "text": pa.string(),
+        "uuid": pa.string(),
+        "json": pa.string(),
+        "jsonb": pa.string(),
+        "smallint": pa.int16(),
+        "integer": pa.int32(),
+        "bigint": pa.int64(),
+        "smallserial": pa.int16(),
+        "serial": pa.int32(),
+        "bigserial": pa.int64(),
+        "decimal": pa.float64(),
+        "numeric": pa.float64(),
+        "real": pa.float32(),
+        "double precision": pa.float64(),
+        "timestamp": pa.timestamp("us"),
+        "timestamp without time zone": pa.timestamp("us"),
+        "timestamp with time zone": pa.timestamp("us", tz="UTC"),
+        "date": pa.date32(),
+        "time": pa.time64("us"),
+        "time without time zone": pa.time64("us"),
+        "interval": pa.duration("us"),
+    }.get(data_type)
+
+
+def arrow_column(values: tuple, data_type: str | None):
+    """
+    Converts the values of a column to an Arrow array typed by the postgres data type
+    """
+    # pylint: disable=import-outside-toplevel
+    import pyarrow as pa
+
+    converted: list | tuple = values
+    if data_type in ("decimal", "numeric"):
+        converted = [None if v is None else float(v) for v in values]
+    elif data_type in ("json", "jsonb"):
+        converted = [None if v is None else json.dumps(v) for v in values]
+    elif data_type == "uuid":
+        converted = [None if v is None else str(v) for v in values]
+    return pa.array(converted, type=arrow_type(data_type))
+
+
+def arrow_response_formatter(
+    result_set: list, pg_config=None, command=None, description=None
+):
+    """
+    Returns the result set as a pyarrow.Table with one column per "table_name.column_name".
+    The table is built from record batches of ARROW_BATCH_SIZE rows, and the schema follows
+    the data types of the column definitions. Columns of unknown data types are inferred by Arrow.
+    Convert it with table.to_pandas() or polars.from_arrow(table), which share the Arrow buffers where possible.
+    Requires pyarrow.
+    """
+    # pylint: disable=import-outside-toplevel
+    import pyarrow as pa
 
+    plan = DecodingPlan.from_result_set(result_set, description)
+    if plan is None:
+        return pa.table({})
 
+    data_types = column_data_types(pg_config, command)
+    types = [data_types.get(name) for name in plan.names]
+    rows = [tuple(r.values()) for r in result_set] if plan.by_key else result_set
+
+    tables = []
+    for start in range(0, max(len(rows), 1), ARROW_BATCH_SIZE):
+        batch = rows[start : start + ARROW_BATCH_SIZE]
+        columns = list(zip(*batch)) if len(batch) > 0 else [()] * len(plan.names)
+        arrays = [arrow_column(v, t) for v, t in zip(columns, types)]
+        tables.append(
+            pa.Table.from_batches([pa.RecordBatch.from_arrays(arrays, plan.names)])
+        )
+
+    # Inferred columns may differ between batches, e.g. a batch of only NULLs
+    return pa.concat_tables(tables, promote_options="default")
+
+
+# pylint: disable=too-many-locals
 def object_response_formatter(
     result_set: list[dict],
     pg_config: "PostgresConfig | None" = None,
     command: "SQLCommand | None" = None,
+    slots: bool = False,
+    frozen: bool = False,
+    description=None,
 ) -> list[object]:
     """
     Returns the result set as a list of objects
     If the result set contains only one table, the objects will be of that type
     If the result set contains multiple tables, each row will map to an aggregate obejct
     with one attribute per table in the result set
+    slots and frozen are passed to build_dataclasses
     """
     if command is None:
         raise ValueError("Command is required for object_response_formatter")
@@ -67,35 +422,125 @@ def object_response_formatter(
         raise ValueError("pg_config is required for object_response_formatter")
 
     # Construct the dataclasses for each table in the result set
-    table_classes = build_dataclasses(command.get_column_definitions(pg_config))
-    decomposed = [decompose_row(r) for r in result_set]
+    table_classes = build_dataclasses(
+        command.get_column_definitions(pg_config), slots=slots, frozen=frozen
+    )
+    decomposed = decompose_dict_response_formatter(result_set, description=description)
+
+    # Tables with deferred columns are constructed as subclasses that load the columns on first access
+    deferred = command.deferred_columns(pg_config)
+    for table, (_, columns) in deferred.items():
+        table_classes[table] = deferred_class(table_classes[table], columns)
 
     if len(table_classes) == 1:
         # If the result set only contains one table, return a list of objects of that type
         table, datacls = table_classes.popitem()
-        return [datacls(**(row[table] if table in row else row)) for row in decomposed]
+        response = [
+            datacls(**(row[table] if table in row else row)) for row in decomposed
+        ]
+        table_objects = {table: response}
+    else:
+        # Construct a Row object with one attribute per table in result set
+        Row = row_class(table_classes)
+
+        # Looks complex, but it's just a list comprehension that creates a namedtuple for each row
+        response = [
+            Row(**{tab: table_classes[tab](**values) for tab, values in row.items()})
+            for row in decomposed
+        ]
+        table_objects = {
+            table: [getattr(row, table) for row in response] for table in deferred
+        }
+
+    for table, (key_column, _) in deferred.items():
+        loader = DeferredLoader(table, key_column, table_objects[table], pg_config)
+        for obj in table_objects[table]:
+            set_attribute(obj, "deferred_loader", loader)
+
+    return response
+
+
+# Fractional seconds of an ISO 8601 time, padded to microseconds for datetime.fromisoformat
+ISO_FRACTION = re.compile(r"\.(\d{1,6})")
+
+
+def json_column_value(value, data_type: str):
+    """
+    Converts a column value encoded with to_json (see RelationFormatter.lateral_sql) to the
+    python type returned by psycopg2. Numeric columns are encoded as text to keep their precision.
+    """
+    if value is None or not isinstance(value, str):
+        return value
+    if data_type in ("numeric", "decimal"):
+        return Decimal(value)
+    if data_type == "bytea":
+        return bytes.fromhex(value[2:])
+    if data_type == "date":
+        return date.fromisoformat(value)
 
-    # Construct a Row object with one attribute per table in result set
-    Row = namedtuple("Row", table_classes.keys())  # type: ignore
+    parse = {
+        "timestamp": datetime.fromisoformat,
+        "timestamp with time zone": datetime.fromisoformat,
+        "timestamp without time zone": datetime.fromisoformat,
+        "time": time.fromisoformat,
+        "time with time zone": time.fromisoformat,
+        "time without time zone": time.fromisoformat,
+    }.get(data_type)
+    if parse is None:
+        return value
+    return parse(ISO_FRACTION.sub(lambda m: "." + m.group(1).ljust(6, "0"), value))
 
-    # Looks complex, but it's just a list comprehension that creates a namedtuple for each row
-    return [
-        Row(**{tab: table_classes[tab](**values) for tab, values in row.items()})
-        for row in decomposed
-    ]
 
+# The number of key/value pairs in one jsonb_build_object call, postgres functions take at most 100 arguments
+JSON_OBJECT_PAIRS = 50
 
+
+# pylint: disable=too-many-public-methods
 class RelationFormatter:
     """
     Formats a result set as a hierarchical set of objects based on the relations defined in this formatter
+
+    slots and frozen are passed to build_dataclasses. Relation attributes of frozen objects are still
+    filled in by the formatter.
+
+    The strategy sets how the related objects are loaded:
+        "join": From the rows of the command's joins (the default)
+        "lateral": The select fetches each relation as a jsonb array (or object) in a LATERAL subquery,
+                   so each root row arrives once with its related objects nested. The command must not
+                   join the related tables, and each relation needs its key columns (see set_relation).
+        "selectin": The select fetches the root rows, then each relation is loaded with one query
+                    WHERE foreign_column = ANY(keys) over the keys of the loaded objects, and the related
+                    objects are matched through a hash map. A limit applies to the root objects.
+                    The related rows are queried through the pg_config passed to format, and through its
+                    asynchronous pool from execute_async (see format_async).
     """
 
-    def __init__(self):
-        self._relations = {}
-        self._table_classes = {}
+    # pylint: disable=too-many-instance-attributes
+    STRATEGIES = ("join", "lateral", "selectin")
 
+    def __init__(self, slots: bool = False, frozen: bool = False, strategy="join"):
+        if strategy not in self.STRATEGIES:
+            raise ValueError(
+                f"Invalid relation strategy {strategy}, expected one of {self.STRATEGIES}"
+            )
+        # (table, attribute) -> (foreign table, relationship type)
+        self._relations: Dict[Tuple[str, ...], Tuple[str, str]] = {}
+        self._relation_keys: Dict[tuple, Tuple[str | None, str | None]] = {}
+        self._table_classes: Dict[str, type] = {}
+        self._declared_primary_keys: Dict[str, List[str]] = {}
+        self._primary_keys: Dict[str, List[str]] = {}
+        self.slots = slots
+        self.frozen = frozen
+        self.strategy = strategy
+
+    # pylint: disable=too-many-arguments,too-many-positional-arguments
     def set_relation(
-        self, attribute_name: str, foreign_table: str, relationship_type: str = "many"
+        self,
+        attribute_name: str,
+        foreign_table: str,
+        relationship_type: str = "many",
+        local_column: str | None = None,
+        foreign_column: str | None = None,
     ) -> "RelationFormatter":
         """
         Define a relation between two tables
@@ -107,6 +552,10 @@ class RelationFormatter:
 
         The relationship_type is the type of relationship between the tables, either "one" or "many",
         default is "many"
+
+        local_column and foreign_column are the columns that relate the tables, i.e.
+        foreign_table.foreign_column = tablename.local_column. They are used by the "lateral" and "selectin" strategies.
+        For "many" relations local_column defaults to "id", for "one" relations foreign_column defaults to "id".
         """
         if "." not in attribute_name:
             raise ValueError(
@@ -117,6 +566,169 @@ class RelationFormatter:
             foreign_table,
             relationship_type,
         )
+        self._relation_keys[tuple(attribute_name.split("."))] = (
+            local_column,
+            foreign_column,
+        )
+        return self
+
+    def relation_keys(
+        self, attribute_table: str, attribute_name: str
+    ) -> Tuple[str, str]:
+        """
+        Returns the local and foreign columns of a relation
+        raises:
+            ValueError: If the relation does not have both columns
+        """
+        _, relationship_type = self._relations[(attribute_table, attribute_name)]
+        local_column, foreign_column = self._relation_keys[
+            (attribute_table, attribute_name)
+        ]
+        if relationship_type == "many":
+            local_column = local_column or "id"
+        else:
+            foreign_column = foreign_column or "id"
+
+        if local_column is None or foreign_column is None:
+            raise ValueError(
+                f"Relation {attribute_table}.{attribute_name} requires local_column and foreign_column "
+                f"for the {self.strategy} strategy"
+            )
+        return local_column, foreign_column
+
+    def table_relations(self, table: str, path_tables=()) -> List[Tuple[str, str, str]]:
+        """
+        Returns the (attribute_name, foreign_table, relationship_type) of the relations of table.
+        Relations to a table in path_tables, i.e. cycles, are skipped.
+        """
+        return [
+            (attribute_name, foreign_table, relationship_type)
+            for (attribute_table, attribute_name), (
+                foreign_table,
+                relationship_type,
+            ) in self._relations.items()
+            if attribute_table == table and foreign_table not in path_tables
+        ]
+
+    def lateral_object_sql(
+        self, table: str, alias: str, pg_config, path_tables: tuple
+    ) -> Tuple[sql.Composed, sql.Composed]:
+        """
+        Returns the jsonb object of a row of table (referenced by alias) and the LATERAL joins of its relations
+        """
+        pairs = [
+            sql.SQL("{}, {}.{}{}").format(
+                sql.Literal(c.name),
+                sql.Identifier(alias),
+                sql.Identifier(c.name),
+                sql.SQL("::text" if c.data_type in ("numeric", "decimal") else ""),
+            )
+            for c in get_column_definitions(table, pg_config)
+        ]
+
+        joins = []
+        for attribute_name, foreign_table, _ in self.table_relations(
+            table, path_tables
+        ):
+            relation_alias = f"{alias}.{attribute_name}"
+            pairs.append(
+                sql.SQL("{}, {}.value").format(
+                    sql.Literal(attribute_name), sql.Identifier(relation_alias)
+                )
+            )
+            joins.append(
+                self.lateral_join_sql(
+                    (table, attribute_name),
+                    alias,
+                    relation_alias,
+                    pg_config,
+                    path_tables + (foreign_table,),
+                )
+            )
+
+        row = sql.SQL(" || ").join(
+            sql.SQL("jsonb_build_object({})").format(
+                sql.SQL(", ").join(pairs[i : i + JSON_OBJECT_PAIRS])
+            )
+            for i in range(0, len(pairs), JSON_OBJECT_PAIRS)
+        )
+        return row, sql.Composed(joins)
+
+    # pylint: disable=too-many-arguments,too-many-positional-arguments
+    def lateral_join_sql(
+        self,
+        relation: tuple,
+        parent_alias: str,
+        alias: str,
+        pg_config,
+        path_tables: tuple,
+    ) -> sql.Composed:
+        """
+        Returns the LATERAL join of a relation, with the related rows as a jsonb column named value
+        """
+        foreign_table, relationship_type = self._relations[relation]
+        local_column, foreign_column = self.relation_keys(*relation)
+        row, joins = self.lateral_object_sql(
+            foreign_table, alias, pg_config, path_tables
+        )
+
+        if relationship_type == "many":
+            template = (
+                "SELECT coalesce(jsonb_agg({row}), '[]'::jsonb) AS value FROM {table} AS {alias} {joins} "
+                "WHERE {alias}.{foreign_column} = {parent}.{local_column}"
+            )
+        else:
+            template = (
+                "SELECT {row} AS value FROM {table} AS {alias} {joins} "
+                "WHERE {alias}.{foreign_column} = {parent}.{local_column} LIMIT 1"
+            )
+        subquery = sql.SQL(template).format(
+            row=row,
+            table=sql.Identifier(foreign_table),
+            alias=sql.Identifier(alias),
+            joins=joins,
+            foreign_column=sql.Identifier(foreign_column),
+            parent=sql.Identifier(parent_alias),
+            local_column=sql.Identifier(local_column),
+        )
+        return sql.SQL(" LEFT JOIN LATERAL ({}) AS {} ON true").format(
+            subquery, sql.Identifier(alias)
+        )
+
+    def lateral_sql(self, command, pg_config) -> Tuple[sql.Composed, sql.Composed]:
+        """
+        Returns the columns and the LATERAL joins that load the relations of the command's table.
+        Each relation is a column aliased "table_name.attribute_name".
+        """
+        table = command.table_name
+        columns = []
+        joins = []
+        for attribute_name, _, _ in self.table_relations(table, (table,)):
+            alias = f"{table}.{attribute_name}"
+            columns.append(
+                sql.SQL("{}.value as {}").format(
+                    sql.Identifier(alias), sql.Identifier(alias)
+                )
+            )
+            joins.append(
+                self.lateral_join_sql(
+                    (table, attribute_name),
+                    table,
+                    alias,
+                    pg_config,
+                    (table, self._relations[(table, attribute_name)][0]),
+                )
+            )
+        return sql.Composed(columns), sql.Composed(joins)
+
+    def set_primary_key(self, table_name: str, *columns: str) -> "RelationFormatter":
+        """
+        Declare the primary key columns of a table, used to identify its objects across rows.
+        By default the primary key is read from the catalog, tables without one are identified by all their columns.
+        """
+        if len(columns) == 0:
+            raise ValueError("At least one primary key column is required")
+        self._declared_primary_keys[table_name] = list(columns)
         return self
 
     def extended_column_defs(
@@ -126,9 +738,16 @@ class RelationFormatter:
         Return the column definitions for the command with the extended fields added for the relationships
         """
         # A dictionary of table names mapped to a list of column definitions
-        column_defs: Dict[str, List[ColumnDefinition]] = command.get_column_definitions(
-            pg_config
-        )
+        column_defs: Dict[str, List[ColumnDefinition]] = {
+            table_name: list(columns)
+            for table_name, columns in command.get_column_definitions(pg_config).items()
+        }
+
+        for foreign_table, _ in self._relations.values():
+            if foreign_table not in column_defs:
+                column_defs[foreign_table] = list(
+                    get_column_definitions(foreign_table, pg_config)
+                )
 
         for (attribute_table, attribute_name), (
             foreign_table,
@@ -147,51 +766,363 @@ class RelationFormatter:
 
         return column_defs
 
-    # pylint: disable=too-many-locals,too-many-branches,too-many-nested-blocks
-    def format(
-        self, result_set: list[dict], pg_config=None, command=None
-    ) -> list[object]:
+    def identity_key(self, table: str, values: Dict) -> tuple:
         """
-        Format the result set as a hierarchical set of objects using the relation definitions
-        The primary table is the root of the hierarchy for each row.
+        Returns the key of an object in the identity map.
+        The key is the primary key of the table when its values are present, otherwise all column values.
+        """
+        primary_key = self._primary_keys.get(table)
+        if primary_key and all(values.get(c) is not None for c in primary_key):
+            return (table, True, tuple(hashable_value(values[c]) for c in primary_key))
+        return (table, False, tuple(hashable_value(v) for v in values.values()))
+
+    # pylint: disable=too-many-arguments,too-many-positional-arguments
+    def lateral_object(
+        self,
+        table: str,
+        values: Dict,
+        column_defs: Dict[str, List[ColumnDefinition]],
+        identity_map: Dict[tuple, object],
+        path_tables: tuple,
+    ) -> Tuple[object, bool]:
+        """
+        Returns the object of a row loaded by the "lateral" strategy and whether it was constructed.
+        The values of the root table are decoded by psycopg2, the values of related tables are to_json values.
+        """
+        relation_names = {a for (t, a) in self._relations if t == table}
+        column_values = {
+            c.name: values.get(c.name)
+            if len(path_tables) == 1
+            else json_column_value(values.get(c.name), c.data_type)
+            for c in column_defs[table]
+            if c.name not in relation_names
+        }
+
+        key = self.identity_key(table, column_values)
+        obj = identity_map.get(key)
+        if obj is not None:
+            return obj, False
+
+        for attribute_name, foreign_table, relationship_type in self.table_relations(
+            table, path_tables
+        ):
+            related = values.get(attribute_name)
+            foreign_path = path_tables + (foreign_table,)
+            if relationship_type == "many":
+                column_values[attribute_name] = [
+                    self.lateral_object(
+                        foreign_table, v, column_defs, identity_map, foreign_path
+                    )[0]
+                    for v in related or []
+                ]
+            elif related is not None:
+                column_values[attribute_name] = self.lateral_object(
+                    foreign_table, related, column_defs, identity_map, foreign_path
+                )[0]
+
+        obj = self._table_classes[table](**column_values)
+        identity_map[key] = obj
+        return obj, True
+
+    def format_lateral(
+        self,
+        decomposed_rows: List[Dict],
+        table: str,
+        column_defs: Dict[str, List[ColumnDefinition]],
+    ) -> List[object]:
+        """
+        Format the rows of a select with the "lateral" strategy, where the related rows are nested in
+        one jsonb column per relation of the primary table
+        """
+        identity_map: Dict[tuple, object] = {}
+        response = []
+        for row in decomposed_rows:
+            obj, constructed = self.lateral_object(
+                table, row[table], column_defs, identity_map, (table,)
+            )
+            if constructed:
+                response.append(obj)
+        return response
+
+    @property
+    def foreign_tables(self) -> List[str]:
+        """
+        The related tables of every relation
+        """
+        return list(dict.fromkeys(t for t, _ in self._relations.values()))
+
+    @staticmethod
+    def select_related_sql(
+        table: str, column: str, pg_config, columns: List[str] | None = None
+    ) -> sql.Composed:
+        """
+        Returns the query for the rows of table where column is one of the keys bound to its parameter.
+        Selects every column of the table unless columns are given.
+        """
+        column_definitions = get_column_definitions(table, pg_config)
+        data_type = next(c.data_type for c in column_definitions if c.name == column)
+        if columns is None:
+            columns = [c.name for c in column_definitions]
+        return sql.SQL(
+            "SELECT {columns} FROM {table} WHERE {table}.{column} = ANY(%s{cast})"
+        ).format(
+            columns=sql.SQL(",").join(
+                sql.SQL("{}.{}").format(sql.Identifier(table), sql.Identifier(c))
+                for c in columns
+            ),
+            table=sql.Identifier(table),
+            column=sql.Identifier(column),
+            # Cast the keys to the column type, e.g. uuid keys are adapted as text
+            cast=sql.SQL("")
+            if data_type in ("ARRAY", "USER-DEFINED")
+            else sql.SQL("::{}[]").format(sql.SQL(data_type)),
+        )
+
+    @staticmethod
+    def select_related(
+        table: str, column: str, keys: list, pg_config, columns: List[str] | None = None
+    ) -> List[Dict]:
+        """
+        Returns the rows of table where column is one of keys, as dictionaries keyed by column name.
+        Selects every column of the table unless columns are given.
+        """
+        command = RelationFormatter.select_related_sql(
+            table, column, pg_config, columns
+        )
+        with pg_config.connect_with_cursor() as cursor:
+            cursor.execute(command, [keys])
+            return fetch_dicts(cursor)
+
+    @staticmethod
+    async def select_related_async(
+        table: str, column: str, keys: list, pg_config
+    ) -> List[Dict]:
+        """
+        select_related on the asynchronous pool of pg_config
+        """
+        command = RelationFormatter.select_related_sql(table, column, pg_config)
+        async with pg_config.async_connect_with_cursor() as cursor:
+            await cursor.execute(command, [keys])
+            return fetch_dicts(cursor)
+
+    def selectin_queries(
+        self,
+        table: str,
+        objects: List[object],
+        identity_map: Dict[tuple, object],
+        path_tables: tuple,
+    ) -> Generator[Tuple[str, str, list], List[Dict], None]:
+        """
+        Loads the relations of objects of table with one query per relation, then the relations
+        of the related objects.
+        Yields each query as (table, column, keys) and is sent the rows of select_related,
+        so the queries can run on a blocking or an asynchronous connection.
+        """
+        for attribute_name, foreign_table, relationship_type in self.table_relations(
+            table, path_tables
+        ):
+            local_column, foreign_column = self.relation_keys(table, attribute_name)
+            keys = list({getattr(o, local_column) for o in objects}.difference([None]))
+            rows = (yield (foreign_table, foreign_column, keys)) if keys else []
+
+            # The related objects keyed by the value of foreign_column
+            related: Dict[object, List[object]] = {}
+            loaded: Dict[tuple, object] = {}
+            for values in rows:
+                key = self.identity_key(foreign_table, values)
+                obj = identity_map.get(key)
+                if obj is None:
+                    obj = self._table_classes[foreign_table](**values)
+                    identity_map[key] = obj
+                loaded[key] = obj
+                related.setdefault(values[foreign_column], []).append(obj)
+
+            for obj in objects:
+                found = related.get(getattr(obj, local_column), [])
+                if relationship_type == "many":
+                    set_attribute(obj, attribute_name, list(found))
+                else:
+                    set_attribute(obj, attribute_name, found[0] if found else None)
+
+            yield from self.selectin_queries(
+                foreign_table,
+                list(loaded.values()),
+                identity_map,
+                path_tables + (foreign_table,),
+            )
+
+    # pylint: disable=too-many-arguments,too-many-positional-arguments
+    def load_selectin(
+        self,
+        table: str,
+        objects: List[object],
+        pg_config,
+        identity_map: Dict[tuple, object],
+        path_tables: tuple,
+    ):
+        """
+        Loads the relations of objects of table and of the related objects with select_related
+        """
+        queries = self.selectin_queries(table, objects, identity_map, path_tables)
+        try:
+            query = next(queries)
+            while True:
+                query = queries.send(self.select_related(*query, pg_config))
+        except StopIteration:
+            pass
+
+    # pylint: disable=too-many-arguments,too-many-positional-arguments
+    async def load_selectin_async(
+        self,
+        table: str,
+        objects: List[object],
+        pg_config,
+        identity_map: Dict[tuple, object],
+        path_tables: tuple,
+    ):
+        """
+        load_selectin on the asynchronous pool of pg_config
+        """
+        queries = self.selectin_queries(table, objects, identity_map, path_tables)
+        try:
+            query = next(queries)
+            while True:
+                rows = await self.select_related_async(*query, pg_config)
+                query = queries.send(rows)
+        except StopIteration:
+            pass
+
+    def selectin_roots(
+        self,
+        decomposed_rows: List[Dict],
+        table: str,
+        column_defs: Dict[str, List[ColumnDefinition]],
+    ) -> Tuple[List[object], Dict[tuple, object]]:
+        """
+        Returns the primary table objects of a select with the "selectin" strategy, without their relations,
+        and the identity map of the objects
+        """
+        relation_names = {a for (t, a) in self._relations if t == table}
+        identity_map: Dict[tuple, object] = {}
+        response = []
+        for row in decomposed_rows:
+            values = {
+                c.name: row[table].get(c.name)
+                for c in column_defs[table]
+                if c.name not in relation_names
+            }
+            key = self.identity_key(table, values)
+            if key not in identity_map:
+                identity_map[key] = self._table_classes[table](**values)
+                response.append(identity_map[key])
+        return response, identity_map
+
+    def format_selectin(
+        self,
+        decomposed_rows: List[Dict],
+        table: str,
+        column_defs: Dict[str, List[ColumnDefinition]],
+        pg_config,
+    ) -> List[object]:
+        """
+        Format the rows of a select with the "selectin" strategy, loading the relations of the
+        primary table objects with one query per relation
+        """
+        response, identity_map = self.selectin_roots(
+            decomposed_rows, table, column_defs
+        )
+        self.load_selectin(table, response, pg_config, identity_map, (table,))
+        return response
+
+    def prepare_format(
+        self, result_set: list, pg_config, command, description
+    ) -> Tuple[List[Dict], Dict[str, List[ColumnDefinition]]]:
+        """
+        Builds the dataclasses and primary keys of the tables of a result set.
+        Returns the decomposed rows and the column definitions of every table, including related tables.
         """
         # Decompose the result set into a list of dictionaries
         # Each dictionary represents a row in the result set
         # and is keyed by table name, with values as dictionaries of column values
         # i.e. {"posts": {"id": 1, "title": "Post 1"}, "comments": {"id": 1, "post_id": 1, "comment": "Comment 1"}}
         decomposed_rows = decompose_dict_response_formatter(
-            result_set, pg_config, command
+            result_set, pg_config, command, description
         )
 
         # Construct the dataclasses for the response
+        column_defs = self.extended_column_defs(command, pg_config)
         self._table_classes = build_dataclasses(
-            self.extended_column_defs(command, pg_config)
+            column_defs,
+            slots=self.slots,
+            frozen=self.frozen,
         )
+        self._primary_keys = {
+            table: self._declared_primary_keys.get(table)
+            or [c.name for c in columns if c.is_primary_key]
+            for table, columns in column_defs.items()
+        }
+        return decomposed_rows, column_defs
 
-        obj_cache: List[
-            object
-        ] = []  # a cache of objects that have already been created
+    async def format_async(
+        self, result_set: list[dict], pg_config=None, command=None, description=None
+    ) -> list[object]:
+        """
+        format for execute_async, which loads the relations of the "selectin" strategy through the
+        asynchronous pool of pg_config instead of blocking the event loop
+        """
+        if self.strategy != "selectin":
+            return self.format(result_set, pg_config, command, description)
+
+        decomposed_rows, column_defs = self.prepare_format(
+            result_set, pg_config, command, description
+        )
+        table = command.table_name
+        response, identity_map = self.selectin_roots(
+            decomposed_rows, table, column_defs
+        )
+        await self.load_selectin_async(
+            table, response, pg_config, identity_map, (table,)
+        )
+        return response
+
+    # pylint: disable=too-many-locals,too-many-branches
+    def format(
+        self, result_set: list[dict], pg_config=None, command=None, description=None
+    ) -> list[object]:
+        """
+        Format the result set as a hierarchical set of objects using the relation definitions
+        The primary table is the root of the hierarchy for each row.
+
+        Rows that are repeated by joins are mapped to one object through an identity map, keyed by
+        the primary key of the table (see set_primary_key) or by the values of all columns.
+        """
+        decomposed_rows, column_defs = self.prepare_format(
+            result_set, pg_config, command, description
+        )
+
+        if self.strategy == "lateral":
+            return self.format_lateral(decomposed_rows, command.table_name, column_defs)
+        if self.strategy == "selectin":
+            return self.format_selectin(
+                decomposed_rows, command.table_name, column_defs, pg_config
+            )
+
+        # The objects that have already been created, keyed by identity_key
+        identity_map: Dict[tuple, object] = {}
+        # The identity keys of the objects already added to each "many" attribute
+        related_keys: Dict[tuple, set] = {}
         response: List[object] = []
         for row in decomposed_rows:
             for table, values in row.items():
-                # Construct the row object for the current table
-                row_obj = self._table_classes[table](**values)
-
-                # If the table is the primary table, add the object to the response
-                # otherwise, cache the object for use in relationships
-                if table == command.table_name:
-                    response_obj = next((r for r in response if r == row_obj), None)
-                    if response_obj is None:
-                        # If the root object is not already in the response, add it
+                # Find or construct the row object for the current table
+                key = self.identity_key(table, values)
+                row_obj = identity_map.get(key)
+                if row_obj is None:
+                    row_obj = self._table_classes[table](**values)
+                    identity_map[key] = row_obj
+                    # If the table is the primary table, add the object to the response
+                    if table == command.table_name:
                         response.append(row_obj)
-                    else:
-                        row_obj = response_obj
-                else:
-                    cached_obj = next((o for o in obj_cache if o == row_obj), None)
-                    if cached_obj is None:
-                        obj_cache.append(row_obj)
-                    else:
-                        row_obj = cached_obj
 
                 # Add the foreign objects to the current row object
                 for (attribute_table, attribute_name), (
@@ -202,35 +1133,23 @@ class RelationFormatter:
                     if attribute_table != table:
                         continue
 
-                    # Construct the object for the foreign table
-                    foreign_obj = self._table_classes[foreign_table](
-                        **row[foreign_table]
-                    )
-                    if foreign_obj in obj_cache:
-                        foreign_obj = next((o for o in obj_cache if o == foreign_obj))
-                    else:
-                        obj_cache.append(foreign_obj)
-
-                    # If all attributes of the foreign_obj are None, set the foreign_obj to none
-                    if all(v is None for v in row[foreign_table].values()):
-                        foreign_obj = None
-
-                    if hasattr(row_obj, attribute_name):
-                        # If the attribute already exists, convert it to a list and
-                        # append the foreign object to the attribute
-                        if relationship_type == "many":
-                            if foreign_obj:
-                                getattr(row_obj, attribute_name).append(foreign_obj)
-                        else:
-                            setattr(row_obj, attribute_name, foreign_obj)
-                    else:
-                        # If the attribute does not exist, create it and set the foreign object as the value
-                        if relationship_type == "many":
-                            setattr(
-                                row_obj,
-                                attribute_name,
-                                [foreign_obj] if foreign_obj else [],
+                    # If all attributes of the foreign object are None, there is no foreign object
+                    foreign_values = row[foreign_table]
+                    foreign_obj = None
+                    if not all(v is None for v in foreign_values.values()):
+                        foreign_key = self.identity_key(foreign_table, foreign_values)
+                        foreign_obj = identity_map.get(foreign_key)
+                        if foreign_obj is None:
+                            foreign_obj = self._table_classes[foreign_table](
+                                **foreign_values
                             )
-                        else:
-                            setattr(row_obj, attribute_name, foreign_obj)
+                            identity_map[foreign_key] = foreign_obj
+
+                    if relationship_type != "many":
+                        set_attribute(row_obj, attribute_name, foreign_obj)
+                    elif foreign_obj is not None:
+                        added = related_keys.setdefault((key, attribute_name), set())
+                        if foreign_key not in added:
+                            added.add(foreign_key)
+                            getattr(row_obj, attribute_name).append(foreign_obj)
         return response
@@ -0,0 +1,244 @@
+"""
+Cache of table column definitions, scoped by connection and schema
+"""
+
+import select
+import threading
+import time
+import typing
+from typing import Dict, List, Tuple
+import psycopg2
+from psycopg2 import sql
+from sqlark.column_definition import ColumnDefinition
+from sqlark.logger import get_logger
+
+if typing.TYPE_CHECKING:
+    from sqlark.postgres_config import PostgresConfig
+
+logger = get_logger(__name__)
+
+SCHEMA_CHANGE_CHANNEL = "sqlark_schema_change"
+
+
+class SchemaCache:
+    """
+    Column definitions keyed by (connection identity, schema, table).
+
+    Entries expire after the schema_cache_ttl of the PostgresConfig used to read them (never, if the ttl is None).
+    generation is incremented whenever cached definitions are invalidated or replaced by different definitions,
+    so that anything derived from the cache can tell when it is stale.
+    """
+
+    def __init__(self):
+        self._entries: Dict[Tuple, Tuple[float, List[ColumnDefinition]]] = {}
+        self._lock = threading.Lock()
+        self.generation = 0
+
+    @staticmethod
+    def key(pg_config: "PostgresConfig", table_name: str) -> Tuple:
+        """
+        The cache key of a table for a configuration
+        """
+        return (pg_config.cache_identity, pg_config.schema, table_name)
+
+    def get(
+        self, pg_config: "PostgresConfig", table_name: str
+    ) -> List[ColumnDefinition] | None:
+        """
+        Returns the cached column definitions, or None if they are missing or expired
+        """
+        entry = self._entries.get(self.key(pg_config, table_name))
+        if entry is None:
+            return None
+
+        loaded_at, columns = entry
+        ttl = pg_config.schema_cache_ttl
+        if ttl is not None and time.monotonic() - loaded_at > ttl:
+            return None
+        return columns
+
+    def set(
+        self,
+        pg_config: "PostgresConfig",
+        table_name: str,
+        columns: List[ColumnDefinition],
+    ):
+        """
+        Cache the column definitions of a table
+        """
+        key = self.key(pg_config, table_name)
+        with self._lock:
+            previous = self._entries.get(key)
+            if previous is not None and previous[1] != columns:
+                self.generation += 1
+            self._entries[key] = (time.monotonic(), columns)
+
+    def invalidate(
+        self,
+        pg_config: "PostgresConfig | None" = None,
+        table_name: str | None = None,
+        schema: str | None = None,
+    ):
+        """
+        Remove cached column definitions.
+        params:
+            pg_config: PostgresConfig | None Only remove entries read through this connection identity
+            table_name: str | None Only remove entries of this table
+            schema: str | None Only remove entries of this schema, or of configurations that use the search path
+        """
+        identity = None if pg_config is None else pg_config.cache_identity
+        with self._lock:
+            for key in list(self._entries):
+                key_identity, key_schema, key_table = key
+                if identity is not None and key_identity != identity:
+                    continue
+                if table_name is not None and key_table != table_name:
+                    continue
+                if schema is not None and key_schema not in (schema, None):
+                    continue
+                del self._entries[key]
+            self.generation += 1
+
+    def clear(self):
+        """Remove every cached entry"""
+        self.invalidate()
+
+
+SCHEMA_CACHE = SchemaCache()
+
+
+SCHEMA_CHANGE_FUNCTION = sql.SQL(
+    """
+    CREATE OR REPLACE FUNCTION sqlark_notify_schema_change() RETURNS event_trigger
+    LANGUAGE plpgsql AS $$
+    DECLARE
+        obj record;
+    BEGIN
+        IF TG_EVENT = 'sql_drop' THEN
+            FOR obj IN SELECT * FROM pg_event_trigger_dropped_objects()
+                WHERE object_type IN ('table', 'table column', 'view', 'materialized view', 'foreign table')
+            LOOP
+                PERFORM pg_notify({channel}, obj.address_names[1] || '.' || obj.address_names[2]);
+            END LOOP;
+        ELSE
+            FOR obj IN SELECT n.nspname, c.relname
+                FROM pg_event_trigger_ddl_commands() d
+                JOIN pg_class c ON c.oid = d.objid
+                JOIN pg_namespace n ON n.oid = c.relnamespace
+                WHERE d.classid = 'pg_class'::regclass
+            LOOP
+                PERFORM pg_notify({channel}, obj.nspname || '.' || obj.relname);
+            END LOOP;
+        END IF;
+    END;
+    $$
+    """
+)
+
+
+def install_schema_change_trigger(pg_config: "PostgresConfig"):
+    """
+    Install event triggers that NOTIFY the sqlark_schema_change channel with "schema.table"
+    whenever a table, view or column is created, altered or dropped.
+    Creating event triggers requires superuser privileges.
+    """
+    uninstall_schema_change_trigger(pg_config)
+    with pg_config.connect_with_cursor(transactional=True) as cursor:
+        cursor.execute(
+            SCHEMA_CHANGE_FUNCTION.format(channel=sql.Literal(SCHEMA_CHANGE_CHANNEL))
+        )
+        cursor.execute(
+            "CREATE EVENT TRIGGER sqlark_schema_change_end ON ddl_command_end "
+            "EXECUTE FUNCTION sqlark_notify_schema_change()"
+        )
+        cursor.execute(
+            "CREATE EVENT TRIGGER sqlark_schema_change_drop ON sql_drop "
+            "EXECUTE FUNCTION sqlark_notify_schema_change()"
+        )
+
+
+def uninstall_schema_change_trigger(pg_config: "PostgresConfig"):
+    """
+    Remove the event triggers installed by install_schema_change_trigger
+    """
+    with pg_config.connect_with_cursor(transactional=True) as cursor:
+        cursor.execute("DROP EVENT TRIGGER IF EXISTS sqlark_schema_change_end")
+        cursor.execute("DROP EVENT TRIGGER IF EXISTS sqlark_schema_change_drop")
+        cursor.execute("DROP FUNCTION IF EXISTS sqlark_notify_schema_change()")
+
+
+class SchemaChangeListener:
+    """
+    A daemon thread that LISTENs for schema change notifications and invalidates the affected cache entries.
+    The notification payload is "schema.table", an empty payload invalidates every table of the connection.
+    Notifications are sent by the event triggers from install_schema_change_trigger.
+    """
+
+    def __init__(
+        self,
+        pg_config: "PostgresConfig",
+        cache: SchemaCache = SCHEMA_CACHE,
+        channel: str = SCHEMA_CHANGE_CHANNEL,
+        poll_interval: float = 1.0,
+    ):
+        self.pg_config = pg_config
+        self.cache = cache
+        self.channel = channel
+        self.poll_interval = poll_interval
+        self.listening = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> "SchemaChangeListener":
+        """Start listening in a daemon thread"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="sqlark-schema-listener", daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: float | None = None):
+        """Stop listening and wait for the thread to exit"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def handle(self, payload: str):
+        """Invalidate the cache entries named by a notification payload"""
+        if "." in payload:
+            schema, table_name = payload.split(".", 1)
+            self.cache.invalidate(self.pg_config, table_name, schema=schema)
+        else:
+            self.cache.invalidate(self.pg_config)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self._listen()
+            except psycopg2.Error as e:
+                self.listening.clear()
+                logger.warning("Schema change listener disconnected - %s", e)
+                # Changes may have been missed while disconnected
+                self.cache.invalidate(self.pg_config)
+                self._stop.wait(self.poll_interval)
+
+    def _listen(self):
+        connection = psycopg2.connect(**self.pg_config.connection_params)
+        try:
+            connection.autocommit = True
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    sql.SQL("LISTEN {}").format(sql.Identifier(self.channel))
+                )
+            self.listening.set()
+
+            while not self._stop.is_set():
+                if select.select([connection], [], [], self.poll_interval)[0]:
+                    connection.poll()
+                    while connection.notifies:
+                        self.handle(connection.notifies.pop(0).payload)
+        finally:
+            self.listening.clear()
+            connection.close()
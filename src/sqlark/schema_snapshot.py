@@ -0,0 +1,173 @@
+"""
+Snapshots of the column definitions, shipped with a deployment so that
+a new process can build commands without reading the catalog.
+
+Export a snapshot at build time, using the PG* environment variables to connect:
+
+    python -m sqlark.schema_snapshot schema.json [table ...]
+
+And load it when the application starts:
+
+    load_schema_snapshot(pg_config, "schema.json")
+"""
+
+import argparse
+import hashlib
+import json
+from typing import Any, Dict, List
+from psycopg2 import sql
+from sqlark.column_definition import ColumnDefinition
+from sqlark.logger import get_logger
+from sqlark.postgres_config import PostgresConfig
+from sqlark.schema_cache import SCHEMA_CACHE
+from sqlark.utilities import (
+    fetch_dicts,
+    prefetch_schema,
+    scoped_column_definitions_query,
+)
+
+logger = get_logger(__name__)
+
+# Version 2 added is_primary_key, version 1 snapshots must be exported again
+SNAPSHOT_VERSION = 2
+
+# The catalog fields of a column definition, the remaining fields are set by commands
+SNAPSHOT_FIELDS = ("name", "data_type", "is_nullable", "default", "is_primary_key")
+
+
+def snapshot_tables(
+    column_definitions: Dict[str, List[ColumnDefinition]],
+) -> Dict[str, List[Dict]]:
+    """
+    Returns the JSON serializable catalog fields of the column definitions, sorted by table name
+    """
+    return {
+        table_name: [{f: getattr(c, f) for f in SNAPSHOT_FIELDS} for c in columns]
+        for table_name, columns in sorted(column_definitions.items())
+    }
+
+
+def snapshot_checksum(tables: Dict[str, List[Dict]]) -> str:
+    """
+    Returns a checksum of the snapshot tables
+    """
+    data = json.dumps(tables, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+def dump_schema_snapshot(
+    pg_config: PostgresConfig, path: str | None = None, tables: List[str] | None = None
+) -> Dict:
+    """
+    Reads the column definitions with a single catalog query and returns them as a snapshot.
+
+    params:
+        pg_config: PostgresConfig The configuration for the postgres connection
+        path: str | None Write the snapshot to this file as JSON
+        tables: list[str] | None The tables to include. Defaults to every table of the schema (or search path).
+    returns:
+        dict The snapshot
+    raises:
+        ValueError: If the column definitions could not be retrieved
+    """
+    snapshot_data = snapshot_tables(prefetch_schema(pg_config, tables))
+    snapshot = {
+        "version": SNAPSHOT_VERSION,
+        "schema": pg_config.schema,
+        "checksum": snapshot_checksum(snapshot_data),
+        "tables": snapshot_data,
+    }
+
+    if path is not None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(snapshot, f, indent=2)
+
+    return snapshot
+
+
+def live_checksum(pg_config: PostgresConfig, table_names: List[str]) -> str:
+    """
+    Returns the checksum of the live column definitions of table_names, without caching them
+    """
+    command, params = scoped_column_definitions_query(
+        pg_config, sql.SQL("c.relname = ANY(%s)"), [table_names]
+    )
+    with pg_config.connect_with_cursor() as cursor:
+        cursor.execute(command, params)
+        result = fetch_dicts(cursor)
+
+    column_definitions: Dict[str, List[ColumnDefinition]] = {}
+    for row in result:
+        column_definitions.setdefault(row["table_name"], []).append(
+            ColumnDefinition(**row)
+        )
+    return snapshot_checksum(snapshot_tables(column_definitions))
+
+
+def load_schema_snapshot(
+    pg_config: PostgresConfig, snapshot: str | Dict, validate: bool = False
+) -> Dict[str, List[ColumnDefinition]]:
+    """
+    Loads a snapshot into the schema cache of pg_config, so its tables are not read from the catalog.
+
+    params:
+        pg_config: PostgresConfig The configuration the snapshot is used with
+        snapshot: str | dict The path of a snapshot file, or a snapshot returned by dump_schema_snapshot
+        validate: bool Compare the checksum of the snapshot with the live column definitions (one catalog query).
+            A stale snapshot is not loaded, and its tables are read from the catalog as usual.
+    returns:
+        dict[str, list[ColumnDefinition]] The loaded column definitions keyed by table name
+    raises:
+        ValueError: If the snapshot is invalid
+    """
+    data: Dict[str, Any]
+    if isinstance(snapshot, str):
+        with open(snapshot, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    else:
+        data = snapshot
+
+    try:
+        if data["version"] != SNAPSHOT_VERSION:
+            raise ValueError(f"unsupported version {data['version']}")
+        if data["schema"] != pg_config.schema:
+            raise ValueError(
+                f"snapshot of schema {data['schema']} used with schema {pg_config.schema}"
+            )
+        tables = data["tables"]
+        if snapshot_checksum(tables) != data["checksum"]:
+            raise ValueError("checksum does not match its tables")
+    except (KeyError, TypeError) as e:
+        raise ValueError(f"Invalid schema snapshot - missing {str(e)}") from e
+    except ValueError as e:
+        raise ValueError(f"Invalid schema snapshot - {str(e)}") from e
+
+    if validate and live_checksum(pg_config, list(tables)) != data["checksum"]:
+        logger.warning("Schema snapshot is stale, column definitions will be read")
+        return {}
+
+    column_definitions = {
+        table_name: [ColumnDefinition(table_name=table_name, **c) for c in columns]
+        for table_name, columns in tables.items()
+    }
+    for table_name, columns in column_definitions.items():
+        SCHEMA_CACHE.set(pg_config, table_name, columns)
+    return column_definitions
+
+
+def main():
+    """Write a schema snapshot, connecting with the PG* environment variables"""
+    parser = argparse.ArgumentParser(description="Export a sqlark schema snapshot")
+    parser.add_argument("path", help="The JSON file to write")
+    parser.add_argument("tables", nargs="*", help="Defaults to every table")
+    parser.add_argument("--schema", default=None)
+    args = parser.parse_args()
+
+    snapshot = dump_schema_snapshot(
+        PostgresConfig(schema=args.schema), args.path, args.tables or None
+    )
+    print(f"Wrote {len(snapshot['tables'])} tables to {args.path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,12 +2,17 @@
 Select query builder
 """
 
-from typing import List, Dict
+import uuid
+from typing import List, Dict, Iterator, Tuple
 from psycopg2 import sql
+from psycopg2.extensions import encodings
+from sqlark import response_formatters
 from sqlark.join import Join
 from sqlark.where import Where
 from sqlark.command import SQLCommand
 from sqlark.postgres_config import PostgresConfig
+from sqlark.prepared_statements import execute_statement
+from sqlark.statement_cache import composable_key
 from sqlark.utilities import get_columns_composed, get_column_definitions
 from sqlark.column_definition import ColumnDefinition
 
@@ -24,6 +29,9 @@ class Select(SQLCommand):
         "_limit",
         "_offset",
         "_group_by",
+        "_json_response",
+        "_projection",
+        "_deferred",
     ]
 
     def __init__(self, table_name: str):
@@ -39,38 +47,174 @@ class Select(SQLCommand):
         self._limit = None
         self._offset = None
         self._group_by = None
+        self._json_response = (False, False)
+        # The selected and excluded column names of each projected table
+        self._projection: Dict[str, Tuple[Tuple[str, ...] | None, Tuple[str, ...]]] = {}
+        self._deferred: Dict[str, Tuple[str, ...]] = {}
 
     @property
     def table_name(self):
         """Table name"""
         return self._table_name
 
+    @property
+    def catalog_tables(self) -> List[str]:
+        """
+        The primary table, the joined tables and the related tables of a RelationFormatter
+        """
+        tables = self.selected_tables
+        relation_formatter = self.relation_formatter
+        if relation_formatter is not None:
+            tables += [t for t in relation_formatter.foreign_tables if t not in tables]
+        return tables
+
+    @property
+    def selected_tables(self) -> List[str]:
+        """
+        The primary table and the joined tables
+        """
+        join = self.get_join()
+        if join is None:
+            return [self._table_name]
+        return [self._table_name] + join.tables
+
     def get_column_definitions(self, pg_config) -> Dict[str, List[ColumnDefinition]]:
         """
         Returns a dictionary with tablenames (keys) mapped to list of column definition objects.
         """
         col_defs = super().get_column_definitions(pg_config)
+        if self._table_name in self._projection:
+            col_defs[self._table_name] = self.projected_column_definitions(
+                self._table_name, pg_config
+            )
 
         # Add the join table column definitions
         join = self.get_join()
         if join is not None:
             for t in join.tables:
-                col_defs[t] = get_column_definitions(t, pg_config)
+                col_defs[t] = self.projected_column_definitions(t, pg_config)
 
         return col_defs
 
-    def get_columns(self, table_name: str, pg_config: PostgresConfig) -> sql.Composed:
-        """The sql formatted columns to use building the query"""
-        columns = get_columns_composed(table_name, pg_config)
+    def projected_column_definitions(
+        self, table_name: str, pg_config: PostgresConfig
+    ) -> List[ColumnDefinition]:
+        """
+        Returns the column definitions of a table that are selected by columns() and exclude(),
+        every column of the table if it is not projected
+        raises:
+            ValueError: If a projected column does not exist, or every column is excluded
+        """
+        column_definitions = get_column_definitions(table_name, pg_config)
+        if table_name not in self._projection:
+            return column_definitions.copy()
 
-        # Construct the join sql
+        selected, excluded = self._projection[table_name]
+        by_name = {c.name: c for c in column_definitions}
+        missing = [c for c in (selected or ()) + excluded if c not in by_name]
+        if missing:
+            raise ValueError(f"Columns {missing} do not exist in {table_name}")
+
+        if selected is None:
+            selected = tuple(by_name)
+        projected = [by_name[c] for c in selected if c not in excluded]
+        if not projected:
+            raise ValueError(f"No columns are selected from {table_name}")
+        return projected
+
+    def get_columns(self, table_name: str, pg_config: PostgresConfig) -> sql.Composed:
+        """
+        The sql formatted columns to use building the query
+        raises:
+            ValueError: If columns() or exclude() name a table that is neither the primary table nor joined
+        """
+        tables = [table_name]
         join = self.get_join()
         if join is not None:
-            for t in join.tables:
+            tables += join.tables
+
+        for t in self._projection:
+            if t not in tables:
+                raise ValueError(f"Table {t} is not selected")
+
+        columns = sql.Composed([])
+        for t in tables:
+            if t in self._projection:
+                columns = columns + sql.Composed(
+                    [
+                        c.format_with_alias()
+                        for c in self.projected_column_definitions(t, pg_config)
+                    ]
+                )
+            else:
                 columns = columns + get_columns_composed(t, pg_config)
 
         return columns
 
+    def columns(self, *columns: str, table: str | None = None):
+        """
+        Select only the named columns of a table, in the given order, instead of every column.
+        The table defaults to the primary table. Repeated calls add columns.
+        The response formatters, including the generated objects, only have the selected columns.
+        Building the query raises a ValueError if the table is neither the primary table nor joined.
+        """
+        table = self._table_name if table is None else table
+        selected, excluded = self._projection.get(table, (None, ()))
+        selected = (selected or ()) + tuple(
+            c for c in columns if c not in (selected or ())
+        )
+        self._projection[table] = (selected, excluded)
+        return self
+
+    def exclude(self, *columns: str, table: str | None = None):
+        """
+        Select every column of a table except the named columns.
+        The table defaults to the primary table, and must be the primary table or joined when the query is built.
+        """
+        table = self._table_name if table is None else table
+        selected, excluded = self._projection.get(table, (None, ()))
+        self._projection[table] = (selected, excluded + columns)
+        return self
+
+    def defer(self, *columns: str, table: str | None = None):
+        """
+        Leave large columns of a table out of the select, to be loaded when they are read.
+        Objects from respond_with_object load a deferred column on its first access, for every object
+        of the result set with one query by primary key. Other response formats do not have the deferred columns.
+        The table defaults to the primary table.
+        """
+        table = self._table_name if table is None else table
+        self._deferred[table] = self._deferred.get(table, ()) + columns
+        return self.exclude(*columns, table=table)
+
+    def deferred_columns(
+        self, pg_config: PostgresConfig
+    ) -> Dict[str, Tuple[str, Tuple[str, ...]]]:
+        """
+        Returns the key column and the deferred columns of each table with deferred columns.
+        The key is the primary key of the table, or "id" for tables without a single column primary key.
+        raises:
+            ValueError: If the table is not selected, or its key column is not selected
+        """
+        deferred = {}
+        for table, columns in self._deferred.items():
+            if table not in self.selected_tables:
+                raise ValueError(f"Table {table} is not selected")
+            primary_key = [
+                c.name
+                for c in get_column_definitions(table, pg_config)
+                if c.is_primary_key
+            ]
+            key = primary_key[0] if len(primary_key) == 1 else "id"
+            if key not in [
+                c.name for c in self.projected_column_definitions(table, pg_config)
+            ]:
+                raise ValueError(
+                    f"The key column {key} of {table} must be selected to defer columns"
+                )
+            deferred[table] = (key, columns)
+        return deferred
+
     def join(self, join: Join | None = None, **kwargs):
         """
         Join another table
@@ -207,9 +351,10 @@ class Select(SQLCommand):
 
     def limit(self, limit):
         """
-        Limit the number of rows returned
+        Limit the number of rows returned.
+        The limit is bound as a parameter, so selects that only differ in their limit share one statement.
         """
-        self._limit = sql.SQL("LIMIT {}").format(sql.Literal(limit))
+        self._limit = limit
         return self
 
     @property
@@ -219,13 +364,14 @@ class Select(SQLCommand):
         """
         if self._limit is None:
             return sql.SQL("")
-        return self._limit
+        return sql.SQL("LIMIT {}").format(sql.Placeholder())
 
     def offset(self, offset):
         """
-        Offset the number of rows returned
+        Offset the number of rows returned.
+        The offset is bound as a parameter, like the limit.
         """
-        self._offset = sql.SQL("OFFSET {}").format(sql.Literal(offset))
+        self._offset = offset
         return self
 
     @property
@@ -235,7 +381,7 @@ class Select(SQLCommand):
         """
         if self._offset is None:
             return sql.SQL("")
-        return self._offset
+        return sql.SQL("OFFSET {}").format(sql.Placeholder())
 
     def group_by(self, column, table=None):
         """
@@ -256,7 +402,62 @@ class Select(SQLCommand):
             return sql.SQL("")
         return self._group_by
 
-    def to_sql(self, pg_config: PostgresConfig) -> sql.SQL:
+    def respond_with_json(self, decomposed: bool = False, lines: bool = False):
+        """
+        Respond to execute() with JSON text encoded by the server, ready to be written to a response.
+        The query is wrapped in json_agg(row_to_json(...)), so no python rows are constructed.
+        params:
+            decomposed: bool Nest the columns by table like respond_with_decomposed_dict,
+                        instead of keying them by "table_name.column_name" like the default formatter
+            lines: bool Respond with newline delimited JSON, one object per row.
+                   With iter_execute each batch is yielded as a chunk of lines.
+
+        Values are encoded by postgres, e.g. timestamps are ISO 8601 strings.
+        """
+        self._json_response = (decomposed, lines)
+        self._response_formatter = response_formatters.json_response_formatter
+        return self
+
+    def json_sql(
+        self, command: sql.Composable, pg_config: PostgresConfig
+    ) -> sql.Composed:
+        """
+        Wraps the command in a query returning JSON text, as configured by respond_with_json
+        """
+        decomposed, lines = self._json_response
+        rows = sql.Identifier("sqlark_rows")
+
+        if decomposed:
+            tables: Dict[str, List[sql.Composable]] = {}
+            for columns in self.get_column_definitions(pg_config).values():
+                for c in columns:
+                    alias = c.alias or f"{c.table_name}.{c.name}"
+                    table, column = alias.split(".", 1)
+                    tables.setdefault(table, []).append(
+                        sql.SQL("{}.{} AS {}").format(
+                            rows, sql.Identifier(alias), sql.Identifier(column)
+                        )
+                    )
+            row = sql.SQL("json_build_object({})").format(
+                sql.SQL(", ").join(
+                    sql.SQL("{}, (SELECT row_to_json(t) FROM (SELECT {}) t)").format(
+                        sql.Literal(table), sql.SQL(", ").join(columns)
+                    )
+                    for table, columns in tables.items()
+                )
+            )
+        else:
+            row = sql.SQL("row_to_json({})").format(rows)
+
+        if lines:
+            template = "SELECT {row}::text || E'\\n' FROM ({command}) {rows}"
+        else:
+            template = (
+                "SELECT coalesce(json_agg({row}), '[]')::text FROM ({command}) {rows}"
+            )
+        return sql.SQL(template).format(row=row, command=command, rows=rows)
+
+    def to_sql(self, pg_config: PostgresConfig) -> sql.Composed:
         """
         Overrides the SQLCommand to_sql method
         """
@@ -270,6 +471,15 @@ class Select(SQLCommand):
         else:
             join_sql = sql.SQL("")
 
+        # Load the relations of a "lateral" RelationFormatter in LATERAL subqueries
+        relation_formatter = self.relation_formatter
+        if relation_formatter is not None and relation_formatter.strategy == "lateral":
+            lateral_columns, lateral_joins = relation_formatter.lateral_sql(
+                self, pg_config
+            )
+            columns = columns + lateral_columns
+            join_sql = sql.Composed([join_sql, lateral_joins])
+
         # Construct the where sql
         if self._where is not None:
             where_sql = sql.SQL(" WHERE {where}").format(where=self._where.sql)
@@ -296,27 +506,93 @@ class Select(SQLCommand):
             limit=limit,
         )
 
+        if self._response_formatter is response_formatters.json_response_formatter:
+            return self.json_sql(command, pg_config)
         return command
 
+    def fingerprint(self):
+        """
+        Returns the shape of the select for the statement cache: the tables, projected columns, joins,
+        where clause, ordering, grouping, limits and response mode. Selects loading "lateral" relations are not cached.
+        """
+        relation_formatter = self.relation_formatter
+        if relation_formatter is not None and relation_formatter.strategy == "lateral":
+            return None
+
+        json_response = None
+        if self._response_formatter is response_formatters.json_response_formatter:
+            json_response = self._json_response
+
+        join = self.get_join()
+        return (
+            type(self),
+            self._table_name,
+            None if join is None else composable_key(join.sql),
+            None if self._where is None else composable_key(self._where.sql),
+            composable_key(self._distinct),
+            composable_key(self._order_by),
+            composable_key(self._group_by),
+            self._offset is not None,
+            self._limit is not None,
+            json_response,
+            tuple(sorted(self._projection.items())),
+        )
+
     def get_params(self):
         """
-        Returns the parameters for the where clause
+        Returns the parameters for the where clause, followed by the offset and the limit
         """
-        if self._where is None:
-            return []
-        return self._where.params
+        params = [] if self._where is None else list(self._where.params)
+        if self._offset is not None:
+            params.append(self._offset)
+        if self._limit is not None:
+            params.append(self._limit)
+        return params
 
     def execute(self, pg_config: PostgresConfig, transactional=False):
         """
         Executes the command
         params:
-            pg_config: PostgresConfig The configuration for the postgres connection
-            transactional: bool Whether to execute the command in a transaction
+            pg_config: PostgresConfig | Session The configuration or session for the postgres connection
+            transactional: bool Whether to execute the command in a transaction (ignored for a Session)
         """
-        command = self.to_sql(pg_config)
+        key, command = self.compile(pg_config)
         params = self.get_params()
 
         with pg_config.connect_with_cursor(transactional=transactional) as cursor:
+            command = self.render(key, command, cursor)
+            self.logger.debug(command)
+            if params:
+                self.logger.debug(params)
+            execute_statement(cursor, command, params, pg_config)
+            result = cursor.fetchall()
+            description = cursor.description
+
+        # Format after returning the connection, a RelationFormatter may run more queries on the pool
+        return self.format_response(result, pg_config, description)
+
+    def iter_execute(
+        self, pg_config: PostgresConfig, batch_size=1000, batches=False
+    ) -> Iterator:
+        """
+        Executes the command with a named (server-side) cursor and lazily yields the formatted result,
+        so that memory use is bounded by batch_size rather than by the size of the result.
+        params:
+            pg_config: PostgresConfig | Session The configuration or session for the postgres connection
+            batch_size: int The number of rows fetched from the server at a time
+            batches: bool Yield each formatted batch instead of individual rows
+
+        Each batch is formatted independently, so respond_with_associated_objects only
+        combines rows that arrive in the same batch. With respond_with_arrow the rows are
+        yielded as pyarrow.RecordBatch objects of up to batch_size rows, and with respond_with_columns
+        as one dictionary of arrays per batch.
+        """
+        command = self.to_sql(pg_config)
+        params = self.get_params()
+        name = f"sqlark_{uuid.uuid4().hex}"
+
+        with pg_config.connect_with_cursor(name=name) as cursor:
+            cursor.itersize = batch_size
             self.logger.debug(command.as_string(cursor))
             if params:
                 self.logger.debug(params)
@@ -324,4 +600,50 @@ class Select(SQLCommand):
             else:
                 cursor.execute(command)
 
-            return self._response_formatter(cursor.fetchall(), pg_config, self)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                formatted = self.format_response(rows, pg_config, cursor.description)
+                if batches or isinstance(formatted, (str, dict)):
+                    # JSON text and the arrays of respond_with_columns are not split into rows
+                    yield formatted
+                elif hasattr(formatted, "to_batches"):
+                    # Arrow tables are yielded as record batches
+                    yield from formatted.to_batches()
+                else:
+                    yield from formatted
+
+    def copy_to(
+        self, pg_config: PostgresConfig, stream, format="csv", header=True
+    ) -> int:
+        """
+        Writes the result of the query into a file-like object with COPY (...) TO STDOUT,
+        without constructing python rows. Returns the number of rows written.
+        params:
+            pg_config: PostgresConfig | Session The configuration or session for the postgres connection
+            stream: A writable file-like object. Text streams receive str, binary streams receive bytes
+            format: str The COPY format, one of "csv", "text" or "binary"
+            header: bool Write a header line with the column aliases (csv only)
+        """
+        if format not in ("csv", "text", "binary"):
+            raise ValueError(
+                f"Invalid COPY format {format}, expected csv, text or binary"
+            )
+
+        command = self.to_sql(pg_config)
+        params = self.get_params()
+        options: List[sql.Composable] = [sql.SQL("FORMAT {}").format(sql.SQL(format))]
+        if header and format == "csv":
+            options.append(sql.SQL("HEADER"))
+
+        with pg_config.connect_with_cursor() as cursor:
+            # COPY does not accept parameters, so they are bound client side
+            query = cursor.mogrify(command, params or None)
+            copy_sql = sql.SQL("COPY ({query}) TO STDOUT WITH ({options})").format(
+                query=sql.SQL(query.decode(encodings[cursor.connection.encoding])),
+                options=sql.SQL(", ").join(options),
+            )
+            self.logger.debug(copy_sql.as_string(cursor))
+            cursor.copy_expert(copy_sql, stream)
+            return cursor.rowcount
@@ -0,0 +1,122 @@
+"""
+Session that runs many commands on a single connection
+"""
+
+import typing
+from contextlib import contextmanager
+import psycopg2
+
+if typing.TYPE_CHECKING:
+    from sqlark.postgres_config import PostgresConfig
+
+
+class Session:
+    """
+    A unit of work that runs every command on one connection and cursor.
+    A Session is accepted anywhere a PostgresConfig is accepted, and delegates
+    any configuration attribute to the PostgresConfig it was created from.
+
+    example usage:
+
+        with pg_config.session(transactional=True) as session:
+            post = Insert("posts").values({"title": "Post 1"}).execute(session)
+            Select("posts").execute(session)
+
+    When transactional is True the commands share one transaction and snapshot, which is
+    committed when the block exits and rolled back if it raises.
+    Otherwise each command is committed as it runs.
+    """
+
+    def __init__(self, pg_config: "PostgresConfig", transactional: bool = False):
+        self.pg_config = pg_config
+        self.transactional = transactional
+        self._connection: psycopg2.extensions.connection | None = None
+        self._cursor: psycopg2.extensions.cursor | None = None
+
+    def __getattr__(self, name):
+        """
+        Delegate configuration attributes to the PostgresConfig
+        """
+        if name == "pg_config":
+            raise AttributeError(name)
+        return getattr(self.pg_config, name)
+
+    def __enter__(self) -> "Session":
+        if self._connection is not None:
+            raise ValueError("Session is already open")
+
+        if self.pg_config.pooled:
+            self._connection = self.pg_config.pool.getconn()
+        else:
+            self._connection = psycopg2.connect(**self.pg_config.connection_params)
+
+        self._connection.autocommit = not self.transactional
+        self._cursor = self._connection.cursor(
+            cursor_factory=self.pg_config.cursor_factory
+        )
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        connection = self._connection
+        if connection is None:
+            return
+
+        try:
+            if self.transactional and not connection.closed:
+                if exc_type is None:
+                    connection.commit()
+                else:
+                    connection.rollback()
+        finally:
+            if self._cursor is not None and not self._cursor.closed:
+                self._cursor.close()
+            self._cursor = None
+            self._connection = None
+
+            if self.pg_config.pooled:
+                self.pg_config.pool.putconn(connection)
+            else:
+                connection.close()
+
+    @property
+    def is_open(self) -> bool:
+        """Whether the session has been entered and not exited"""
+        return self._connection is not None
+
+    @property
+    def connection(self) -> psycopg2.extensions.connection:
+        """The connection used by the session"""
+        if self._connection is None:
+            raise ValueError("Session is not open")
+        return self._connection
+
+    def commit(self):
+        """Commit the current transaction"""
+        self.connection.commit()
+
+    def rollback(self):
+        """Roll back the current transaction"""
+        self.connection.rollback()
+
+    # pylint: disable=unused-argument
+    @contextmanager
+    def connect_with_cursor(self, transactional=False, name=None):
+        """
+        Yields the session cursor.
+        transactional is ignored, the session decides whether commands run in a transaction.
+        If name is given, a named (server-side) cursor is opened on the session connection instead.
+        Outside of a transaction the named cursor is declared WITH HOLD.
+        """
+        if self._cursor is None:
+            raise ValueError("Session is not open")
+
+        if name is None:
+            yield self._cursor
+            return
+
+        with self.connection.cursor(
+            name=name,
+            cursor_factory=self.pg_config.cursor_factory,
+            withhold=not self.transactional,
+        ) as cursor:
+            yield cursor
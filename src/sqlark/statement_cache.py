@@ -0,0 +1,107 @@
+"""
+Cache of rendered SQL statements, keyed by the shape of the command that built them
+"""
+
+import threading
+import typing
+from collections import OrderedDict
+from typing import Tuple
+from psycopg2 import sql
+from sqlark.schema_cache import SCHEMA_CACHE
+
+if typing.TYPE_CHECKING:
+    from sqlark.postgres_config import PostgresConfig
+
+# The number of statements kept by STATEMENT_CACHE
+STATEMENT_CACHE_SIZE = 1024
+
+
+# pylint: disable=too-many-return-statements
+def composable_key(composable: sql.Composable | None) -> typing.Hashable:
+    """
+    Returns a hashable key of the structure of a composable, without rendering it.
+    Placeholders are part of the key, the parameters they are bound to are not.
+    """
+    if composable is None:
+        return None
+    if isinstance(composable, sql.Composed):
+        return ("C",) + tuple(composable_key(c) for c in composable.seq)
+    if isinstance(composable, sql.SQL):
+        return composable.string
+    if isinstance(composable, sql.Identifier):
+        return ("I",) + composable.strings
+    if isinstance(composable, sql.Placeholder):
+        return ("P", composable.name)
+    if isinstance(composable, sql.Literal):
+        value = composable.wrapped
+        try:
+            hash(value)
+        except TypeError:
+            value = repr(value)
+        return ("L", type(value), value)
+    return (type(composable), repr(composable))
+
+
+class StatementCache:
+    """
+    A least recently used cache of rendered statements.
+
+    The key of a statement combines the fingerprint of its command with the connection identity and schema
+    of the configuration and the schema cache generation, since the columns of a statement are read from
+    the schema cache. Statements of a stale generation are never returned, and age out of the cache.
+    """
+
+    def __init__(self, maxsize: int = STATEMENT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._statements: OrderedDict[Tuple, str] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(pg_config: "PostgresConfig", fingerprint: Tuple) -> Tuple:
+        """
+        The cache key of a command fingerprint for a configuration
+        """
+        return (
+            fingerprint,
+            pg_config.cache_identity,
+            pg_config.schema,
+            SCHEMA_CACHE.generation,
+        )
+
+    def get(self, key: Tuple) -> str | None:
+        """
+        Returns the cached statement, or None if it is missing
+        """
+        with self._lock:
+            statement = self._statements.get(key)
+            if statement is None:
+                self.misses += 1
+                return None
+            self._statements.move_to_end(key)
+            self.hits += 1
+            return statement
+
+    def set(self, key: Tuple, statement: str):
+        """
+        Cache a rendered statement, evicting the least recently used statement when full
+        """
+        with self._lock:
+            self._statements[key] = statement
+            self._statements.move_to_end(key)
+            while len(self._statements) > self.maxsize:
+                self._statements.popitem(last=False)
+
+    def clear(self):
+        """Remove every cached statement"""
+        with self._lock:
+            self._statements.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self):
+        return len(self._statements)
+
+
+STATEMENT_CACHE = StatementCache()
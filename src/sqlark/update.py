@@ -6,6 +6,8 @@ from psycopg2 import sql
 from sqlark.logger import get_logger
 from sqlark.command import SQLCommand
 from sqlark.postgres_config import PostgresConfig
+from sqlark.prepared_statements import execute_statement
+from sqlark.statement_cache import composable_key
 from sqlark.where import Where
 
 logger = get_logger(__name__)
@@ -31,7 +33,7 @@ class Update(SQLCommand):
 
     def set(self, values: dict):
         """
-        Set the columns and values to update
+        Set the columns and values to update. The values are bound as parameters, see get_params.
         params:
             values: list The values to update
         """
@@ -39,7 +41,7 @@ class Update(SQLCommand):
             self._values = {}
 
         for column, value in values.items():
-            self._values[column] = sql.Literal(value)
+            self._values[column] = (sql.Placeholder(), value)
 
         return self
 
@@ -49,8 +51,11 @@ class Update(SQLCommand):
         """
         if self._values is None:
             self._values = {}
-        self._values[column] = sql.SQL("{column} + {value}").format(
-            column=sql.Identifier(column), value=sql.Literal(value)
+        self._values[column] = (
+            sql.SQL("{column} + {value}").format(
+                column=sql.Identifier(column), value=sql.Placeholder()
+            ),
+            value,
         )
         return self
 
@@ -112,7 +117,7 @@ class Update(SQLCommand):
 
         # Construct the set sql
         assignments = [
-            sql.SQL("{}={}").format(sql.Identifier(c), self._values[c])
+            sql.SQL("{}={}").format(sql.Identifier(c), self._values[c][0])
             for c in self.columns
         ]
         set_sql = sql.SQL("SET {}").format(sql.SQL(",").join(assignments))
@@ -129,26 +134,37 @@ class Update(SQLCommand):
         )
         return command
 
-    def get_params(self):
+    def fingerprint(self):
         """
-        Returns the parameters for the where clause
+        Returns the shape of the update for the statement cache
         """
+        where = None if self._where is None else composable_key(self._where.sql)
+        values = tuple((c, composable_key(self._values[c][0])) for c in self.columns)
+        return (type(self), self._table_name, values, where)
 
+    def get_params(self):
+        """
+        Returns the values of the set clause in the order of columns, followed by the parameters for the where clause
+        """
+        params = [self._values[c][1] for c in self.columns]
         if self._where is not None:
-            return self._where.params
+            params.extend(self._where.params)
 
-        return []
+        return params
 
     def execute(self, pg_config: PostgresConfig, transactional=False):
         """
         Executes the command
         params:
-            pg_config: PostgresConfig The configuration for the postgres connection
-            transactional: bool Whether to execute the command in a transaction
+            pg_config: PostgresConfig | Session The configuration or session for the postgres connection
+            transactional: bool Whether to execute the command in a transaction (ignored for a Session)
         """
-        command = self.to_sql(pg_config)
+        key, command = self.compile(pg_config)
 
         with pg_config.connect_with_cursor(transactional=transactional) as cursor:
-            self.logger.debug(command.as_string(cursor))
-            cursor.execute(command, self.get_params())
-            return self._response_formatter(cursor.fetchall(), pg_config, self)
+            command = self.render(key, command, cursor)
+            self.logger.debug(command)
+            execute_statement(cursor, command, self.get_params(), pg_config)
+            return self.format_response(
+                cursor.fetchall(), pg_config, cursor.description
+            )
@@ -2,14 +2,19 @@
 Useful standalone mixins
 """
 
+import threading
+from operator import itemgetter
 from typing import Union, Dict, List, Tuple
 from dataclasses import make_dataclass, dataclass, field, Field
 from datetime import datetime
 from psycopg2 import sql
 from sqlark.postgres_config import PostgresConfig
 from sqlark.column_definition import ColumnDefinition
+from sqlark.schema_cache import SCHEMA_CACHE
 
-TABLE_COLUMN_CACHE: Dict = {}
+# Dataclasses built by build_dataclasses, keyed by the signature of their column definitions
+DATACLASS_CACHE: Dict[Tuple, Dict[str, type]] = {}
+_dataclass_cache_lock = threading.Lock()
 
 PYTHON_DATA_TYPE = Union[
     bool,
@@ -70,6 +75,79 @@ def get_columns(table_name, pg_config: PostgresConfig, use_cache=True) -> list[s
     return [c.name for c in columns]
 
 
+def fetch_dicts(cursor) -> List[Dict]:
+    """
+    Fetches the remaining rows as dictionaries, whatever the cursor factory of the connection
+    """
+    names = [c[0] for c in cursor.description]
+    return [dict(zip(names, row)) for row in cursor.fetchall()]
+
+
+def column_definitions_query(table_filter: sql.Composable) -> sql.Composed:
+    """
+    Returns the catalog query for column definitions of the tables matching table_filter.
+
+    The query reads pg_attribute, pg_type and pg_attrdef directly instead of the much heavier
+    information_schema.columns view, and reports the same data types as information_schema:
+    arrays are "ARRAY", domains report their base type, and other user defined types are "USER-DEFINED".
+    Columns of the primary key are flagged with is_primary_key.
+    Tables in the temporary schemas of other sessions are ignored.
+    """
+    return sql.SQL(
+        """
+        SELECT c.relname AS table_name,
+            a.attname AS name,
+            CASE
+                WHEN bt.typelem <> 0 AND bt.typlen = -1 THEN 'ARRAY'
+                WHEN bn.nspname = 'pg_catalog' THEN format_type(bt.oid, NULL)
+                ELSE 'USER-DEFINED'
+            END AS data_type,
+            NOT (a.attnotnull OR (t.typtype = 'd' AND t.typnotnull)) AS is_nullable,
+            CASE WHEN a.attgenerated = '' THEN pg_get_expr(ad.adbin, ad.adrelid) END AS default,
+            EXISTS (
+                SELECT 1 FROM pg_index i
+                WHERE i.indrelid = a.attrelid AND i.indisprimary AND a.attnum = ANY(i.indkey)
+            ) AS is_primary_key
+        FROM pg_attribute a
+        JOIN pg_class c ON c.oid = a.attrelid
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        JOIN pg_type t ON t.oid = a.atttypid
+        JOIN pg_type bt ON bt.oid = CASE WHEN t.typtype = 'd' THEN t.typbasetype ELSE t.oid END
+        JOIN pg_namespace bn ON bn.oid = bt.typnamespace
+        LEFT JOIN pg_attrdef ad ON ad.adrelid = a.attrelid AND ad.adnum = a.attnum
+        WHERE a.attnum > 0
+            AND NOT a.attisdropped
+            AND c.relkind IN ('r', 'v', 'm', 'f', 'p')
+            AND NOT pg_is_other_temp_schema(n.oid)
+            AND {table_filter}
+        ORDER BY c.relname, a.attnum
+        """
+    ).format(table_filter=table_filter)
+
+
+def scoped_column_definitions_query(
+    pg_config: PostgresConfig, table_filter: sql.Composable, params: list
+) -> Tuple[sql.Composed, list]:
+    """
+    Returns the column definitions query and its params, limited to the schema of pg_config.
+    Without a schema, only the tables visible on the search path are read, which are the tables
+    that unqualified table names in commands resolve to.
+    """
+    if pg_config.schema is None:
+        scope = sql.SQL("pg_table_is_visible(c.oid)")
+        scope_params = []
+    else:
+        scope = sql.SQL("n.nspname = %s")
+        scope_params = [pg_config.schema]
+
+    command = column_definitions_query(
+        sql.SQL("{scope} AND {table_filter}").format(
+            scope=scope, table_filter=table_filter
+        )
+    )
+    return command, scope_params + params
+
+
 def get_column_definitions(
     table_name, pg_config: PostgresConfig, use_cache=True
 ) -> list[ColumnDefinition]:
@@ -77,29 +155,48 @@ def get_column_definitions(
     Retrieves the column definitions of the table.
     """
 
-    if use_cache and table_name in TABLE_COLUMN_CACHE:
-        return TABLE_COLUMN_CACHE[table_name]
+    if use_cache:
+        columns = SCHEMA_CACHE.get(pg_config, table_name)
+        if columns is not None:
+            return columns
 
     try:
-        command = sql.SQL(
-            """
-            SELECT table_name, column_name name, data_type, is_nullable, column_default default
-            FROM information_schema.columns
-            WHERE table_name=%s
-            """
+        command, params = scoped_column_definitions_query(
+            pg_config, sql.SQL("c.relname = %s"), [table_name]
         )
-        params = [table_name]
         with pg_config.connect_with_cursor() as cursor:
             cursor.execute(command, params)
-            result = cursor.fetchall()
+            result = fetch_dicts(cursor)
+
+        return _cache_column_definitions(pg_config, table_name, result)
+
+    except Exception as e:
+        raise ValueError(
+            f"Could not retrieve the fields for {table_name} - {str(e)}"
+        ) from e
 
-        columns = [ColumnDefinition(**v) for v in result]
-        TABLE_COLUMN_CACHE[table_name] = columns
 
-        if len(columns) == 0:
-            raise ValueError(f"Table {table_name} has no columns")
+async def get_column_definitions_async(
+    table_name, pg_config: PostgresConfig, use_cache=True
+) -> list[ColumnDefinition]:
+    """
+    Retrieves the column definitions of the table using the asynchronous connection pool.
+    """
 
-        return columns
+    if use_cache:
+        columns = SCHEMA_CACHE.get(pg_config, table_name)
+        if columns is not None:
+            return columns
+
+    try:
+        command, params = scoped_column_definitions_query(
+            pg_config, sql.SQL("c.relname = %s"), [table_name]
+        )
+        async with pg_config.async_connect_with_cursor() as cursor:
+            await cursor.execute(command, params)
+            result = fetch_dicts(cursor)
+
+        return _cache_column_definitions(pg_config, table_name, result)
 
     except Exception as e:
         raise ValueError(
@@ -107,6 +204,63 @@ def get_column_definitions(
         ) from e
 
 
+def prefetch_schema(
+    pg_config: PostgresConfig, tables: List[str] | None = None
+) -> Dict[str, List[ColumnDefinition]]:
+    """
+    Loads the column definitions of many tables with a single catalog query and caches them,
+    so that building and formatting commands does not query the catalog.
+
+    params:
+        pg_config: PostgresConfig The configuration for the postgres connection
+        tables: list[str] | None The tables to load. Defaults to every table of the schema (or search path)
+            outside of the system schemas.
+    returns:
+        dict[str, list[ColumnDefinition]] The column definitions keyed by table name
+    raises:
+        ValueError: If the column definitions could not be retrieved, or a listed table has no columns
+    """
+    if tables is None:
+        table_filter = sql.SQL("n.nspname NOT IN ('pg_catalog', 'information_schema')")
+        params = []
+    else:
+        table_filter = sql.SQL("c.relname = ANY(%s)")
+        params = [list(tables)]
+
+    command, params = scoped_column_definitions_query(pg_config, table_filter, params)
+
+    try:
+        with pg_config.connect_with_cursor() as cursor:
+            cursor.execute(command, params)
+            result = fetch_dicts(cursor)
+    except Exception as e:
+        raise ValueError(f"Could not prefetch the schema - {str(e)}") from e
+
+    rows_by_table: Dict[str, list] = {t: [] for t in tables or []}
+    for row in result:
+        rows_by_table.setdefault(row["table_name"], []).append(row)
+
+    return {
+        table_name: _cache_column_definitions(pg_config, table_name, rows)
+        for table_name, rows in rows_by_table.items()
+    }
+
+
+def _cache_column_definitions(
+    pg_config: PostgresConfig, table_name, result
+) -> list[ColumnDefinition]:
+    """
+    Constructs the column definitions from the catalog query result and caches them
+    """
+    columns = [ColumnDefinition(**v) for v in result]
+
+    if len(columns) == 0:
+        raise ValueError(f"Table {table_name} has no columns")
+
+    SCHEMA_CACHE.set(pg_config, table_name, columns)
+    return columns
+
+
 def get_columns_composed(
     table_name, pg_config: PostgresConfig, use_cache=True
 ) -> sql.Composed:
@@ -153,6 +307,29 @@ def data_type_to_field_type(data_type: str, is_nullable: bool = True) -> object
     return dtype
 
 
+def hashable_value(value):
+    """
+    Converts lists and dictionaries (i.e. arrays and json columns) to hashable tuples
+    """
+    if isinstance(value, list):
+        return tuple(hashable_value(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, hashable_value(v)) for k, v in value.items()))
+    return value
+
+
+def make_hash_method(fields_to_hash: List[Tuple]):
+    """
+    Generates a hash method, consistent with make_eq_method, that only hashes the fields in fields_to_hash.
+    Array and json values are hashed by their contents.
+    """
+
+    def hash_(self):
+        return hash(tuple(hashable_value(getattr(self, f[0])) for f in fields_to_hash))
+
+    return hash_
+
+
 def make_eq_method(fields_to_compare: List[Tuple]):
     """
     Generates an equality method that only compares the fields in fields_to_compare
@@ -168,19 +345,70 @@ def make_eq_method(fields_to_compare: List[Tuple]):
     return eq
 
 
+def dataclass_signature(class_definitions: Dict[str, list[ColumnDefinition]]) -> Tuple:
+    """
+    Returns a hashable signature of the class definitions, for caching the generated dataclasses.
+    Relations are included, since they are column definitions whose data type is another class.
+    """
+    return tuple(
+        (
+            class_name,
+            tuple(
+                (c.name, c.alias, c.data_type, c.is_nullable, c.default, c.is_list)
+                for c in columns
+            ),
+        )
+        for class_name, columns in class_definitions.items()
+    )
+
+
 def build_dataclasses(
     class_definitions: Dict[str, list[ColumnDefinition]],
+    use_cache: bool = True,
+    slots: bool = False,
+    frozen: bool = False,
 ) -> Dict[str, type]:
     """
     Generate dataclasses given a dictionary of {class_name: column_definitions}
     Returns a dictionary of {class_name: dataclass}
 
+    With use_cache, the same dataclasses are returned for class definitions with the same signature,
+    so that repeated queries do not rebuild them and isinstance checks hold across results.
+
+    With slots, the dataclasses use __slots__ instead of a per-instance __dict__, which uses much less memory
+    for large results. Attributes that are not columns cannot be added to slotted objects.
+    With frozen, attributes cannot be assigned after construction and the objects are hashable
+    by their primitive fields.
+
     This function will construct dataclasses with primitive attributes first.
     Classes with complex datatypes (i.e. another class represented in class_definitions) will only be
     created if their dependencies have been resolved. If a class has a complex data field that cannot be resolved,
     it is deferred until all other classes have been constructed.
     If a class deferred class still cannot be resolved after all other classes are created, then a ValueError is raised.
     """
+    if not use_cache:
+        return _build_dataclasses(class_definitions, slots, frozen)
+
+    signature = (dataclass_signature(class_definitions), slots, frozen)
+    built_classes = DATACLASS_CACHE.get(signature)
+    if built_classes is None:
+        built_classes = _build_dataclasses(class_definitions, slots, frozen)
+        with _dataclass_cache_lock:
+            # Keep the classes of whichever thread built them first
+            built_classes = DATACLASS_CACHE.setdefault(signature, built_classes)
+
+    # Callers may modify the returned dictionary
+    return dict(built_classes)
+
+
+def _build_dataclasses(
+    class_definitions: Dict[str, list[ColumnDefinition]],
+    slots: bool = False,
+    frozen: bool = False,
+) -> Dict[str, type]:
+    """
+    Generate the dataclasses for build_dataclasses
+    """
     complex_classes = []
     built_classes = {}
     # Construct the classes with no complex data fields first
@@ -200,7 +428,11 @@ def build_dataclasses(
             )
             for c in columns
         ]
-        built_classes[class_name] = make_dataclass(class_name.title(), fields)
+        # Hash array and json values by their contents
+        namespace = {"__hash__": make_hash_method(fields)} if frozen else None
+        built_classes[class_name] = make_dataclass(
+            class_name.title(), fields, slots=slots, frozen=frozen, namespace=namespace
+        )
 
     # Construct the classes with complex data fields
     # If a class has a complex data field that cannot be resolved, it is deferred
@@ -256,18 +488,105 @@ def build_dataclasses(
             fields.append(f)  # type: ignore
 
         # Construct a base class with all the fields but no equal method
-        base_dc = make_dataclass(("Base" + class_name.title()), fields, eq=False)
+        base_dc = make_dataclass(
+            ("Base" + class_name.title()), fields, eq=False, slots=slots, frozen=frozen
+        )
 
         # Construct the final dataclass with the equality method
+        namespace = {"__eq__": make_eq_method(base_fields)}
+        if slots:
+            # The fields are slots of the base class, keep the subclass free of a __dict__
+            namespace["__slots__"] = ()
+        if frozen:
+            namespace["__hash__"] = make_hash_method(base_fields)
         built_classes[class_name] = dataclass(
-            type(
-                class_name.title(), (base_dc,), {"__eq__": make_eq_method(base_fields)}
-            )
+            type(class_name.title(), (base_dc,), namespace), frozen=frozen
         )
 
     return built_classes
 
 
+def _tuple_getter(keys: list):
+    """
+    Returns a function that gets the values of keys from a row as a tuple
+    """
+    if len(keys) == 1:
+        key = keys[0]
+        return lambda row: (row[key],)
+    return itemgetter(*keys)
+
+
+class DecodingPlan:
+    """
+    Maps the columns of a result set to (table_name, column_name), so that rows can be decomposed
+    without parsing the "table_name.column_name" keys of every row.
+
+    The plan is built once per result set, from cursor.description or from the keys of the first row.
+    Rows are read by position when they are sequences (tuples, DictRows) and by key when they are dictionaries.
+    """
+
+    def __init__(self, names: List[str], by_key: bool = False):
+        self.names = names
+        self.by_key = by_key
+        table_columns: Dict[str, List[Tuple]] = {}
+        self.plain_columns: List[Tuple] = []
+        for index, name in enumerate(names):
+            key = name if by_key else index
+            if "." in name:
+                table, column = name.split(".", 1)
+                table_columns.setdefault(table, []).append((key, column))
+            else:
+                self.plain_columns.append((key, name))
+        # (table_name, column_names, keys) for each table in the result set
+        self.tables = [
+            (table, [c for _, c in columns], [k for k, _ in columns])
+            for table, columns in table_columns.items()
+        ]
+        self._getters = [
+            (table, columns, _tuple_getter(keys))
+            for table, columns, keys in self.tables
+        ]
+
+    @classmethod
+    def from_result_set(
+        cls, result_set: list, description=None
+    ) -> "DecodingPlan | None":
+        """
+        Returns the plan for a result set, or None if the result set is empty and has no description
+        """
+        if len(result_set) > 0 and isinstance(result_set[0], dict):
+            return cls(list(result_set[0].keys()), by_key=True)
+        if description is not None:
+            return cls([c[0] for c in description])
+        if len(result_set) > 0 and hasattr(result_set[0], "keys"):
+            # A DictRow without the cursor description
+            return cls(list(result_set[0].keys()))
+        return None
+
+    def decompose(self, row) -> Dict[str, Dict]:
+        """
+        Decomposes a row into {table_name: {column_name: value, ...}, ...}, like decompose_row
+        """
+        if not self.by_key and not isinstance(row, tuple):
+            # Indexing a DictRow is slow, copying it to a tuple is not
+            row = tuple(row)
+        result_d: Dict[str, Dict] = {
+            table: dict(zip(columns, getter(row)))
+            for table, columns, getter in self._getters
+        }
+        for key, name in self.plain_columns:
+            result_d[name] = row[key]
+        return result_d
+
+    def to_dict(self, row) -> Dict:
+        """
+        Returns the row as a dictionary keyed by column name
+        """
+        if self.by_key:
+            return dict(row)
+        return dict(zip(self.names, row))
+
+
 def decompose_row(d: dict) -> Dict[str, Dict]:
     """
     Decomposes the keys of a dictionary that have the format "table_name.column_name"
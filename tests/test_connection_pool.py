@@ -0,0 +1,148 @@
+"""
+Unit testing for the connection pool
+"""
+
+import pytest
+import psycopg2
+from sqlark import PostgresConfig, Select
+from sqlark.connection_pool import ConnectionPool
+
+
+def backend_pid(pg_config):
+    with pg_config.connect_with_cursor() as cursor:
+        cursor.execute("SELECT pg_backend_pid()")
+        return cursor.fetchone()[0]
+
+
+def test_pooled_config_reuses_connection():
+    pg_config = PostgresConfig(pooled=True, pool_max_size=2)
+    try:
+        assert backend_pid(pg_config) == backend_pid(pg_config)
+        stats = pg_config.pool_stats()
+        assert stats.connections_created == 1
+        assert stats.checkouts == 2
+        assert stats.size == 1
+        assert stats.idle == 1
+    finally:
+        pg_config.close()
+
+
+def test_unpooled_config_has_no_stats():
+    assert PostgresConfig().pool_stats() is None
+
+
+def test_pooled_execute():
+    pg_config = PostgresConfig(pooled=True)
+    try:
+        for _ in range(3):
+            result = (
+                Select("pg_namespace")
+                .where(column="nspname", operator="=", value="pg_catalog")
+                .execute(pg_config)
+            )
+            assert result[0]["pg_namespace.nspname"] == "pg_catalog"
+        assert pg_config.pool_stats().connections_created == 1
+    finally:
+        pg_config.close()
+
+
+def test_transactional_rollback_on_error():
+    pg_config = PostgresConfig(pooled=True, pool_max_size=1)
+    try:
+        with pytest.raises(psycopg2.Error):
+            with pg_config.connect_with_cursor(transactional=True) as cursor:
+                cursor.execute("SELECT 1/0")
+
+        # The connection was rolled back and can be reused
+        with pg_config.connect_with_cursor(transactional=True) as cursor:
+            cursor.execute("SELECT 1")
+            assert cursor.fetchone()[0] == 1
+        assert pg_config.pool_stats().connections_created == 1
+    finally:
+        pg_config.close()
+
+
+def test_pool_timeout():
+    pool = ConnectionPool(psycopg2.connect, min_size=0, max_size=1, timeout=0.05)
+    connection = pool.getconn()
+    with pytest.raises(TimeoutError):
+        pool.getconn()
+    assert pool.stats.waits == 1
+    assert pool.stats.timeouts == 1
+    pool.putconn(connection)
+    pool.close()
+
+
+def test_health_check_replaces_closed_connection():
+    pool = ConnectionPool(psycopg2.connect, max_size=1)
+    connection = pool.getconn()
+    pool.putconn(connection)
+    connection.close()
+
+    replacement = pool.getconn()
+    assert replacement is not connection
+    assert not replacement.closed
+    pool.putconn(replacement)
+    assert pool.stats.connections_created == 2
+    assert pool.stats.connections_closed == 1
+    pool.close()
+
+
+def test_broken_connection_fails_health_check():
+    pool = ConnectionPool(psycopg2.connect, max_size=2, check_interval=0)
+    connection = pool.getconn()
+    pool.putconn(connection)
+
+    # Terminate the backend from a second connection
+    with psycopg2.connect() as admin:
+        with admin.cursor() as cursor:
+            cursor.execute(
+                "SELECT pg_terminate_backend(%s)", [connection.get_backend_pid()]
+            )
+    admin.close()
+
+    replacement = pool.getconn()
+    assert replacement is not connection
+    assert pool.stats.health_check_failures == 1
+    pool.putconn(replacement)
+    pool.close()
+
+
+def test_max_lifetime():
+    pool = ConnectionPool(psycopg2.connect, max_size=1, max_lifetime=0)
+    connection = pool.getconn()
+    pool.putconn(connection)
+    assert connection.closed
+    assert pool.stats.size == 0
+    pool.close()
+
+
+def test_idle_timeout_keeps_min_size():
+    pool = ConnectionPool(psycopg2.connect, min_size=1, max_size=3, idle_timeout=0)
+    connections = [pool.getconn() for _ in range(3)]
+    for connection in connections:
+        pool.putconn(connection)
+
+    pool.putconn(pool.getconn())
+    assert pool.stats.size == 1
+    pool.close()
+
+
+def test_recently_used_connection_is_not_checked():
+    pool = ConnectionPool(psycopg2.connect, max_size=1)
+    connection = pool.getconn()
+    pool.putconn(connection)
+
+    # Within check_interval the connection is handed out without a "SELECT 1" round trip,
+    # so a terminated backend is not noticed until the connection is used
+    with psycopg2.connect() as admin:
+        with admin.cursor() as cursor:
+            cursor.execute(
+                "SELECT pg_terminate_backend(%s)", [connection.get_backend_pid()]
+            )
+    admin.close()
+
+    assert pool.getconn() is connection
+    assert pool.stats.health_check_failures == 0
+    pool.putconn(connection, discard=True)
+    pool.close()
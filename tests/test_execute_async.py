@@ -0,0 +1,195 @@
+"""
+Unit testing for execute_async
+"""
+
+import asyncio
+from unittest import mock
+from sqlark import Count, Delete, Insert, PostgresConfig, Select, Update
+from sqlark.response_formatters import RelationFormatter
+
+
+def test_select_execute_async():
+    async def run():
+        pg_config = PostgresConfig()
+        try:
+            return await (
+                Select("pg_namespace")
+                .where(column="nspname", operator="=", value="pg_catalog")
+                .execute_async(pg_config)
+            )
+        finally:
+            await pg_config.close_async()
+
+    result = asyncio.run(run())
+    assert result[0]["pg_namespace.nspname"] == "pg_catalog"
+
+
+def test_concurrent_execute_async_shares_pool():
+    async def run():
+        pg_config = PostgresConfig(pool_max_size=4)
+        try:
+            results = await asyncio.gather(
+                *[
+                    Count("pg_namespace")
+                    .where(column="nspname", operator="=", value="pg_catalog")
+                    .execute_async(pg_config)
+                    for _ in range(40)
+                ]
+            )
+            return results, pg_config.async_pool.stats
+        finally:
+            await pg_config.close_async()
+
+    results, stats = asyncio.run(run())
+    assert all(r == [{"pg_namespace.count": 1}] for r in results)
+    assert stats.checkouts == 40
+    assert stats.connections_created <= 4
+
+
+def test_insert_update_delete_execute_async():
+    async def run():
+        # A single connection so that the temporary table is visible to every command
+        pg_config = PostgresConfig(pool_max_size=1)
+        try:
+            async with pg_config.async_connect_with_cursor() as cursor:
+                await cursor.execute(
+                    "CREATE TEMP TABLE async_posts (id serial primary key, title text)"
+                )
+
+            inserted = await (
+                Insert("async_posts")
+                .values([{"title": f"Post {i}"} for i in range(1500)])
+                .execute_async(pg_config)
+            )
+            updated = await (
+                Update("async_posts")
+                .set({"title": "Updated"})
+                .where(column="id", operator="=", value=1)
+                .respond_with_object()
+                .execute_async(pg_config)
+            )
+            deleted = await (
+                Delete("async_posts")
+                .where(column="id", operator=">", value=10)
+                .execute_async(pg_config)
+            )
+            remaining = await Select("async_posts").execute_async(pg_config)
+            return inserted, updated, deleted, remaining
+        finally:
+            await pg_config.close_async()
+
+    inserted, updated, deleted, remaining = asyncio.run(run())
+    assert len(inserted) == 1500
+    assert inserted[0] == {"id": 1, "title": "Post 0"}
+    assert updated[0].title == "Updated"
+    assert len(deleted) == 1490
+    assert len(remaining) == 10
+
+
+def test_transactional_execute_async_rolls_back():
+    async def run():
+        pg_config = PostgresConfig(pool_max_size=1)
+        try:
+            async with pg_config.async_connect_with_cursor() as cursor:
+                await cursor.execute("CREATE TEMP TABLE async_comments (body text)")
+
+            try:
+                async with pg_config.async_connect_with_cursor(
+                    transactional=True
+                ) as cursor:
+                    await cursor.execute("INSERT INTO async_comments VALUES ('lost')")
+                    raise RuntimeError("abort")
+            except RuntimeError:
+                pass
+
+            return await Count("async_comments").execute_async(pg_config)
+        finally:
+            await pg_config.close_async()
+
+    assert asyncio.run(run()) == [{"async_comments.count": 0}]
+
+
+def test_execute_async_with_tuple_cursor():
+    async def run():
+        pg_config = PostgresConfig(cursor_factory=None)
+        try:
+            return await (
+                Select("pg_namespace")
+                .where(column="nspname", operator="=", value="pg_catalog")
+                .execute_async(pg_config)
+            )
+        finally:
+            await pg_config.close_async()
+
+    result = asyncio.run(run())
+    assert result[0]["pg_namespace.nspname"] == "pg_catalog"
+
+
+def test_selectin_relations_execute_async():
+    def formatter(strategy):
+        return (
+            RelationFormatter(strategy=strategy)
+            .set_relation(
+                "async_rel_posts.comments",
+                "async_rel_comments",
+                foreign_column="post_id",
+            )
+            .set_relation(
+                "async_rel_comments.author",
+                "async_rel_authors",
+                relationship_type="one",
+                local_column="author_id",
+            )
+        )
+
+    async def run():
+        # A single connection so that the temporary tables are visible to every query
+        pg_config = PostgresConfig(pool_max_size=1)
+        try:
+            async with pg_config.async_connect_with_cursor() as cursor:
+                await cursor.execute(
+                    """
+                    CREATE TEMP TABLE async_rel_authors (id integer primary key, name text);
+                    CREATE TEMP TABLE async_rel_posts (id integer primary key, title text);
+                    CREATE TEMP TABLE async_rel_comments (id integer primary key, post_id integer, author_id integer);
+                    INSERT INTO async_rel_authors VALUES (1, 'A'), (2, 'B');
+                    INSERT INTO async_rel_posts VALUES (1, 'P1'), (2, 'P2');
+                    INSERT INTO async_rel_comments VALUES (1, 1, 1), (2, 1, 2), (3, 2, 1);
+                    """
+                )
+
+            joined = await (
+                Select("async_rel_posts")
+                .join(
+                    right_table="async_rel_comments",
+                    right_col="post_id",
+                    type="LEFT OUTER",
+                )
+                .join(
+                    left_table="async_rel_comments",
+                    left_col="author_id",
+                    right_table="async_rel_authors",
+                    right_col="id",
+                    type="LEFT OUTER",
+                )
+                .order_by("id")
+                .respond_with_associated_objects(formatter("join"))
+                .execute_async(pg_config)
+            )
+            # The relations are not loaded with blocking queries
+            with mock.patch.object(
+                RelationFormatter, "select_related", side_effect=AssertionError
+            ):
+                posts = await (
+                    Select("async_rel_posts")
+                    .order_by("id")
+                    .respond_with_associated_objects(formatter("selectin"))
+                    .execute_async(pg_config)
+                )
+            return joined, posts
+        finally:
+            await pg_config.close_async()
+
+    joined, posts = asyncio.run(run())
+    assert posts == joined
+    assert [c.author.name for c in posts[0].comments] == ["A", "B"]
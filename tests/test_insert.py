@@ -2,7 +2,9 @@
 Unit testing for Insert SQLCommand
 """
 
-from sqlark import Insert, PostgresConfig
+import datetime
+import pytest
+from sqlark import Insert, PostgresConfig, Select
 
 
 def test_insert_01(pg_connection):
@@ -81,3 +83,115 @@ def test_insert_04(pg_connection):
         s.to_sql(PostgresConfig()).as_string(pg_connection).strip()
         == 'INSERT INTO "comments" ("author","body") VALUES %s ON CONFLICT ("author","body") DO UPDATE SET "author" = COALESCE(EXCLUDED."author", "comments"."author"),"body" = COALESCE(EXCLUDED."body", "comments"."body") RETURNING *'
     )
+
+
+COPY_TABLE = """
+CREATE TEMP TABLE {} (
+    id integer primary key,
+    title text,
+    tags text[],
+    meta jsonb,
+    created_at timestamp without time zone,
+    published boolean,
+    data bytea,
+    score double precision
+)
+"""
+
+COPY_ROWS = [
+    {
+        "id": 1,
+        "title": 'tab\there\nnew line \\ backslash "quoted"',
+        "tags": ["a", 'b "c"', None],
+        "meta": {"key": ["value", 1]},
+        "created_at": datetime.datetime(2024, 1, 2, 3, 4, 5, 6),
+        "published": True,
+        "data": b"\x00\x01\xff",
+        "score": 1.5,
+    },
+    {"id": 2, "title": None},
+]
+
+
+def select_copied_rows(session, table):
+    return [dict(r) for r in Select(table).order_by("id").execute(session)]
+
+
+def test_insert_copy_text():
+    with PostgresConfig().session() as session:
+        with session.connect_with_cursor() as cursor:
+            cursor.execute(COPY_TABLE.format("copy_text"))
+
+        result = Insert("copy_text").values(COPY_ROWS).copy().execute(session)
+        assert result == []
+
+        rows = select_copied_rows(session, "copy_text")
+        assert rows[0]["copy_text.title"] == COPY_ROWS[0]["title"]
+        assert rows[0]["copy_text.tags"] == ["a", 'b "c"', None]
+        assert rows[0]["copy_text.meta"] == {"key": ["value", 1]}
+        assert rows[0]["copy_text.created_at"] == COPY_ROWS[0]["created_at"]
+        assert rows[0]["copy_text.published"] is True
+        assert bytes(rows[0]["copy_text.data"]) == b"\x00\x01\xff"
+        assert rows[0]["copy_text.score"] == 1.5
+        assert rows[1]["copy_text.title"] is None
+        assert rows[1]["copy_text.tags"] is None
+
+
+def test_insert_copy_binary():
+    with PostgresConfig().session() as session:
+        with session.connect_with_cursor() as cursor:
+            cursor.execute(COPY_TABLE.format("copy_binary").replace("text[]", "text"))
+
+        rows = [dict(r, tags=None) for r in COPY_ROWS]
+        Insert("copy_binary").values(rows).copy(format="binary").execute(session)
+
+        copied = select_copied_rows(session, "copy_binary")
+        assert copied[0]["copy_binary.title"] == COPY_ROWS[0]["title"]
+        assert copied[0]["copy_binary.meta"] == {"key": ["value", 1]}
+        assert copied[0]["copy_binary.created_at"] == COPY_ROWS[0]["created_at"]
+        assert copied[0]["copy_binary.published"] is True
+        assert bytes(copied[0]["copy_binary.data"]) == b"\x00\x01\xff"
+        assert copied[0]["copy_binary.score"] == 1.5
+        assert copied[1]["copy_binary.title"] is None
+
+
+def test_insert_copy_binary_unsupported_type():
+    with PostgresConfig().session() as session:
+        with session.connect_with_cursor() as cursor:
+            cursor.execute("CREATE TEMP TABLE copy_numeric (amount numeric)")
+
+        with pytest.raises(ValueError):
+            Insert("copy_numeric").values({"amount": 1}).copy("binary").execute(session)
+
+
+def test_insert_copy_staged_upsert():
+    with PostgresConfig().session(transactional=True) as session:
+        with session.connect_with_cursor() as cursor:
+            cursor.execute(COPY_TABLE.format("copy_upsert"))
+
+        Insert("copy_upsert").values(COPY_ROWS).copy().execute(session)
+        result = (
+            Insert("copy_upsert")
+            .values([{"id": 2, "title": "updated"}, {"id": 3, "title": "new"}])
+            .on_conflict("id", "update")
+            .copy()
+            .execute(session)
+        )
+        assert sorted((r["id"], r["title"]) for r in result) == [
+            (2, "updated"),
+            (3, "new"),
+        ]
+
+        rows = select_copied_rows(session, "copy_upsert")
+        assert [r["copy_upsert.title"] for r in rows] == [
+            COPY_ROWS[0]["title"],
+            "updated",
+            "new",
+        ]
+
+        # The staging table is dropped
+        with session.connect_with_cursor() as cursor:
+            cursor.execute(
+                "SELECT count(*) FROM pg_class WHERE relname LIKE 'sqlark_staging_%%'"
+            )
+            assert cursor.fetchone()[0] == 0
@@ -0,0 +1,104 @@
+"""
+Unit testing for server-side prepared statements
+"""
+
+from unittest import mock
+from sqlark import PostgresConfig, Select, Count, Update, Delete
+from sqlark.column_definition import ColumnDefinition
+from sqlark.schema_cache import SCHEMA_CACHE
+from sqlark.prepared_statements import numbered_placeholders, connection_statements
+
+COLUMNS = [
+    ColumnDefinition(table_name="posts", name="id", data_type="integer"),
+    ColumnDefinition(table_name="posts", name="title", data_type="text"),
+]
+
+
+def prepared_statements(session):
+    """The statements prepared on the connection of a session"""
+    with session.connect_with_cursor() as cursor:
+        cursor.execute("SELECT statement FROM pg_prepared_statements ORDER BY name")
+        return [row[0] for row in cursor.fetchall()]
+
+
+def test_numbered_placeholders():
+    assert numbered_placeholders(
+        "SELECT * FROM t WHERE a = %s AND b LIKE 'x%%' LIMIT %s"
+    ) == (
+        "SELECT * FROM t WHERE a = $1 AND b LIKE 'x%' LIMIT $2",
+        2,
+    )
+    assert numbered_placeholders("SELECT * FROM t") == ("SELECT * FROM t", 0)
+    assert numbered_placeholders("SELECT * FROM t WHERE a = %(a)s") is None
+
+
+@mock.patch("sqlark.utilities.get_column_definitions", return_value=COLUMNS)
+def test_statements_are_prepared_after_threshold(_):
+    pg_config = PostgresConfig(prepare_threshold=2)
+    with pg_config.session() as session:
+        with session.connect_with_cursor() as cursor:
+            cursor.execute(
+                "CREATE TEMP TABLE posts (id integer, title text);"
+                "INSERT INTO posts VALUES (1, 'a'), (2, 'b')"
+            )
+
+        def select(post_id):
+            return Select("posts").where(column="id", operator="=", value=post_id)
+
+        assert select(1).execute(session) == [{"posts.id": 1, "posts.title": "a"}]
+        assert not prepared_statements(session)
+        assert select(2).execute(session) == [{"posts.id": 2, "posts.title": "b"}]
+        assert len(prepared_statements(session)) == 1
+
+        # The prepared statement runs with the parameters of each command
+        assert select(1).execute(session) == [{"posts.id": 1, "posts.title": "a"}]
+        for _ in range(2):
+            assert Count("posts").execute(session) == [{"posts.count": 2}]
+            Update("posts").set({"title": "c"}).where(
+                column="id", operator="=", value=2
+            ).execute(session)
+        Delete("posts").where(column="id", operator="=", value=3).execute(session)
+        assert len(prepared_statements(session)) == 3
+        assert select(2).execute(session) == [{"posts.id": 2, "posts.title": "c"}]
+
+        # A schema change deallocates every prepared statement
+        SCHEMA_CACHE.invalidate(pg_config, "posts")
+        select(1).execute(session)
+        assert not prepared_statements(session)
+
+
+@mock.patch("sqlark.utilities.get_column_definitions", return_value=COLUMNS)
+def test_least_recently_used_statements_are_deallocated(_):
+    pg_config = PostgresConfig(prepare_threshold=1, prepared_statements_size=2)
+    with pg_config.session() as session:
+        with session.connect_with_cursor() as cursor:
+            cursor.execute("CREATE TEMP TABLE posts (id integer, title text)")
+
+        Select("posts").execute(session)
+        Select("posts").limit(1).execute(session)
+        Select("posts").execute(session)
+        Select("posts").offset(1).execute(session)
+
+        statements = prepared_statements(session)
+        assert len(statements) == 2
+        assert not any("LIMIT" in statement for statement in statements)
+
+
+@mock.patch("sqlark.utilities.get_column_definitions", return_value=COLUMNS)
+def test_unpreparable_statement_in_transaction(_):
+    pg_config = PostgresConfig(prepare_threshold=1, statement_cache=False)
+    with pg_config.session(transactional=True) as session:
+        with session.connect_with_cursor() as cursor:
+            cursor.execute(
+                "CREATE TEMP TABLE posts (id integer, title text);"
+                "INSERT INTO posts VALUES (1, 'a')"
+            )
+            statements = connection_statements(cursor.connection)
+
+        # Only SELECT, INSERT, UPDATE, DELETE, MERGE and VALUES statements can be prepared
+        with mock.patch.object(Select, "to_sql", return_value="SHOW search_path"):
+            Select("posts").respond_with_tuples().execute(session)
+            assert "SHOW search_path" in statements.unpreparable
+
+        # The failed PREPARE did not abort the transaction
+        assert Select("posts").execute(session) == [{"posts.id": 1, "posts.title": "a"}]
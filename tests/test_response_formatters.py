@@ -1,13 +1,17 @@
 import datetime
 from dataclasses import asdict
 from unittest import mock
+import pytest
 from pytest import mark
 from dataclasses import dataclass
-from sqlark import Select, Count
+from sqlark import Select, Count, PostgresConfig, Where
 from sqlark.utilities import ColumnDefinition
 from sqlark.response_formatters import (
     decompose_dict_response_formatter,
     object_response_formatter,
+    arrow_response_formatter,
+    columns_response_formatter,
+    accepts_description,
     RelationFormatter,
 )
 
@@ -467,3 +471,308 @@ def test_empty_relation(_):
     assert formatted_response[0].id == 1
     assert formatted_response[0].title == "Post 1"
     assert formatted_response[0].comments == []
+
+
+@mock.patch(
+    "sqlark.select.Select.get_column_definitions",
+    side_effect=lambda pg_config: {
+        t: c
+        for t, c in column_defs_side_effect(pg_config).items()
+        if t in ("posts", "authors")
+    },
+)
+def test_formatters_reuse_classes(_):
+    result_set = [
+        {
+            "posts": {"id": 1, "title": "Post 1"},
+            "authors": {"id": 1, "name": "Author 1"},
+        }
+    ]
+    command = Select("posts").join(
+        right_table="authors", left_col="author_id", right_col="id"
+    )
+    first = object_response_formatter(
+        [
+            {
+                "posts.id": 1,
+                "posts.title": "Post 1",
+                "authors.id": 2,
+                "authors.name": "A",
+            }
+        ],
+        mock.Mock(),
+        command,
+    )
+    second = object_response_formatter(
+        [
+            {
+                "posts.id": 3,
+                "posts.title": "Post 3",
+                "authors.id": 4,
+                "authors.name": "B",
+            }
+        ],
+        mock.Mock(),
+        command,
+    )
+    assert type(first[0]) is type(second[0])
+    assert type(first[0].posts) is type(second[0].posts)
+
+    relation_formatter = RelationFormatter().set_relation(
+        "posts.author", "authors", relationship_type="one"
+    )
+    first = relation_formatter.format(result_set, None, Select("posts"))
+    second = relation_formatter.format(result_set, None, Select("posts"))
+    assert type(first[0]) is type(second[0])
+    assert isinstance(second[0].author, type(first[0].author))
+
+
+@mock.patch(
+    "sqlark.command.SQLCommand.get_column_definitions",
+    side_effect=column_defs_side_effect,
+)
+def test_relation_formatter_slots_frozen(_):
+    relation_formatter = RelationFormatter(slots=True, frozen=True)
+    relation_formatter.set_relation("posts.comments", "comments")
+    relation_formatter.set_relation(
+        "comments.author", "authors", relationship_type="one"
+    )
+    result_set = [
+        {
+            "posts": {"id": 1, "title": "Post 1"},
+            "comments": {"id": 1, "post_id": 1, "author_id": 1, "comment": "Comment 1"},
+            "authors": {"id": 1, "name": "Author 1"},
+        },
+        {
+            "posts": {"id": 1, "title": "Post 1"},
+            "comments": {"id": 2, "post_id": 1, "author_id": 1, "comment": "Comment 2"},
+            "authors": {"id": 1, "name": "Author 1"},
+        },
+    ]
+    formatted_response = relation_formatter.format(result_set, None, Select("posts"))
+    assert len(formatted_response) == 1
+    post = formatted_response[0]
+    assert not hasattr(post, "__dict__")
+    assert [c.comment for c in post.comments] == ["Comment 1", "Comment 2"]
+    assert post.comments[1].author.name == "Author 1"
+    assert asdict(post)["comments"][0]["author"] == {"id": 1, "name": "Author 1"}
+
+
+@mock.patch(
+    "sqlark.command.SQLCommand.get_column_definitions",
+    side_effect=column_defs_side_effect,
+)
+def test_relation_formatter_declared_primary_key(_):
+    relation_formatter = (
+        RelationFormatter()
+        .set_relation("posts.comments", "comments")
+        .set_primary_key("posts", "id")
+    )
+    # Rows that only differ in non-key columns are the same object
+    result_set = [
+        {
+            "posts": {"id": 1, "title": "Post 1"},
+            "comments": {"id": 1, "post_id": 1, "author_id": 1, "comment": "C1"},
+        },
+        {
+            "posts": {"id": 1, "title": "Post 1 (edited)"},
+            "comments": {"id": 2, "post_id": 1, "author_id": 1, "comment": "C2"},
+        },
+    ]
+    formatted_response = relation_formatter.format(result_set, None, Select("posts"))
+    assert len(formatted_response) == 1
+    assert formatted_response[0].title == "Post 1"
+    assert [c.id for c in formatted_response[0].comments] == [1, 2]
+
+
+def test_relation_formatter_detects_primary_keys():
+    with PostgresConfig().session() as session:
+        with session.connect_with_cursor() as cursor:
+            cursor.execute(
+                """
+                CREATE TEMP TABLE map_posts (id integer primary key, tags jsonb);
+                CREATE TEMP TABLE map_comments (
+                    id integer primary key, post_id integer, body text
+                );
+                CREATE TEMP TABLE map_likes (id integer primary key, post_id integer);
+                INSERT INTO map_posts VALUES (1, '{"a": [1, 2]}'), (2, NULL);
+                INSERT INTO map_comments VALUES (1, 1, 'x'), (2, 1, 'x'), (3, 2, 'y');
+                INSERT INTO map_likes VALUES (1, 1), (2, 1), (3, 1);
+                """
+            )
+
+        relation_formatter = (
+            RelationFormatter()
+            .set_relation("map_posts.map_comments", "map_comments")
+            .set_relation("map_posts.map_likes", "map_likes")
+        )
+        posts = (
+            Select("map_posts")
+            .join(right_table="map_comments", right_col="post_id", type="LEFT OUTER")
+            .join(right_table="map_likes", right_col="post_id", type="LEFT OUTER")
+            .order_by("id", table="map_posts")
+            .respond_with_associated_objects(relation_formatter)
+            .execute(session)
+        )
+
+    assert [p.id for p in posts] == [1, 2]
+    assert posts[0].tags == {"a": [1, 2]}
+    # The comment x like product is not repeated in the relations
+    assert sorted(c.id for c in posts[0].map_comments) == [1, 2]
+    assert sorted(like.id for like in posts[0].map_likes) == [1, 2, 3]
+    assert [c.id for c in posts[1].map_comments] == [3]
+    assert posts[1].map_likes == []
+
+
+def test_columns_response_formatter():
+    np = pytest.importorskip("numpy")
+    with PostgresConfig().session() as session:
+        with session.connect_with_cursor() as cursor:
+            cursor.execute(
+                """
+                CREATE TEMP TABLE column_posts (
+                    id integer, score numeric, views bigint, published boolean,
+                    created_at timestamptz, day date, title text, tags text[]
+                );
+                INSERT INTO column_posts VALUES
+                    (1, 1.5, 10, true, '2024-01-01 00:00:00+02', '2024-01-01', 'a', '{x}'),
+                    (2, NULL, NULL, false, NULL, NULL, NULL, NULL);
+                """
+            )
+        columns = (
+            Select("column_posts")
+            .order_by("id")
+            .respond_with_columns()
+            .execute(session)
+        )
+        count = Count("column_posts").respond_with_columns().execute(session)
+
+    assert list(columns) == [
+        "column_posts.id",
+        "column_posts.score",
+        "column_posts.views",
+        "column_posts.published",
+        "column_posts.created_at",
+        "column_posts.day",
+        "column_posts.title",
+        "column_posts.tags",
+    ]
+    assert columns["column_posts.id"].dtype == np.int64
+    assert columns["column_posts.id"].tolist() == [1, 2]
+    assert columns["column_posts.score"].dtype == np.float64
+    assert np.isnan(columns["column_posts.score"][1])
+    # Integers with NULLs are floats
+    assert columns["column_posts.views"].dtype == np.float64
+    assert columns["column_posts.published"].dtype == np.bool_
+    assert columns["column_posts.created_at"][0] == np.datetime64("2023-12-31T22:00")
+    assert np.isnat(columns["column_posts.created_at"][1])
+    assert columns["column_posts.day"].dtype == np.dtype("datetime64[D]")
+    assert columns["column_posts.title"].tolist() == ["a", None]
+    assert columns["column_posts.tags"][0] == ["x"]
+    assert count["column_posts.count"].tolist() == [2]
+
+
+def test_columns_response_formatter_empty():
+    pytest.importorskip("numpy")
+    assert columns_response_formatter([]) == {}
+    columns = columns_response_formatter([], description=[("posts.id",)])
+    assert len(columns["posts.id"]) == 0
+
+
+def test_arrow_response_formatter():
+    pa = pytest.importorskip("pyarrow")
+    with PostgresConfig().session() as session:
+        with session.connect_with_cursor() as cursor:
+            cursor.execute(
+                """
+                CREATE TEMP TABLE arrow_posts (
+                    id integer, score numeric, published boolean,
+                    created_at timestamptz, title text, meta jsonb, tags text[]
+                );
+                INSERT INTO arrow_posts VALUES
+                    (1, 1.5, true, '2024-01-01 00:00:00+02', 'a', '{"x": 1}', '{x}'),
+                    (2, NULL, NULL, NULL, NULL, NULL, NULL);
+                """
+            )
+        table = (
+            Select("arrow_posts").order_by("id").respond_with_arrow().execute(session)
+        )
+        empty = (
+            Select("arrow_posts")
+            .where(Where(table="arrow_posts", column="id", operator="=", value=0))
+            .respond_with_arrow()
+            .execute(session)
+        )
+
+    assert table.schema == pa.schema(
+        [
+            ("arrow_posts.id", pa.int32()),
+            ("arrow_posts.score", pa.float64()),
+            ("arrow_posts.published", pa.bool_()),
+            ("arrow_posts.created_at", pa.timestamp("us", tz="UTC")),
+            ("arrow_posts.title", pa.string()),
+            ("arrow_posts.meta", pa.string()),
+            ("arrow_posts.tags", pa.list_(pa.string())),
+        ]
+    )
+    assert table.column("arrow_posts.score").to_pylist() == [1.5, None]
+    assert table.column("arrow_posts.created_at")[0].as_py() == datetime.datetime(
+        2023, 12, 31, 22, tzinfo=datetime.timezone.utc
+    )
+    assert table.column("arrow_posts.meta").to_pylist() == ['{"x": 1}', None]
+    assert table.column("arrow_posts.tags").to_pylist() == [["x"], None]
+    assert empty.num_rows == 0
+    assert empty.schema.field("arrow_posts.id").type == pa.int32()
+
+
+@mock.patch("sqlark.response_formatters.ARROW_BATCH_SIZE", 2)
+def test_arrow_response_formatter_batches():
+    pytest.importorskip("pyarrow")
+    result_set = [{"posts.id": None}] * 2 + [{"posts.id": 1}]
+    table = arrow_response_formatter(result_set)
+    # The batch of NULLs is promoted to the type inferred from the next batch
+    assert [b.num_rows for b in table.to_batches()] == [2, 1]
+    assert table.column("posts.id").to_pylist() == [None, None, 1]
+    assert arrow_response_formatter([]).num_columns == 0
+
+
+def test_relation_formatter_strategy():
+    with pytest.raises(ValueError):
+        RelationFormatter(strategy="subquery")
+
+    relation_formatter = (
+        RelationFormatter(strategy="lateral")
+        .set_relation("posts.comments", "comments", foreign_column="post_id")
+        .set_relation("comments.author", "authors", relationship_type="one")
+    )
+    assert relation_formatter.relation_keys("posts", "comments") == ("id", "post_id")
+    # The column of a "one" relation on the local table has no default
+    with pytest.raises(ValueError):
+        relation_formatter.relation_keys("comments", "author")
+
+
+def test_formatters_without_description():
+    """
+    Tests that formatters written to the three argument protocol are not passed the cursor description
+    """
+
+    def count_rows(result_set, pg_config=None, command=None):
+        return len(result_set)
+
+    class TitleFormatter(RelationFormatter):
+        def format(self, result_set, pg_config=None, command=None):
+            return [r["pg_namespace.nspname"] for r in result_set]
+
+    assert not accepts_description(count_rows)
+    assert not accepts_description(TitleFormatter().format)
+    assert accepts_description(RelationFormatter().format)
+    assert accepts_description(lambda result_set, **kwargs: result_set)
+
+    select = Select("pg_namespace").where(
+        column="nspname", operator="=", value="pg_catalog"
+    )
+    select._response_formatter = count_rows
+    assert select.execute(PostgresConfig()) == 1
+
+    select.respond_with_associated_objects(TitleFormatter())
+    assert select.execute(PostgresConfig()) == ["pg_catalog"]
@@ -0,0 +1,152 @@
+"""
+Unit testing for the schema cache
+"""
+
+import time
+import psycopg2
+from sqlark import PostgresConfig, Select, utilities
+from sqlark.column_definition import ColumnDefinition
+from sqlark.schema_cache import (
+    SCHEMA_CACHE,
+    SchemaCache,
+    SchemaChangeListener,
+    install_schema_change_trigger,
+    uninstall_schema_change_trigger,
+)
+
+COLUMNS = [ColumnDefinition(table_name="posts", name="id", data_type="integer")]
+
+
+def test_entries_are_scoped_by_database_and_schema():
+    cache = SchemaCache()
+    cache.set(PostgresConfig(dsn="dbname=blog"), "posts", COLUMNS)
+
+    assert cache.get(PostgresConfig(dsn="dbname=blog"), "posts") is COLUMNS
+    assert cache.get(PostgresConfig(dsn="dbname=shop"), "posts") is None
+    assert cache.get(PostgresConfig(dsn="dbname=blog", schema="audit"), "posts") is None
+    assert cache.get(PostgresConfig(dsn="dbname=blog"), "comments") is None
+
+
+def test_entries_expire_after_ttl():
+    cache = SchemaCache()
+    pg_config = PostgresConfig(dsn="dbname=blog", schema_cache_ttl=0.05)
+    cache.set(pg_config, "posts", COLUMNS)
+    assert cache.get(pg_config, "posts") is COLUMNS
+    time.sleep(0.1)
+    assert cache.get(pg_config, "posts") is None
+
+
+def test_invalidate_increments_generation():
+    cache = SchemaCache()
+    blog = PostgresConfig(dsn="dbname=blog")
+    shop = PostgresConfig(dsn="dbname=shop")
+    cache.set(blog, "posts", COLUMNS)
+    cache.set(shop, "posts", COLUMNS)
+    generation = cache.generation
+
+    cache.invalidate(blog, "posts")
+    assert cache.get(blog, "posts") is None
+    assert cache.get(shop, "posts") is COLUMNS
+    assert cache.generation > generation
+
+    # Replacing an entry with the same definitions does not change the generation
+    generation = cache.generation
+    cache.set(shop, "posts", list(COLUMNS))
+    assert cache.generation == generation
+
+
+def test_invalidate_schema_cache_reloads_columns():
+    with PostgresConfig().session() as session:
+        with session.connect_with_cursor() as cursor:
+            cursor.execute("CREATE TEMP TABLE cache_posts (id integer)")
+            columns = utilities.get_columns("cache_posts", session)
+            cursor.execute("ALTER TABLE cache_posts ADD COLUMN title text")
+
+            assert utilities.get_columns("cache_posts", session) == columns
+            session.invalidate_schema_cache("cache_posts")
+            assert utilities.get_columns("cache_posts", session) == ["id", "title"]
+
+
+def test_schema_sets_search_path():
+    pg_config = PostgresConfig(schema="sqlark test")
+    assert "options" in pg_config.connection_params
+
+    with pg_config.session(transactional=True) as session:
+        with session.connect_with_cursor() as cursor:
+            cursor.execute('CREATE SCHEMA "sqlark test"')
+            cursor.execute('CREATE TABLE "sqlark test".scoped_posts (id integer)')
+            cursor.execute("INSERT INTO scoped_posts VALUES (1)")
+            cursor.execute("CREATE TABLE public.scoped_posts (id integer, title text)")
+
+        # The table in the schema is used, not the one in public
+        assert utilities.get_columns("scoped_posts", session) == ["id"]
+        assert Select("scoped_posts").execute(session) == [{"scoped_posts.id": 1}]
+        assert SCHEMA_CACHE.get(PostgresConfig(), "scoped_posts") is None
+        session.rollback()
+
+
+def test_listener_handles_payload():
+    cache = SchemaCache()
+    pg_config = PostgresConfig(dsn="dbname=blog")
+    cache.set(pg_config, "posts", COLUMNS)
+    cache.set(pg_config, "comments", COLUMNS)
+
+    listener = SchemaChangeListener(pg_config, cache=cache)
+    listener.handle("public.posts")
+    assert cache.get(pg_config, "posts") is None
+    assert cache.get(pg_config, "comments") is COLUMNS
+
+    listener.handle("")
+    assert cache.get(pg_config, "comments") is None
+
+
+def wait_for(condition, timeout=5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def test_listener_invalidates_on_ddl():
+    pg_config = PostgresConfig()
+    install_schema_change_trigger(pg_config)
+    listener = pg_config.listen_for_schema_changes(poll_interval=0.05)
+    try:
+        assert listener.listening.wait(5)
+        with pg_config.session() as session:
+            with session.connect_with_cursor() as cursor:
+                cursor.execute("CREATE TEMP TABLE listen_posts (id integer)")
+                utilities.get_columns("listen_posts", session)
+                assert SCHEMA_CACHE.get(session, "listen_posts") is not None
+
+                cursor.execute("ALTER TABLE listen_posts ADD COLUMN title text")
+                assert wait_for(
+                    lambda: SCHEMA_CACHE.get(session, "listen_posts") is None
+                )
+                assert utilities.get_columns("listen_posts", session) == [
+                    "id",
+                    "title",
+                ]
+    finally:
+        listener.stop()
+        uninstall_schema_change_trigger(pg_config)
+
+
+def test_listener_notification_from_other_connection():
+    pg_config = PostgresConfig()
+    cache = SchemaCache()
+    cache.set(pg_config, "posts", COLUMNS)
+    listener = SchemaChangeListener(pg_config, cache=cache, poll_interval=0.05)
+    listener.start()
+    try:
+        assert listener.listening.wait(5)
+        connection = psycopg2.connect(**pg_config.connection_params)
+        connection.autocommit = True
+        with connection, connection.cursor() as cursor:
+            cursor.execute("NOTIFY sqlark_schema_change, 'public.posts'")
+        connection.close()
+        assert wait_for(lambda: cache.get(pg_config, "posts") is None)
+    finally:
+        listener.stop()
@@ -0,0 +1,63 @@
+"""
+Unit testing for schema snapshots
+"""
+
+import json
+from unittest import mock
+import pytest
+from sqlark import PostgresConfig, Select, utilities
+from sqlark.schema_snapshot import (
+    dump_schema_snapshot,
+    load_schema_snapshot,
+    snapshot_checksum,
+)
+
+
+def test_snapshot_round_trip(tmp_path):
+    path = str(tmp_path / "schema.json")
+    snapshot = dump_schema_snapshot(PostgresConfig(), path, ["pg_am", "pg_namespace"])
+    assert list(snapshot["tables"]) == ["pg_am", "pg_namespace"]
+    with open(path, encoding="utf-8") as f:
+        assert json.load(f) == snapshot
+
+    # A configuration that has not read the catalog yet
+    pg_config = PostgresConfig(host="/tmp/sqlark-snapshot-test")
+    loaded = load_schema_snapshot(pg_config, path)
+    assert loaded["pg_am"] == utilities.get_column_definitions(
+        "pg_am", PostgresConfig()
+    )
+
+    with mock.patch.object(
+        PostgresConfig, "connect_with_cursor", side_effect=AssertionError
+    ):
+        Select("pg_namespace").join(
+            right_table="pg_am", left_col="oid", right_col="oid"
+        ).to_sql(pg_config)
+
+
+def test_load_validates_against_live_schema():
+    pg_config = PostgresConfig()
+    snapshot = dump_schema_snapshot(pg_config, tables=["pg_am"])
+    assert load_schema_snapshot(pg_config, snapshot, validate=True).keys() == {"pg_am"}
+
+    snapshot["tables"]["pg_am"].pop()
+    snapshot["checksum"] = snapshot_checksum(snapshot["tables"])
+    assert load_schema_snapshot(pg_config, snapshot, validate=True) == {}
+
+
+@pytest.mark.parametrize(
+    "change",
+    [
+        {"checksum": "0"},
+        {"version": 99},
+        # Exported before primary keys were part of the snapshot
+        {"version": 1},
+        {"schema": "audit"},
+        {"tables": None},
+    ],
+)
+def test_load_rejects_invalid_snapshot(change):
+    snapshot = dump_schema_snapshot(PostgresConfig(), tables=["pg_am"])
+    snapshot.update(change)
+    with pytest.raises(ValueError):
+        load_schema_snapshot(PostgresConfig(), snapshot)
@@ -2,8 +2,15 @@
 Unit testing for Select SQLCommand
 """
 
+import csv
+import datetime
+import decimal
+import json
+import io
+import pytest
 from unittest import mock
-from sqlark import Select, Where, Join, PostgresConfig, ColumnDefinition
+from sqlark import Select, Count, Where, Join, PostgresConfig, ColumnDefinition
+from sqlark.response_formatters import RelationFormatter
 
 
 def mock_column_definitions(*args):
@@ -101,9 +108,9 @@ def test_select_03(patch, pg_connection):
     )
     assert (
         s.to_sql(PostgresConfig()).as_string(pg_connection).strip()
-        == 'SELECT "comments"."author" as "comments.author","comments"."body" as "comments.body" FROM "comments"   WHERE "comments"."author" = %s    LIMIT 10'
+        == 'SELECT "comments"."author" as "comments.author","comments"."body" as "comments.body" FROM "comments"   WHERE "comments"."author" = %s    LIMIT %s'
     )
-    assert s.get_params() == ["Clark Kent"]
+    assert s.get_params() == ["Clark Kent", 10]
 
 
 @mock.patch(
@@ -125,9 +132,9 @@ def test_select_04(patch, pg_connection):
     )
     assert (
         s.to_sql(PostgresConfig()).as_string(pg_connection).strip()
-        == 'SELECT "comments"."author" as "comments.author","comments"."body" as "comments.body" FROM "comments"   WHERE "comments"."author" = %s   OFFSET 5 LIMIT 10'
+        == 'SELECT "comments"."author" as "comments.author","comments"."body" as "comments.body" FROM "comments"   WHERE "comments"."author" = %s   OFFSET %s LIMIT %s'
     )
-    assert s.get_params() == ["Clark Kent"]
+    assert s.get_params() == ["Clark Kent", 5, 10]
 
 
 @mock.patch(
@@ -150,9 +157,9 @@ def test_select_05a(patch, pg_connection):
     )
     assert (
         s.to_sql(PostgresConfig()).as_string(pg_connection).strip()
-        == 'SELECT "comments"."author" as "comments.author","comments"."body" as "comments.body" FROM "comments"   WHERE "comments"."author" = %s ORDER BY "comments"."author" ASC  OFFSET 5 LIMIT 10'
+        == 'SELECT "comments"."author" as "comments.author","comments"."body" as "comments.body" FROM "comments"   WHERE "comments"."author" = %s ORDER BY "comments"."author" ASC  OFFSET %s LIMIT %s'
     )
-    assert s.get_params() == ["Clark Kent"]
+    assert s.get_params() == ["Clark Kent", 5, 10]
 
 
 @mock.patch(
@@ -176,9 +183,9 @@ def test_select_05b(patch, pg_connection):
     )
     assert (
         s.to_sql(PostgresConfig()).as_string(pg_connection).strip()
-        == 'SELECT "comments"."author" as "comments.author","comments"."body" as "comments.body" FROM "comments"   WHERE "comments"."author" = %s ORDER BY "comments"."author" ASC GROUP BY "comments"."author" OFFSET 5 LIMIT 10'
+        == 'SELECT "comments"."author" as "comments.author","comments"."body" as "comments.body" FROM "comments"   WHERE "comments"."author" = %s ORDER BY "comments"."author" ASC GROUP BY "comments"."author" OFFSET %s LIMIT %s'
     )
-    assert s.get_params() == ["Clark Kent"]
+    assert s.get_params() == ["Clark Kent", 5, 10]
 
 
 @mock.patch(
@@ -211,9 +218,9 @@ def test_select_06(patch, pg_connection):
         + '"comments"."body" as "comments.body","other_comments"."id" as "other_comments.id",'
         + '"other_comments"."author" as "other_comments.author","other_comments"."body" as "other_comments.body"'
         + ' FROM "comments" INNER JOIN "other_comments" ON "comments"."id" = "other_comments"."id"'
-        + '   WHERE "comments"."author" = %s ORDER BY "comments"."author" ASC  OFFSET 5 LIMIT 10'
+        + '   WHERE "comments"."author" = %s ORDER BY "comments"."author" ASC  OFFSET %s LIMIT %s'
     )
-    assert s.get_params() == ["Clark Kent"]
+    assert s.get_params() == ["Clark Kent", 5, 10]
 
 
 @mock.patch(
@@ -245,9 +252,9 @@ def test_select_07(patch, pg_connection):
         + '"comments"."body" as "comments.body","other_comments"."id" as "other_comments.id",'
         + '"other_comments"."author" as "other_comments.author","other_comments"."body" as "other_comments.body"'
         + ' FROM "comments" INNER JOIN "other_comments" ON "comments"."id" = "other_comments"."id"'
-        + '   WHERE "comments"."author" = %s ORDER BY "comments"."author" ASC  OFFSET 5 LIMIT 10'
+        + '   WHERE "comments"."author" = %s ORDER BY "comments"."author" ASC  OFFSET %s LIMIT %s'
     )
-    assert s.get_params() == ["Clark Kent"]
+    assert s.get_params() == ["Clark Kent", 5, 10]
 
 
 @mock.patch(
@@ -279,9 +286,9 @@ def test_select_08(patch, pg_connection):
         + '"comments"."body" as "comments.body","other_comments"."id" as "other_comments.id",'
         + '"other_comments"."author" as "other_comments.author","other_comments"."body" as "other_comments.body"'
         + ' FROM "comments" INNER JOIN "other_comments" ON "comments"."id" = "other_comments"."id"'
-        + '   WHERE "comments"."author" = %s ORDER BY "other_comments"."author" ASC  OFFSET 5 LIMIT 10'
+        + '   WHERE "comments"."author" = %s ORDER BY "other_comments"."author" ASC  OFFSET %s LIMIT %s'
     )
-    assert s.get_params() == ["Clark Kent"]
+    assert s.get_params() == ["Clark Kent", 5, 10]
 
 
 @mock.patch(
@@ -514,3 +521,553 @@ def test_select_15(patch, pg_connection):
         + '   WHERE "comments"."author" = %s ORDER BY "comments"."author" ASC, "comments"."body" ASC'
     )
     assert s.get_params() == ["Clark Kent"]
+
+
+def test_select_16(pg_connection):
+    """
+    tests projected columns of the primary and joined tables
+    """
+
+    with PostgresConfig().session() as session:
+        with session.connect_with_cursor() as cursor:
+            for table in ("projected_comments", "projected_authors"):
+                cursor.execute(
+                    f"CREATE TEMP TABLE {table} (id integer, author text, body text)"
+                )
+
+        s = (
+            Select(table_name="projected_comments")
+            .join(right_table="projected_authors", right_col="id")
+            .columns("body", "id")
+            .exclude("body", table="projected_authors")
+        )
+        assert s.to_sql(session).as_string(pg_connection).strip() == (
+            'SELECT "projected_comments"."body" as "projected_comments.body",'
+            + '"projected_comments"."id" as "projected_comments.id",'
+            + '"projected_authors"."id" as "projected_authors.id",'
+            + '"projected_authors"."author" as "projected_authors.author"'
+            + ' FROM "projected_comments" INNER JOIN "projected_authors"'
+            + ' ON "projected_comments"."id" = "projected_authors"."id"'
+        )
+        assert [
+            c.alias for c in s.get_column_definitions(session)["projected_comments"]
+        ] == ["projected_comments.body", "projected_comments.id"]
+
+        with pytest.raises(ValueError, match="do not exist in projected_comments"):
+            Select("projected_comments").columns("title").to_sql(session)
+        with pytest.raises(ValueError, match="No columns are selected"):
+            Select("projected_comments").exclude("id", "author", "body").to_sql(session)
+        with pytest.raises(ValueError, match="Table projected_authors is not selected"):
+            Select("projected_comments").columns(
+                "id", table="projected_authors"
+            ).to_sql(session)
+        with pytest.raises(ValueError, match="Table projected_authors is not selected"):
+            Select("projected_comments").exclude(
+                "author", table="projected_authors"
+            ).to_sql(session)
+
+
+def test_iter_execute(pg_connection):
+    """
+    Tests streaming a select with a server-side cursor
+    """
+    pg_config = PostgresConfig()
+
+    # Types of the catalog, the row types of temporary tables come and go with other connections
+    def select(command):
+        return command.where(column="typnamespace", operator="=", value=11)
+
+    count = select(Count("pg_type")).execute(pg_config)[0]["pg_type.count"]
+    rows = list(select(Select("pg_type")).iter_execute(pg_config, batch_size=100))
+    assert len(rows) == count
+    assert "pg_type.typname" in rows[0]
+
+
+def test_iter_execute_batches_in_session():
+    """
+    Tests that iter_execute fetches lazily in batches through a named cursor
+    """
+    for transactional in (True, False):
+        with PostgresConfig().session(transactional=transactional) as session:
+            with session.connect_with_cursor() as cursor:
+                cursor.execute(
+                    "CREATE TEMP TABLE stream_rows AS SELECT generate_series(1, 2500) id"
+                )
+
+            batches = Select("stream_rows").iter_execute(
+                session, batch_size=1000, batches=True
+            )
+            first = next(batches)
+            with session.connect_with_cursor() as cursor:
+                cursor.execute(
+                    "SELECT count(*) FROM pg_cursors WHERE name LIKE 'sqlark_%%'"
+                )
+                assert cursor.fetchone()[0] == 1
+
+            assert [len(first)] + [len(b) for b in batches] == [1000, 1000, 500]
+            assert first[0] == {"stream_rows.id": 1}
+
+
+def test_copy_to_csv():
+    """
+    Tests exporting a select with COPY TO
+    """
+    stream = io.StringIO()
+    count = (
+        Select("pg_namespace")
+        .where(column="nspname", operator="=", value="pg_catalog")
+        .copy_to(PostgresConfig(), stream)
+    )
+    assert count == 1
+    lines = list(csv.reader(io.StringIO(stream.getvalue())))
+    assert "pg_namespace.nspname" in lines[0]
+    assert lines[1][lines[0].index("pg_namespace.nspname")] == "pg_catalog"
+
+
+def test_copy_to_binary():
+    """
+    Tests exporting a select with COPY TO in the binary format
+    """
+    stream = io.BytesIO()
+    count = (
+        Select("pg_am")
+        .where(column="amname", operator="LIKE", value="b%")
+        .copy_to(PostgresConfig(), stream, format="binary")
+    )
+    assert count >= 2
+    assert stream.getvalue().startswith(b"PGCOPY\n\xff\r\n\x00")
+
+
+def test_respond_with_projected_columns():
+    with PostgresConfig().session() as session:
+        with session.connect_with_cursor() as cursor:
+            cursor.execute(
+                "CREATE TEMP TABLE projected_posts (id integer, title text, body jsonb);"
+                "INSERT INTO projected_posts VALUES (1, 'Post 1', '{\"text\": \"long\"}')"
+            )
+
+        select = Select("projected_posts").columns("id", "title")
+        assert select.execute(session) == [
+            {"projected_posts.id": 1, "projected_posts.title": "Post 1"}
+        ]
+        assert select.respond_with_decomposed_dict().execute(session) == [
+            {"projected_posts": {"id": 1, "title": "Post 1"}}
+        ]
+
+        post = select.respond_with_object().execute(session)[0]
+        assert (post.id, post.title) == (1, "Post 1")
+        assert not hasattr(post, "body")
+        full = Select("projected_posts").respond_with_object().execute(session)[0]
+        assert full.body == {"text": "long"}
+        assert type(full) is not type(post)
+
+        post = (
+            Select("projected_posts")
+            .exclude("body")
+            .respond_with_object()
+            .execute(session)[0]
+        )
+        assert type(post).__dataclass_fields__.keys() == {"id", "title"}
+
+
+@pytest.mark.parametrize("slots,frozen", [(False, False), (True, True)])
+def test_deferred_columns(slots, frozen):
+    with PostgresConfig().session() as session:
+        with session.connect_with_cursor() as cursor:
+            cursor.execute(
+                "CREATE TEMP TABLE deferred_posts (id integer primary key, title text, body text, data bytea);"
+                "CREATE TEMP TABLE deferred_comments (id integer, post_id integer, body text);"
+                "INSERT INTO deferred_posts VALUES (1, 'Post 1', 'Body 1', 'a'), (2, 'Post 2', 'Body 2', NULL);"
+                "INSERT INTO deferred_comments VALUES (1, 1, 'Comment 1'), (2, 1, 'Comment 2')"
+            )
+
+        posts = (
+            Select("deferred_posts")
+            .defer("body", "data")
+            .order_by("id")
+            .respond_with_object(slots=slots, frozen=frozen)
+            .execute(session)
+        )
+        assert [p.title for p in posts] == ["Post 1", "Post 2"]
+        assert "body" not in repr(posts[0])
+
+        select_related = RelationFormatter.select_related
+        with mock.patch.object(
+            RelationFormatter, "select_related", side_effect=select_related
+        ) as query:
+            assert [p.body for p in posts] == ["Body 1", "Body 2"]
+            assert query.call_count == 1
+            assert query.call_args.kwargs["columns"] == ["id", "body"]
+            assert bytes(posts[0].data) == b"a" and posts[1].data is None
+            assert query.call_count == 2
+
+        # Deferred columns of a joined table
+        rows = (
+            Select("deferred_comments")
+            .join(right_table="deferred_posts", left_col="post_id", right_col="id")
+            .defer("body", table="deferred_posts")
+            .order_by("id")
+            .respond_with_object(slots=slots, frozen=frozen)
+            .execute(session)
+        )
+        assert [r.deferred_posts.body for r in rows] == ["Body 1", "Body 1"]
+        assert rows[0].deferred_comments.body == "Comment 1"
+
+        with pytest.raises(ValueError, match="must be selected to defer columns"):
+            Select("deferred_posts").columns("title").defer(
+                "body"
+            ).respond_with_object().execute(session)
+
+
+def test_deferred_columns_after_session():
+    """
+    Tests that deferred columns are loaded through the configuration once the session exited
+    """
+    # The temporary table lives on the only connection of the pool
+    pg_config = PostgresConfig(pooled=True, pool_max_size=1)
+    try:
+        with pg_config.session() as session:
+            with session.connect_with_cursor() as cursor:
+                cursor.execute(
+                    "CREATE TEMP TABLE session_deferred_posts (id integer primary key, body text);"
+                    "INSERT INTO session_deferred_posts VALUES (1, 'Body 1')"
+                )
+            posts = (
+                Select("session_deferred_posts")
+                .defer("body")
+                .respond_with_object()
+                .execute(session)
+            )
+
+        assert posts[0].body == "Body 1"
+    finally:
+        pg_config.close()
+
+
+def test_respond_with_slotted_object():
+    with PostgresConfig().session() as session:
+        with session.connect_with_cursor() as cursor:
+            cursor.execute("CREATE TEMP TABLE slotted_posts (id integer, title text)")
+            cursor.execute("INSERT INTO slotted_posts VALUES (1, 'Post 1')")
+
+        select = Select("slotted_posts").respond_with_object(slots=True, frozen=True)
+        result = select.execute(session)
+        assert result[0].title == "Post 1"
+        assert not hasattr(result[0], "__dict__")
+        assert hash(result[0]) == hash(select.execute(session)[0])
+        assert type(result[0]) is type(select.execute(session)[0])
+
+
+@pytest.mark.parametrize(
+    "respond",
+    [
+        lambda s: s,
+        lambda s: s.respond_with_tuples(),
+        lambda s: s.respond_with_decomposed_dict(),
+        lambda s: s.respond_with_object(),
+        lambda s: s.respond_with_associated_objects(
+            RelationFormatter().set_relation("tuple_posts.comments", "tuple_comments")
+        ),
+    ],
+)
+def test_tuple_cursor_matches_dict_cursor(respond):
+    """
+    Every formatter returns the same result from a plain tuple cursor
+    """
+    results = []
+    for cursor_factory in (PostgresConfig().cursor_factory, None):
+        with PostgresConfig(cursor_factory=cursor_factory).session() as session:
+            with session.connect_with_cursor() as cursor:
+                cursor.execute(
+                    """
+                    CREATE TEMP TABLE tuple_posts (id integer primary key, title text);
+                    CREATE TEMP TABLE tuple_comments (id integer, post_id integer);
+                    INSERT INTO tuple_posts VALUES (1, 'Post 1'), (2, 'Post 2');
+                    INSERT INTO tuple_comments VALUES (1, 1), (2, 1);
+                    """
+                )
+            select = respond(
+                Select("tuple_posts")
+                .join(
+                    right_table="tuple_comments", right_col="post_id", type="LEFT OUTER"
+                )
+                .order_by("id", table="tuple_posts")
+            )
+            results.append(select.execute(session))
+            results.append(list(select.iter_execute(session, batch_size=1)))
+
+    assert results[0] == results[2]
+    assert results[1] == results[3]
+    assert len(results[0]) > 0
+
+
+def test_respond_with_tuples():
+    with PostgresConfig(cursor_factory=None).connect_with_cursor() as cursor:
+        cursor.execute("SELECT 1")
+        assert type(cursor.fetchone()) is tuple
+
+    result = (
+        Select("pg_namespace")
+        .where(column="nspname", operator="=", value="pg_catalog")
+        .respond_with_tuples()
+        .execute(PostgresConfig(cursor_factory=None))
+    )
+    assert type(result[0]) is tuple
+    assert "pg_catalog" in result[0]
+
+
+def test_iter_execute_record_batches():
+    """
+    Tests that a streaming select responding with arrow yields record batches
+    """
+    pa = pytest.importorskip("pyarrow")
+    with PostgresConfig().session() as session:
+        with session.connect_with_cursor() as cursor:
+            cursor.execute(
+                "CREATE TEMP TABLE arrow_rows AS SELECT generate_series(1, 2500) id"
+            )
+        batches = list(
+            Select("arrow_rows")
+            .respond_with_arrow()
+            .iter_execute(session, batch_size=1000)
+        )
+
+    assert [b.num_rows for b in batches] == [1000, 1000, 500]
+    assert isinstance(batches[0], pa.RecordBatch)
+    assert pa.Table.from_batches(batches).column("arrow_rows.id")[-1].as_py() == 2500
+
+
+def test_iter_execute_column_batches():
+    """
+    Tests that a streaming select responding with columns yields a dictionary of arrays per batch
+    """
+    np = pytest.importorskip("numpy")
+    with PostgresConfig().session() as session:
+        with session.connect_with_cursor() as cursor:
+            cursor.execute(
+                "CREATE TEMP TABLE column_rows AS SELECT generate_series(1, 2500) id"
+            )
+        batches = list(
+            Select("column_rows")
+            .respond_with_columns()
+            .iter_execute(session, batch_size=1000)
+        )
+
+    assert [len(b["column_rows.id"]) for b in batches] == [1000, 1000, 500]
+    assert isinstance(batches[0]["column_rows.id"], np.ndarray)
+    assert np.concatenate([b["column_rows.id"] for b in batches])[-1] == 2500
+
+
+def test_respond_with_json():
+    """
+    Tests that the JSON encoded by the server has the shape of the python formatters
+    """
+    with PostgresConfig().session() as session:
+        with session.connect_with_cursor() as cursor:
+            cursor.execute(
+                """
+                CREATE TEMP TABLE json_posts (id integer, title text, published boolean);
+                CREATE TEMP TABLE json_comments (id integer, post_id integer, body text);
+                INSERT INTO json_posts VALUES (1, 'a', true), (2, 'b', NULL);
+                INSERT INTO json_comments VALUES (1, 1, 'x'), (2, 1, 'y');
+                """
+            )
+
+        def select():
+            return (
+                Select("json_posts")
+                .join(
+                    right_table="json_comments", right_col="post_id", type="LEFT OUTER"
+                )
+                .order_by("id")
+            )
+
+        flat = select().respond_with_json().execute(session)
+        decomposed = select().respond_with_json(decomposed=True).execute(session)
+        lines = select().respond_with_json(lines=True).execute(session)
+        chunks = list(
+            select().respond_with_json(lines=True).iter_execute(session, batch_size=2)
+        )
+        empty = (
+            Select("json_posts")
+            .where(table="json_posts", column="id", operator="=", value=0)
+            .respond_with_json()
+            .execute(session)
+        )
+
+        assert json.loads(flat) == select().execute(session)
+        assert json.loads(
+            decomposed
+        ) == select().respond_with_decomposed_dict().execute(session)
+
+    assert isinstance(flat, str)
+    assert [json.loads(line) for line in lines.splitlines()] == json.loads(flat)
+    assert "".join(chunks) == lines
+    assert len(chunks) == 2
+    assert empty == "[]"
+
+
+RELATION_TABLES = """
+CREATE TEMP TABLE rel_authors (id integer primary key, name text, joined timestamptz);
+CREATE TEMP TABLE rel_posts (id integer primary key, title text, score numeric, created date);
+CREATE TEMP TABLE rel_comments (
+    id integer primary key, post_id integer, author_id integer, body text, at timestamp
+);
+INSERT INTO rel_authors VALUES (1, 'A', '2024-01-01 10:00:00.5+02'), (2, 'B', NULL);
+INSERT INTO rel_posts VALUES (1, 'P1', 1.25, '2024-02-01'), (2, 'P2', NULL, NULL), (3, 'P3', 3, NULL);
+INSERT INTO rel_comments VALUES
+    (1, 1, 1, 'x', '2024-01-01 00:00:00.123'), (2, 1, 2, 'y', NULL), (3, 2, 1, 'z', NULL),
+    (4, 2, NULL, 'w', NULL);
+"""
+
+
+def relation_formatter(strategy):
+    return (
+        RelationFormatter(strategy=strategy)
+        .set_relation("rel_posts.comments", "rel_comments", foreign_column="post_id")
+        .set_relation(
+            "rel_comments.author",
+            "rel_authors",
+            relationship_type="one",
+            local_column="author_id",
+        )
+    )
+
+
+# The comments of each post with the author of each comment, comment 4 has no author
+RELATION_CONTENTS = [
+    (1, [(1, "A"), (2, "B")]),
+    (2, [(3, "A"), (4, None)]),
+    (3, []),
+]
+
+
+def relation_contents(posts):
+    """The ids of the nested comments of each post, with the name of the author of each comment"""
+    return [
+        (
+            p.id,
+            sorted((c.id, c.author.name if c.author else None) for c in p.comments),
+        )
+        for p in posts
+    ]
+
+
+def test_lateral_relations_match_joined_relations():
+    """
+    Tests that relations loaded in LATERAL subqueries match the relations loaded from joins
+    """
+    with PostgresConfig().session() as session:
+        with session.connect_with_cursor() as cursor:
+            cursor.execute(RELATION_TABLES)
+
+        lateral = (
+            Select("rel_posts")
+            .order_by("id")
+            .respond_with_associated_objects(relation_formatter("lateral"))
+        )
+        joined_posts = (
+            Select("rel_posts")
+            .join(right_table="rel_comments", right_col="post_id", type="LEFT OUTER")
+            .join(
+                left_table="rel_comments",
+                left_col="author_id",
+                right_table="rel_authors",
+                right_col="id",
+                type="LEFT OUTER",
+            )
+            .order_by("id")
+            .respond_with_associated_objects(relation_formatter("join"))
+            .execute(session)
+        )
+        lateral_sql = lateral.to_sql(session).as_string(cursor)
+        posts = lateral.execute(session)
+        # Dataclass equality ignores the relation attributes
+        assert posts == joined_posts
+        assert relation_contents(posts) == relation_contents(joined_posts)
+
+    assert "LEFT JOIN LATERAL" in lateral_sql
+    assert 'JOIN "rel_comments"' not in lateral_sql
+    assert relation_contents(posts) == RELATION_CONTENTS
+    assert posts[0].score == decimal.Decimal("1.25")
+    assert posts[0].comments[0].at == datetime.datetime(2024, 1, 1, 0, 0, 0, 123000)
+    assert posts[0].comments[0].author.joined == datetime.datetime(
+        2024, 1, 1, 8, 0, 0, 500000, tzinfo=datetime.timezone.utc
+    )
+    # The same author is one object
+    assert posts[0].comments[0].author is posts[1].comments[0].author
+    assert posts[2].comments == []
+
+
+def test_selectin_relations():
+    """
+    Tests that relations loaded with one query per relation match the relations loaded from joins,
+    and that the limit applies to the root objects
+    """
+    with PostgresConfig().session() as session:
+        with session.connect_with_cursor() as cursor:
+            cursor.execute(RELATION_TABLES)
+
+        joined = (
+            Select("rel_posts")
+            .join(right_table="rel_comments", right_col="post_id", type="LEFT OUTER")
+            .join(
+                left_table="rel_comments",
+                left_col="author_id",
+                right_table="rel_authors",
+                right_col="id",
+                type="LEFT OUTER",
+            )
+            .order_by("id")
+            .respond_with_associated_objects(relation_formatter("join"))
+            .execute(session)
+        )
+        with mock.patch(
+            "sqlark.response_formatters.RelationFormatter.select_related",
+            side_effect=RelationFormatter.select_related,
+        ) as select_related:
+            posts = (
+                Select("rel_posts")
+                .order_by("id")
+                .limit(2)
+                .respond_with_associated_objects(relation_formatter("selectin"))
+                .execute(session)
+            )
+        all_posts = (
+            Select("rel_posts")
+            .order_by("id")
+            .respond_with_associated_objects(relation_formatter("selectin"))
+            .execute(session)
+        )
+
+    # Dataclass equality ignores the relation attributes
+    assert posts == joined[:2]
+    assert relation_contents(posts) == relation_contents(joined[:2])
+    assert relation_contents(posts) == RELATION_CONTENTS[:2]
+    assert relation_contents(all_posts) == RELATION_CONTENTS
+    assert next(c for c in posts[1].comments if c.id == 4).author is None
+    assert select_related.call_count == 2
+    assert sorted(select_related.call_args_list[0].args[2]) == [1, 2]
+    assert posts[0].comments[0].author is posts[1].comments[0].author
+
+
+def test_selectin_relations_with_one_pooled_connection():
+    """
+    Tests that the selectin queries run after the select returned its connection to the pool
+    """
+    pg_config = PostgresConfig(pooled=True, pool_max_size=1, pool_timeout=1)
+    try:
+        # Temporary tables of the only connection of the pool
+        with pg_config.connect_with_cursor() as cursor:
+            cursor.execute(RELATION_TABLES)
+
+        posts = (
+            Select("rel_posts")
+            .order_by("id")
+            .respond_with_associated_objects(relation_formatter("selectin"))
+            .execute(pg_config)
+        )
+        assert relation_contents(posts) == RELATION_CONTENTS
+        assert pg_config.pool_stats().connections_created == 1
+    finally:
+        pg_config.close()
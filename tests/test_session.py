@@ -0,0 +1,76 @@
+"""
+Unit testing for Session
+"""
+
+import pytest
+import psycopg2
+from sqlark import Insert, PostgresConfig, Select, Session
+
+
+def backend_pid(pg_config):
+    with pg_config.connect_with_cursor() as cursor:
+        cursor.execute("SELECT pg_backend_pid()")
+        return cursor.fetchone()[0]
+
+
+def test_session_reuses_connection():
+    pg_config = PostgresConfig()
+    with pg_config.session() as session:
+        assert isinstance(session, Session)
+        assert backend_pid(session) == backend_pid(session)
+        assert backend_pid(session) == session.connection.get_backend_pid()
+    assert session.connection_params == pg_config.connection_params
+
+
+def test_session_is_closed_after_exit():
+    with PostgresConfig().session() as session:
+        connection = session.connection
+    assert connection.closed
+    with pytest.raises(ValueError):
+        with session.connect_with_cursor():
+            pass
+
+
+def test_transactional_session_commits_once():
+    pg_config = PostgresConfig()
+    with pg_config.session(transactional=True) as session:
+        with session.connect_with_cursor() as cursor:
+            cursor.execute(
+                "CREATE TEMP TABLE session_posts (id serial primary key, title text)"
+            )
+        Insert("session_posts").values([{"title": "a"}, {"title": "b"}]).execute(
+            session
+        )
+        result = (
+            Select("session_posts")
+            .where(column="title", operator="=", value="b")
+            .execute(session)
+        )
+        assert result == [{"session_posts.id": 2, "session_posts.title": "b"}]
+
+        # A single transaction spans every command in the session
+        with session.connect_with_cursor() as cursor:
+            cursor.execute("SELECT txid_current_if_assigned() IS NOT NULL")
+            assert cursor.fetchone()[0]
+
+
+def test_transactional_session_rolls_back_on_error():
+    pg_config = PostgresConfig(pooled=True, pool_max_size=1)
+    try:
+        with pg_config.session() as session:
+            with session.connect_with_cursor() as cursor:
+                cursor.execute("CREATE TEMP TABLE session_comments (body text)")
+
+        with pytest.raises(psycopg2.Error):
+            with pg_config.session(transactional=True) as session:
+                Insert("session_comments").values({"body": "lost"}).execute(session)
+                with session.connect_with_cursor() as cursor:
+                    cursor.execute("SELECT 1/0")
+
+        with pg_config.session() as session:
+            with session.connect_with_cursor() as cursor:
+                cursor.execute("SELECT count(*) FROM session_comments")
+                assert cursor.fetchone()[0] == 0
+        assert pg_config.pool_stats().connections_created == 1
+    finally:
+        pg_config.close()
@@ -0,0 +1,148 @@
+"""
+Unit testing for the statement cache
+"""
+
+import time
+from unittest import mock
+from psycopg2 import sql
+from sqlark import PostgresConfig, Select, Count, Update, Delete
+from sqlark.column_definition import ColumnDefinition
+from sqlark.schema_cache import SCHEMA_CACHE
+from sqlark.statement_cache import STATEMENT_CACHE, StatementCache, composable_key
+
+COLUMNS = [
+    ColumnDefinition(table_name="posts", name="id", data_type="integer"),
+    ColumnDefinition(table_name="posts", name="title", data_type="text"),
+]
+
+
+def test_fingerprint_ignores_parameters():
+    def select(title):
+        return (
+            Select("posts")
+            .where(column="title", operator="=", value=title)
+            .order_by("id")
+        )
+
+    assert select("a").fingerprint() == select("b").fingerprint()
+    assert select("a").fingerprint() != Select("posts").fingerprint()
+    assert (
+        select("a").fingerprint()
+        != Select("posts")
+        .where(column="title", operator="=", value="a")
+        .order_by("title")
+        .fingerprint()
+    )
+    assert Select("posts").fingerprint() != Count("posts").fingerprint()
+    assert (
+        Count("posts").group_by("title").fingerprint()
+        != Count("posts").group_by("id").fingerprint()
+    )
+    assert (
+        Delete("posts").where(column="id", operator="=", value=1).fingerprint()
+        == Delete("posts").where(column="id", operator="=", value=2).fingerprint()
+    )
+    assert (
+        Update("posts").set({"title": "a"}).fingerprint()
+        != Update("posts").set({"id": 1}).fingerprint()
+    )
+    # Limits, offsets and updated values are parameters
+    assert (
+        Select("posts").limit(10).offset(20).fingerprint()
+        == Select("posts").limit(50).offset(0).fingerprint()
+    )
+    assert Select("posts").limit(10).fingerprint() != Select("posts").fingerprint()
+    assert (
+        Select("posts").columns("id").fingerprint()
+        != Select("posts").columns("title").fingerprint()
+    )
+    assert (
+        Select("posts").exclude("title").fingerprint() != Select("posts").fingerprint()
+    )
+    assert (
+        Update("posts").set({"title": "a"}).increment("id", 1).fingerprint()
+        == Update("posts").set({"title": "b"}).increment("id", 2).fingerprint()
+    )
+
+
+def test_composable_key():
+    # Composed SQL is not confused with an identifier of the same strings
+    assert composable_key(sql.Identifier("posts")) != composable_key(
+        sql.Composed([sql.SQL("I"), sql.SQL("posts")])
+    )
+    assert composable_key(sql.Literal(1)) != composable_key(sql.Literal(True))
+    assert composable_key(sql.Literal([1, 2])) == composable_key(sql.Literal([1, 2]))
+
+
+def test_lru_eviction():
+    cache = StatementCache(maxsize=2)
+    cache.set(("a",), "SELECT 1")
+    cache.set(("b",), "SELECT 2")
+    assert cache.get(("a",)) == "SELECT 1"
+    cache.set(("c",), "SELECT 3")
+
+    assert cache.get(("b",)) is None
+    assert cache.get(("a",)) == "SELECT 1"
+    assert len(cache) == 2
+    assert (cache.hits, cache.misses) == (2, 1)
+
+
+@mock.patch("sqlark.utilities.get_column_definitions", return_value=COLUMNS)
+def test_repeated_shape_skips_composition(_):
+    STATEMENT_CACHE.clear()
+    pg_config = PostgresConfig()
+    with pg_config.session() as session:
+        with session.connect_with_cursor() as cursor:
+            cursor.execute(
+                "CREATE TEMP TABLE posts (id integer, title text);"
+                "INSERT INTO posts VALUES (1, 'a'), (2, 'b')"
+            )
+
+        def select(post_id):
+            return Select("posts").where(column="id", operator="=", value=post_id)
+
+        assert select(1).execute(session) == [{"posts.id": 1, "posts.title": "a"}]
+        assert Update("posts").set({"title": "c"}).increment("id", 10).where(
+            column="id", operator="=", value=1
+        ).execute(session) == [{"id": 11, "title": "c"}]
+        assert Select("posts").order_by("id").offset(1).limit(1).execute(session) == [
+            {"posts.id": 11, "posts.title": "c"}
+        ]
+        with mock.patch.object(Select, "to_sql") as to_sql:
+            assert select(2).execute(session) == [{"posts.id": 2, "posts.title": "b"}]
+            assert not to_sql.called
+
+        # A schema change makes the cached statements stale
+        SCHEMA_CACHE.invalidate(pg_config, "posts")
+        with mock.patch.object(Select, "to_sql", wraps=select(1).to_sql) as to_sql:
+            select(1).execute(session)
+            assert to_sql.called
+
+        # The cache can be turned off per configuration
+        pg_config.statement_cache = False
+        with mock.patch.object(Select, "to_sql", wraps=select(1).to_sql) as to_sql:
+            select(1).execute(session)
+            assert to_sql.called
+
+    assert STATEMENT_CACHE.hits == 1
+
+
+def test_statements_expire_with_schema_cache_ttl():
+    pg_config = PostgresConfig(schema_cache_ttl=0.05)
+    with pg_config.session() as session:
+        with session.connect_with_cursor() as cursor:
+            cursor.execute(
+                "CREATE TEMP TABLE ttl_posts (id integer);"
+                "INSERT INTO ttl_posts VALUES (1)"
+            )
+
+        assert Select("ttl_posts").execute(session) == [{"ttl_posts.id": 1}]
+        with session.connect_with_cursor() as cursor:
+            cursor.execute("ALTER TABLE ttl_posts ADD COLUMN title text DEFAULT 'a'")
+        assert Select("ttl_posts").execute(session) == [{"ttl_posts.id": 1}]
+
+        # The cached statement is not used once the definitions of its table expire
+        time.sleep(0.1)
+        assert Select("ttl_posts").execute(session) == [
+            {"ttl_posts.id": 1, "ttl_posts.title": "a"}
+        ]
@@ -17,9 +17,9 @@ def test_update_01(pg_connection):
     )
     assert (
         s.to_sql(PostgresConfig()).as_string(pg_connection).strip()
-        == 'UPDATE "comments" SET "author"=\'John Doe\',"body"=\'Hello World\'  WHERE "comments"."id" = %s RETURNING *'
+        == 'UPDATE "comments" SET "author"=%s,"body"=%s  WHERE "comments"."id" = %s RETURNING *'
     )
-    assert s.get_params() == [1]
+    assert s.get_params() == ["John Doe", "Hello World", 1]
 
 
 def test_update_02(pg_connection):
@@ -33,9 +33,9 @@ def test_update_02(pg_connection):
     )
     assert (
         s.to_sql(PostgresConfig()).as_string(pg_connection).strip()
-        == 'UPDATE "comments" SET "author"=\'John Doe\',"body"=\'Hello World\'  WHERE "comments"."id" = %s RETURNING *'
+        == 'UPDATE "comments" SET "author"=%s,"body"=%s  WHERE "comments"."id" = %s RETURNING *'
     )
-    assert s.get_params() == ["1; DROP TABLE comments"]
+    assert s.get_params() == ["John Doe", "Hello World", "1; DROP TABLE comments"]
 
 
 def test_increment(pg_connection):
@@ -50,6 +50,6 @@ def test_increment(pg_connection):
     )
     assert (
         s.to_sql(PostgresConfig()).as_string(pg_connection).strip()
-        == 'UPDATE "comments" SET "likes"="likes" + 1  WHERE "comments"."id" = %s RETURNING *'
+        == 'UPDATE "comments" SET "likes"="likes" + %s  WHERE "comments"."id" = %s RETURNING *'
     )
-    assert s.get_params() == [1]
+    assert s.get_params() == [1, 1]
@@ -1,7 +1,9 @@
+import pytest
 from pytest import mark
-from sqlark import utilities
+from unittest import mock
+from sqlark import utilities, PostgresConfig, Select
 from sqlark.column_definition import ColumnDefinition
-from dataclasses import fields
+from dataclasses import fields, FrozenInstanceError
 from unittest import TestCase
 
 
@@ -42,6 +44,32 @@ from unittest import TestCase
 def test_decompose_row(row, expected):
     TestCase().assertDictEqual(utilities.decompose_row(row), expected)
 
+    # The decoding plan gives the same result for dictionary rows and for tuple rows
+    plan = utilities.DecodingPlan.from_result_set([row])
+    assert plan.decompose(row) == expected
+    description = [(name,) for name in row]
+    plan = utilities.DecodingPlan.from_result_set([tuple(row.values())], description)
+    assert plan.decompose(tuple(row.values())) == expected
+    assert plan.to_dict(tuple(row.values())) == row
+
+
+def test_decoding_plan_reads_rows_by_position():
+    with PostgresConfig().connect_with_cursor() as cursor:
+        cursor.execute(
+            'SELECT 1 AS "posts.id", \'Post 1\' AS "posts.title", 2 AS "authors.id", 3 AS count'
+        )
+        rows = cursor.fetchall()
+        plan = utilities.DecodingPlan.from_result_set(rows, cursor.description)
+
+    assert not plan.by_key
+    assert plan.tables == [("posts", ["id", "title"], [0, 1]), ("authors", ["id"], [2])]
+    assert plan.decompose(rows[0]) == {
+        "posts": {"id": 1, "title": "Post 1"},
+        "authors": {"id": 2},
+        "count": 3,
+    }
+    assert utilities.DecodingPlan.from_result_set([]) is None
+
 
 @mark.parametrize(
     "class_definitions",
@@ -266,3 +294,185 @@ def test_build_complex_dataclasses(class_definitions):
                 assert f.type.__origin__ == list
             if column.data_type in utilities.POSTGRES_DATA_TYPES:
                 assert f.type == utilities.POSTGRES_DATA_TYPES[column.data_type]
+
+
+def test_build_dataclasses_reuses_classes():
+    class_definitions = {
+        "posts": [
+            ColumnDefinition("posts", "id", "integer", False, None),
+            ColumnDefinition("posts", "author", "authors", True, None),
+        ],
+        "authors": [ColumnDefinition("authors", "id", "integer", False, None)],
+    }
+    built = utilities.build_dataclasses(class_definitions)
+    rebuilt = utilities.build_dataclasses(
+        {t: list(c) for t, c in class_definitions.items()}
+    )
+    assert rebuilt == built
+    assert rebuilt is not built
+    assert isinstance(rebuilt["posts"](id=1), built["posts"])
+
+    # A different signature, or use_cache=False, builds new classes
+    class_definitions["authors"].append(
+        ColumnDefinition("authors", "name", "text", True, None)
+    )
+    changed = utilities.build_dataclasses(class_definitions)
+    assert changed["authors"] is not built["authors"]
+    assert changed["posts"] is not built["posts"]
+    uncached = utilities.build_dataclasses(class_definitions, use_cache=False)
+    assert uncached["authors"] is not changed["authors"]
+
+
+@mark.parametrize("frozen", [False, True])
+def test_build_slotted_dataclasses(frozen):
+    class_definitions = {
+        "posts": [
+            ColumnDefinition("posts", "id", "integer", False, None),
+            ColumnDefinition("posts", "author", "authors", True, None),
+        ],
+        "authors": [ColumnDefinition("authors", "id", "integer", False, None)],
+    }
+    built = utilities.build_dataclasses(class_definitions, slots=True, frozen=frozen)
+    assert built != utilities.build_dataclasses(class_definitions)
+
+    author = built["authors"](id=1)
+    post = built["posts"](id=1, author=author)
+    for obj in (author, post):
+        assert not hasattr(obj, "__dict__")
+        with pytest.raises((AttributeError, TypeError)):
+            obj.undefined = 1
+
+    assert post == built["posts"](id=1, author=None)
+    if frozen:
+        with pytest.raises(FrozenInstanceError):
+            post.id = 2
+        assert hash(post) == hash(built["posts"](id=1, author=None))
+    else:
+        post.id = 2
+        assert post.id == 2
+
+
+def test_hash_frozen_dataclass_with_json_and_array():
+    class_definitions = {
+        "posts": [
+            ColumnDefinition("posts", "id", "integer", False, None),
+            ColumnDefinition("posts", "data", "jsonb", False, None),
+            ColumnDefinition("posts", "tags", "ARRAY", False, None),
+            ColumnDefinition("posts", "author", "authors", True, None),
+        ],
+        "authors": [ColumnDefinition("authors", "profile", "jsonb", False, None)],
+    }
+    built = utilities.build_dataclasses(class_definitions, frozen=True)
+
+    def post(data, tags):
+        return built["posts"](id=1, data=data, tags=tags)
+
+    a = post({"b": [1, {"c": 2}], "a": None}, ["x", "y"])
+    assert hash(a) == hash(post({"a": None, "b": [1, {"c": 2}]}, ["x", "y"]))
+    assert len({a, post({"b": [1, {"c": 3}]}, ["x", "y"])}) == 2
+    assert len({a, post({"b": [1, {"c": 2}], "a": None}, ["y", "x"])}) == 2
+
+    # Classes without relations
+    author = built["authors"](profile={"links": ["a", "b"]})
+    assert hash(author) == hash(built["authors"](profile={"links": ["a", "b"]}))
+
+
+def test_prefetch_schema_listed_tables():
+    pg_config = PostgresConfig()
+    prefetched = utilities.prefetch_schema(pg_config, ["pg_namespace", "pg_am"])
+    assert set(prefetched) == {"pg_namespace", "pg_am"}
+    assert [c.name for c in prefetched["pg_am"]][:2] == ["oid", "amname"]
+
+    # The cached definitions are used without connecting to the database
+    with mock.patch.object(
+        PostgresConfig, "connect_with_cursor", side_effect=AssertionError
+    ):
+        assert (
+            utilities.get_column_definitions("pg_am", pg_config)
+            is (prefetched["pg_am"])
+        )
+        Select("pg_namespace").join(
+            right_table="pg_am", left_col="oid", right_col="oid"
+        ).to_sql(pg_config)
+
+
+def test_prefetch_schema_all_tables():
+    with PostgresConfig().session() as session:
+        with session.connect_with_cursor() as cursor:
+            cursor.execute("CREATE TEMP TABLE prefetch_posts (id integer, title text)")
+        prefetched = utilities.prefetch_schema(session)
+
+    assert "pg_namespace" not in prefetched
+    assert [c.name for c in prefetched["prefetch_posts"]] == ["id", "title"]
+    assert (
+        utilities.SCHEMA_CACHE.get(session, "prefetch_posts")
+        is (prefetched["prefetch_posts"])
+    )
+
+
+def test_prefetch_schema_missing_table():
+    with pytest.raises(ValueError):
+        utilities.prefetch_schema(PostgresConfig(), ["prefetch_missing_table"])
+    assert (
+        utilities.SCHEMA_CACHE.get(PostgresConfig(), "prefetch_missing_table") is None
+    )
+
+
+def test_column_definitions_match_information_schema():
+    """
+    The pg_catalog introspection reports the same columns as information_schema.columns
+    """
+    with PostgresConfig().session(transactional=True) as session:
+        with session.connect_with_cursor() as cursor:
+            cursor.execute(
+                """
+                CREATE DOMAIN pg_temp.positive_int AS integer NOT NULL CHECK (VALUE > 0);
+                CREATE DOMAIN pg_temp.tag_list AS text[];
+                CREATE TYPE pg_temp.mood AS ENUM ('happy', 'sad');
+                CREATE TEMP TABLE catalog_types (
+                    id serial primary key,
+                    title varchar(20) NOT NULL DEFAULT 'untitled',
+                    code char(3),
+                    tags text[],
+                    domain_tags tag_list,
+                    amount numeric(10, 2),
+                    ratio double precision,
+                    created_at timestamp without time zone DEFAULT now(),
+                    updated_at timestamptz,
+                    birthday date,
+                    meta jsonb,
+                    data bytea,
+                    rank positive_int,
+                    feeling mood,
+                    double_ratio double precision GENERATED ALWAYS AS (ratio * 2) STORED
+                );
+                ALTER TABLE catalog_types DROP COLUMN code;
+                """
+            )
+            cursor.execute(
+                """
+                SELECT table_name, column_name, data_type, is_nullable = 'YES', column_default
+                FROM information_schema.columns
+                WHERE table_name = 'catalog_types'
+                ORDER BY ordinal_position
+                """
+            )
+            expected = [tuple(r) for r in cursor.fetchall()]
+
+        columns = utilities.get_column_definitions(
+            "catalog_types", session, use_cache=False
+        )
+        session.rollback()
+
+    assert [
+        (c.table_name, c.name, c.data_type, c.is_nullable, c.default) for c in columns
+    ] == expected
+    assert all(isinstance(c.is_nullable, bool) for c in columns)
+    by_name = {c.name: c for c in columns}
+    assert by_name["tags"].data_type == "ARRAY"
+    assert by_name["domain_tags"].data_type == "ARRAY"
+    assert by_name["rank"].data_type == "integer"
+    assert by_name["rank"].is_nullable is False
+    assert by_name["feeling"].data_type == "USER-DEFINED"
+    assert by_name["double_ratio"].default is None
+    assert [c.name for c in columns if c.is_primary_key] == ["id"]